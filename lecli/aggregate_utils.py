@@ -0,0 +1,261 @@
+"""
+Aggregate utils module.
+"""
+import json
+import math
+import random
+import re
+
+import click
+
+# values kept by a percentile, above this many values a uniform sample of them is kept
+RESERVOIR_SIZE = 10000
+# values counted by a top-k per requested value, the counts of rare values are approximate
+TOP_CAPACITY_FACTOR = 10
+SPEC_PATTERN = re.compile(r'^(count|sum|avg|min|max|p(\d{1,2}(?:\.\d+)?)|top(\d+))'
+                          r'(?::(.+))?$', re.IGNORECASE)
+KVP_PATTERN = re.compile(r'([\w.\-]+)=("[^"]*"|[^\s,]+)')
+
+
+class Count(object):
+    """
+    Number of events, or of events having the field.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, dummy_value):
+        """Count a value"""
+        self.count += 1
+
+    def result(self):
+        """Get the count"""
+        return self.count
+
+
+class Sum(object):
+    """
+    Sum of the numeric values of a field.
+    """
+
+    def __init__(self):
+        self.total = 0.0
+
+    def add(self, value):
+        """Add a value to the sum"""
+        self.total += value
+
+    def result(self):
+        """Get the sum"""
+        return self.total
+
+
+class Average(Sum):
+    """
+    Mean of the numeric values of a field.
+    """
+
+    def __init__(self):
+        super(Average, self).__init__()
+        self.count = 0
+
+    def add(self, value):
+        """Add a value to the mean"""
+        super(Average, self).add(value)
+        self.count += 1
+
+    def result(self):
+        """Get the mean, None if there were no values"""
+        return self.total / self.count if self.count else None
+
+
+class Extreme(object):
+    """
+    Minimum or maximum of the numeric values of a field.
+    """
+
+    def __init__(self, pick):
+        self.pick = pick
+        self.value = None
+
+    def add(self, value):
+        """Compare a value with the extreme so far"""
+        self.value = value if self.value is None else self.pick(self.value, value)
+
+    def result(self):
+        """Get the extreme, None if there were no values"""
+        return self.value
+
+
+class Percentile(object):
+    """
+    Percentile of the numeric values of a field, estimated from a uniform reservoir sample of at
+    most RESERVOIR_SIZE values. It is exact as long as there are fewer values than that.
+    """
+
+    def __init__(self, percent, size=RESERVOIR_SIZE):
+        self.percent = percent
+        self.size = size
+        self.sample = []
+        self.count = 0
+
+    def add(self, value):
+        """Offer a value to the sample"""
+        self.count += 1
+        if len(self.sample) < self.size:
+            self.sample.append(value)
+        else:
+            index = random.randint(0, self.count - 1)
+            if index < self.size:
+                self.sample[index] = value
+
+    def result(self):
+        """Get the nearest rank percentile of the sample, None if there were no values"""
+        if not self.sample:
+            return None
+        ordered = sorted(self.sample)
+        rank = int(math.ceil(self.percent / 100.0 * len(ordered))) - 1
+        return ordered[max(0, min(rank, len(ordered) - 1))]
+
+
+class Top(object):
+    """
+    Most frequent values of a field, counted with the space-saving algorithm: at most
+    TOP_CAPACITY_FACTOR times k values are counted, and a new value replaces the least frequent
+    one, inheriting its count.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.capacity = k * TOP_CAPACITY_FACTOR
+        self.counts = {}
+
+    def add(self, value):
+        """Count an occurrence of a value"""
+        if not isinstance(value, basestring):
+            value = json.dumps(value, sort_keys=True)
+        if value in self.counts or len(self.counts) < self.capacity:
+            self.counts[value] = self.counts.get(value, 0) + 1
+            return
+        rarest = min(self.counts, key=self.counts.get)
+        self.counts[value] = self.counts.pop(rarest) + 1
+
+    def result(self):
+        """Get the k most frequent values and their counts, most frequent first"""
+        ranked = sorted(self.counts.iteritems(), key=lambda item: (-item[1], item[0]))
+        return [[value, count] for value, count in ranked[:self.k]]
+
+
+AGGREGATORS = {
+    'count': Count,
+    'sum': Sum,
+    'avg': Average,
+    'min': lambda: Extreme(min),
+    'max': lambda: Extreme(max),
+}
+
+
+def parse_spec(spec):
+    """
+    Parse an aggregation spec like 'count', 'sum:bytes', 'p99:latency' or 'top10:path' into its
+    function, field and aggregator. Raise ValueError if the spec is not valid.
+    """
+    match = SPEC_PATTERN.match(spec.strip())
+    if not match:
+        raise ValueError(spec)
+    function, field = match.group(1).lower(), match.group(4)
+    if field is None and function != 'count':
+        raise ValueError(spec)
+    if match.group(2):
+        return function, field, Percentile(float(match.group(2)))
+    if match.group(3):
+        return function, field, Top(max(1, int(match.group(3))))
+    return function, field, AGGREGATORS[function]()
+
+
+def parse_specs_callback(dummy_ctx, dummy_param, value):
+    """
+    Click callback validating aggregation specs.
+    """
+    for spec in value or ():
+        try:
+            parse_spec(spec)
+        except ValueError:
+            raise click.BadParameter("'%s' is not an aggregation, use count, sum, avg, min, "
+                                     "max, pNN or topK followed by ':field'" % spec)
+    return value
+
+
+def event_fields(event):
+    """
+    Get the fields of an event: its message decoded as a json object, or else the key=value
+    pairs of its message.
+    """
+    message = event.get('message') or ''
+    try:
+        fields = json.loads(message)
+        if isinstance(fields, dict):
+            return fields
+    except ValueError:
+        pass
+    return dict((key, raw.strip('"')) for key, raw in KVP_PATTERN.findall(message))
+
+
+def field_value(fields, field):
+    """
+    Get the value of a field, following dots into nested objects, None if it is missing.
+    """
+    value = fields
+    for part in field.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return fields.get(field)
+        value = value[part]
+    return value
+
+
+def to_number(value):
+    """
+    Get a value as a float, None if it is not numeric.
+    """
+    if isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Aggregation(object):
+    """
+    Aggregations over the fields of streamed events. Every aggregator holds a bounded amount of
+    state, so events can be fed page by page and dropped once they are added.
+    """
+
+    def __init__(self, specs):
+        self.specs = list(specs)
+        self.aggregators = [parse_spec(spec) for spec in self.specs]
+
+    def add_events(self, events):
+        """
+        Feed events to every aggregator.
+        """
+        for event in events:
+            fields = event_fields(event)
+            for function, field, aggregator in self.aggregators:
+                value = None if field is None else field_value(fields, field)
+                if function == 'count':
+                    if field is None or value is not None:
+                        aggregator.add(value)
+                elif function.startswith('top'):
+                    if value is not None:
+                        aggregator.add(value)
+                elif to_number(value) is not None:
+                    aggregator.add(to_number(value))
+
+    def results(self):
+        """
+        Get the results of the aggregations in the order of their specs.
+        """
+        return [(spec, aggregator.result())
+                for spec, (_, _, aggregator) in zip(self.specs, self.aggregators)]
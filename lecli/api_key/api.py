@@ -37,7 +37,7 @@ def delete(api_key_id):
     headers = api_utils.generate_headers('owner', method='DELETE', body='', action=action)
 
     try:
-        response = requests.delete(url, headers=headers)
+        response = api_utils.get_session().delete(url, headers=headers)
         if response_utils.response_error(response):
             sys.stderr.write('Deleting api key failed.')
             sys.exit(1)
@@ -56,7 +56,7 @@ def get(api_key_id):
     headers = api_utils.generate_headers('rw', method='GET', body='',
                                          action=action)
     try:
-        response = requests.get(url, headers=headers)
+        response = api_utils.get_session().get(url, headers=headers)
         handle_api_key_response(response)
     except requests.exceptions.RequestException as error:
         sys.stderr.write(error)
@@ -71,7 +71,7 @@ def get_all(owner=False):
     headers = api_utils.generate_headers('owner' if owner else 'rw', method='GET', body='',
                                          action=action)
     try:
-        response = requests.get(url, headers=headers)
+        response = api_utils.get_session().get(url, headers=headers)
         handle_api_key_response(response)
     except requests.exceptions.RequestException as error:
         sys.stderr.write(error)
@@ -88,7 +88,7 @@ def create(payload):
                                          action=action)
 
     try:
-        response = requests.post(url, headers=headers, json=payload)
+        response = api_utils.get_session().post(url, headers=headers, json=payload)
         if response_utils.response_error(response):
             sys.stderr.write('Create api key failed.')
             sys.exit(1)
@@ -114,7 +114,7 @@ def update(api_key_id, active):
     headers = api_utils.generate_headers('owner', method='PATCH', body=json.dumps(payload),
                                          action=action)
     try:
-        response = requests.patch(url, json=payload, headers=headers)
+        response = api_utils.get_session().patch(url, json=payload, headers=headers)
         if response_utils.response_error(response):
             sys.stderr.write('Failed to %s api key with id: %s \n' %
                              ('enable' if active else 'disable', api_key_id))
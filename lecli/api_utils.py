@@ -4,14 +4,17 @@ Configuration and api keys util module.
 import sys
 import ConfigParser
 import base64
+import collections
 import hashlib
 import hmac
 import os
 import json
 
-import datetime
+import threading
+import time
 
 import click
+import requests
 import validators
 from appdirs import user_config_dir
 
@@ -21,9 +24,28 @@ AUTH_SECTION = 'Auth'
 URL_SECTION = 'Url'
 LOGGROUPS_SECTION = 'LogGroups'
 CLI_FAVORITES_SECTION = 'Cli_Favorites'
+CONNECTION_SECTION = 'Connection'
+CACHE_SECTION = 'Cache'
 CONFIG = ConfigParser.ConfigParser()
 CONFIG_FILE_PATH = os.path.join(user_config_dir(lecli.__name__), 'config.ini')
 DEFAULT_API_URL = 'https://rest.logentries.com'
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 60.0
+RATE_LIMIT_RETRIES = 5
+DEFAULT_LOGSET_CACHE_TTL = 300
+DEFAULT_QUERY_CACHE_SIZE = 100
+
+_SESSION_LOCK = threading.Lock()
+_SESSION = None
+_SETTINGS = None
+_CONFIG_STAMP = None
+_OWNER_SIGNER = None
+DATE_HEADER_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
+EMPTY_BODY_HASH = base64.b64encode(hashlib.sha256('').digest())
+
+Settings = collections.namedtuple('Settings', [
+    'account_resource_id', 'owner_api_key_id', 'owner_api_key', 'rw_api_key', 'ro_api_key',
+    'api_url', 'pool_size', 'timeout', 'logset_cache_ttl', 'query_cache_size', 'invalid'])
 
 
 def print_config_error_and_exit(section=None, config_key=None, value=None):
@@ -68,6 +90,14 @@ def init_config():
         dummy_config.add_section(URL_SECTION)
         dummy_config.set(URL_SECTION, 'api_url', 'https://rest.logentries.com')
 
+        dummy_config.add_section(CONNECTION_SECTION)
+        dummy_config.set(CONNECTION_SECTION, 'pool_size', str(DEFAULT_POOL_SIZE))
+        dummy_config.set(CONNECTION_SECTION, 'timeout', str(DEFAULT_TIMEOUT))
+
+        dummy_config.add_section(CACHE_SECTION)
+        dummy_config.set(CACHE_SECTION, 'logset_cache_ttl', str(DEFAULT_LOGSET_CACHE_TTL))
+        dummy_config.set(CACHE_SECTION, 'query_cache_size', str(DEFAULT_QUERY_CACHE_SIZE))
+
         dummy_config.write(config_file)
         config_file.close()
         click.echo("An empty config file created in path %s, please check and configure it. To "
@@ -81,9 +111,17 @@ def init_config():
 
 def load_config():
     """
-    Load config from OS specific config path into ConfigParser object.
+    Load config from OS specific config path into ConfigParser object. Loading it again is a
+    no-op as long as the config file has not changed, so processes running several commands
+    load it once.
     :return:
     """
+    global CONFIG, _CONFIG_STAMP  # pylint: disable=global-statement
+    if _SETTINGS is not None and _CONFIG_STAMP is not None and \
+            _CONFIG_STAMP == _config_stamp():
+        return
+    # read into a fresh parser, so that keys removed from the file are dropped on reload
+    CONFIG = ConfigParser.ConfigParser()
     files_read = CONFIG.read(CONFIG_FILE_PATH)
     if len(files_read) != 1:
         click.echo("Error: Config file '%s' not found, generating one..." % CONFIG_FILE_PATH,
@@ -94,6 +132,103 @@ def load_config():
         print_config_error_and_exit(section=AUTH_SECTION)
     if CONFIG.has_section(LOGGROUPS_SECTION):
         replace_loggroup_section()
+    reload_settings()
+    _CONFIG_STAMP = _config_stamp()
+
+
+def _config_stamp():
+    """
+    Get the path, modification time and size of the config file, None if it does not exist.
+    """
+    try:
+        stat = os.stat(CONFIG_FILE_PATH)
+    except OSError:
+        return None
+    return CONFIG_FILE_PATH, stat.st_mtime, stat.st_size
+
+
+def _is_positive_int(value):
+    """
+    Check whether the config value is a positive integer.
+    """
+    return str(value).isdigit() and int(value) > 0
+
+
+def _is_positive_float(value):
+    """
+    Check whether the config value is a positive number.
+    """
+    try:
+        return float(value) > 0
+    except (TypeError, ValueError):
+        return False
+
+
+# section, config key, validator, type of the value and default if the key is missing
+SETTINGS_SCHEMA = (
+    (AUTH_SECTION, 'account_resource_id', validators.uuid, str, None),
+    (AUTH_SECTION, 'owner_api_key_id', validators.uuid, str, None),
+    (AUTH_SECTION, 'owner_api_key', validators.uuid, str, None),
+    (AUTH_SECTION, 'rw_api_key', validators.uuid, str, None),
+    (AUTH_SECTION, 'ro_api_key', validators.uuid, str, None),
+    (URL_SECTION, 'api_url', lambda value: validators.url(str(value)), str, DEFAULT_API_URL),
+    (CONNECTION_SECTION, 'pool_size', _is_positive_int, int, DEFAULT_POOL_SIZE),
+    (CONNECTION_SECTION, 'timeout', _is_positive_float, float, DEFAULT_TIMEOUT),
+    (CACHE_SECTION, 'logset_cache_ttl', lambda value: str(value).isdigit(), int,
+     DEFAULT_LOGSET_CACHE_TTL),
+    (CACHE_SECTION, 'query_cache_size', lambda value: str(value).isdigit(), int,
+     DEFAULT_QUERY_CACHE_SIZE),
+)
+
+
+def build_settings():
+    """
+    Read and validate every setting once and return them as an immutable Settings object.
+    Missing or invalid settings are None, raw values of invalid ones are kept in 'invalid'.
+    """
+    values = {}
+    invalid = []
+    for section, config_key, validator, value_type, default in SETTINGS_SCHEMA:
+        try:
+            value = CONFIG.get(section, config_key)
+        except (ConfigParser.NoOptionError, ConfigParser.NoSectionError):
+            value = None
+        if value is None:
+            values[config_key] = default
+        elif validator(value):
+            values[config_key] = value_type(value)
+        else:
+            values[config_key] = None
+            invalid.append((config_key, value))
+    return Settings(invalid=tuple(invalid), **values)
+
+
+def reload_settings():
+    """
+    Replace the settings in use with freshly validated ones from the loaded config.
+    """
+    global _SETTINGS  # pylint: disable=global-statement
+    _SETTINGS = build_settings()
+    return _SETTINGS
+
+
+def get_settings():
+    """
+    Get the validated settings, validating the loaded config on first use.
+    """
+    return _SETTINGS or reload_settings()
+
+
+def _get_setting(section, config_key, description):
+    """
+    Get a validated setting, print config error and exit if it is missing or invalid.
+    """
+    settings = get_settings()
+    value = getattr(settings, config_key)
+    if value is None:
+        print_config_error_and_exit(section, description % config_key,
+                                    dict(settings.invalid).get(config_key))
+    return value
 
 
 def replace_loggroup_section():
@@ -117,88 +252,39 @@ def get_ro_apikey():
     """
     Get read-only api key from the config file.
     """
-
-    config_key = 'ro_api_key'
-    try:
-        ro_api_key = CONFIG.get(AUTH_SECTION, config_key)
-        if not validators.uuid(ro_api_key):
-            return get_rw_apikey()
-        else:
-            return ro_api_key
-    except ConfigParser.NoOptionError:
+    ro_api_key = get_settings().ro_api_key
+    if ro_api_key is None:
         # because read-write api key is a superset of read-only api key
         return get_rw_apikey()
+    return ro_api_key
 
 
 def get_rw_apikey():
     """
     Get read-write api key from the config file.
     """
-
-    config_key = 'rw_api_key'
-    try:
-        rw_api_key = CONFIG.get(AUTH_SECTION, config_key)
-        if not validators.uuid(rw_api_key):
-            print_config_error_and_exit(AUTH_SECTION, 'Read/Write API key(%s)' % config_key,
-                                        rw_api_key)
-        else:
-            return rw_api_key
-    except ConfigParser.NoOptionError:
-        print_config_error_and_exit(AUTH_SECTION, 'Read/Write API key(%s)' % config_key)
+    return _get_setting(AUTH_SECTION, 'rw_api_key', 'Read/Write API key(%s)')
 
 
 def get_owner_apikey():
     """
     Get owner api key from the config file.
     """
-
-    config_key = 'owner_api_key'
-    try:
-        owner_api_key = CONFIG.get(AUTH_SECTION, config_key)
-        if not validators.uuid(owner_api_key):
-            print_config_error_and_exit(AUTH_SECTION, 'Owner API key(%s)' % config_key,
-                                        owner_api_key)
-            return
-        else:
-            return owner_api_key
-    except ConfigParser.NoOptionError:
-        print_config_error_and_exit(AUTH_SECTION, 'Owner API key(%s)' % config_key)
+    return _get_setting(AUTH_SECTION, 'owner_api_key', 'Owner API key(%s)')
 
 
 def get_owner_apikey_id():
     """
     Get owner api key id from the config file.
     """
-
-    config_key = 'owner_api_key_id'
-    try:
-        owner_apikey_id = CONFIG.get(AUTH_SECTION, config_key)
-        if not validators.uuid(owner_apikey_id):
-            print_config_error_and_exit(AUTH_SECTION, 'Owner API key ID(%s)' % config_key,
-                                        owner_apikey_id)
-            return
-        else:
-            return owner_apikey_id
-    except ConfigParser.NoOptionError:
-        print_config_error_and_exit(AUTH_SECTION, 'Owner API key ID(%s)' % config_key)
+    return _get_setting(AUTH_SECTION, 'owner_api_key_id', 'Owner API key ID(%s)')
 
 
 def get_account_resource_id():
     """
     Get account resource id from the config file.
     """
-
-    config_key = 'account_resource_id'
-    try:
-        account_resource_id = CONFIG.get(AUTH_SECTION, config_key)
-        if not validators.uuid(account_resource_id):
-            print_config_error_and_exit(AUTH_SECTION, 'Account Resource ID(%s)' % config_key,
-                                        account_resource_id)
-            return
-        else:
-            return account_resource_id
-    except ConfigParser.NoOptionError:
-        print_config_error_and_exit(AUTH_SECTION, 'Account Resource ID(%s)' % config_key)
+    return _get_setting(AUTH_SECTION, 'account_resource_id', 'Account Resource ID(%s)')
 
 
 def get_named_logkey_group(name):
@@ -241,15 +327,7 @@ def generate_headers(api_key_type, method=None, action=None, body=None):
             "Content-Type": "application/json"
         }
     elif api_key_type is 'owner':  # Uses the owner-api-key
-        date_h = datetime.datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
-        content_type_h = "application/json"
-        signature = gensignature(get_owner_apikey(), date_h, content_type_h, method, action, body)
-        headers = {
-            "Date": date_h,
-            "Content-Type": content_type_h,
-            "authorization-api-key": "%s:%s" % (
-                get_owner_apikey_id().encode('utf8'), base64.b64encode(signature))
-        }
+        headers = get_owner_signer().headers(method, action, body)
 
     headers['User-Agent'] = 'lecli'
 
@@ -261,7 +339,7 @@ def gensignature(api_key, date, content_type, request_method, query_path, reques
     Generate owner access signature.
 
     """
-    hashed_body = base64.b64encode(hashlib.sha256(request_body).digest())
+    hashed_body = hash_body(request_body)
     canonical_string = request_method + content_type + date + query_path + hashed_body
 
     # Create a new hmac digester with the api key as the signing key and sha1 as the algorithm
@@ -271,19 +349,208 @@ def gensignature(api_key, date, content_type, request_method, query_path, reques
     return digest.digest()
 
 
+def hash_body(request_body):
+    """
+    Get the base64 encoded sha256 digest of a request body, the empty body of GET and DELETE
+    requests being hashed only once.
+    """
+    if not request_body:
+        return EMPTY_BODY_HASH
+    return base64.b64encode(hashlib.sha256(request_body).digest())
+
+
+class OwnerSigner(object):
+    """
+    Signs requests with the owner api key. An hmac keyed with the api key is built once and
+    copied for every request, and the Date header is formatted once per second.
+    """
+    content_type = "application/json"
+
+    def __init__(self, api_key, api_key_id):
+        self.api_key = api_key
+        self.api_key_id = api_key_id
+        self.encoded_api_key_id = api_key_id.encode('utf8')
+        self.prototype = hmac.new(api_key, digestmod=hashlib.sha1)
+        self.lock = threading.Lock()
+        self.date_second = None
+        self.date_header = None
+
+    def date(self):
+        """
+        Get the Date header of the current second.
+        """
+        now = int(time.time())
+        with self.lock:
+            if now != self.date_second:
+                self.date_header = time.strftime(DATE_HEADER_FORMAT, time.gmtime(now))
+                self.date_second = now
+            return self.date_header
+
+    def signature(self, date, request_method, query_path, request_body):
+        """
+        Generate owner access signature, the same as gensignature does.
+        """
+        digest = self.prototype.copy()
+        digest.update(request_method + self.content_type + date + query_path +
+                      hash_body(request_body))
+        return digest.digest()
+
+    def headers(self, request_method, query_path, request_body):
+        """
+        Generate the headers of a request signed with the owner api key.
+        """
+        date = self.date()
+        signature = self.signature(date, request_method, query_path, request_body)
+        return {
+            "Date": date,
+            "Content-Type": self.content_type,
+            "authorization-api-key": "%s:%s" % (self.encoded_api_key_id,
+                                                base64.b64encode(signature))
+        }
+
+
+def get_owner_signer():
+    """
+    Get the signer of the owner api key, creating it again only when the key changes.
+    """
+    global _OWNER_SIGNER  # pylint: disable=global-statement
+    api_key, api_key_id = get_owner_apikey(), get_owner_apikey_id()
+    signer = _OWNER_SIGNER
+    if signer is None or (signer.api_key, signer.api_key_id) != (api_key, api_key_id):
+        signer = _OWNER_SIGNER = OwnerSigner(api_key, api_key_id)
+    return signer
+
+
 def get_api_url():
     """
     Get management url from the config file
     """
-    config_key = 'api_url'
-    try:
-        url = CONFIG.get(URL_SECTION, config_key)
-        if validators.url(str(url)):
-            return url
-        else:
-            print_config_error_and_exit(URL_SECTION, 'REST API URL(%s)' % config_key)
-    except (ConfigParser.NoOptionError, ConfigParser.NoSectionError):
-        return DEFAULT_API_URL
+    return _get_setting(URL_SECTION, 'api_url', 'REST API URL(%s)')
+
+
+def get_pool_size():
+    """
+    Get maximum number of pooled connections per host from the config file
+    """
+    return _get_setting(CONNECTION_SECTION, 'pool_size', 'Connection pool size(%s)')
+
+
+def get_timeout():
+    """
+    Get request timeout in seconds from the config file
+    """
+    return _get_setting(CONNECTION_SECTION, 'timeout', 'Request timeout(%s)')
+
+
+def get_logset_cache_ttl():
+    """
+    Get how long in seconds log keys of a logset are cached from the config file
+    """
+    return _get_setting(CACHE_SECTION, 'logset_cache_ttl', 'Logset cache TTL(%s)')
+
+
+def get_query_cache_size():
+    """
+    Get the size in megabytes of the local query result cache from the config file
+    """
+    return _get_setting(CACHE_SECTION, 'query_cache_size', 'Query cache size(%s)')
+
+
+class RateLimiter(object):
+    """
+    Token bucket fed by the X-RateLimit-Remaining and X-RateLimit-Reset response headers.
+
+    Every request takes a token. Once the bucket is empty, requests wait until the rate limit
+    resets instead of failing.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tokens = None  # unknown until the first response with rate limit headers
+        self.reset_at = 0
+
+    def acquire(self):
+        """
+        Take a token, sleeping until the rate limit resets if there is none left.
+        """
+        with self.lock:
+            if self.tokens is None:
+                return
+            if self.tokens <= 0:
+                wait = self.reset_at - time.time()
+                if wait > 0:
+                    click.echo('Rate limit reached, waiting %.0f seconds for it to reset.' % wait,
+                               err=True)
+                    time.sleep(wait)
+                self.tokens = None
+            else:
+                self.tokens -= 1
+
+    def update(self, response):
+        """
+        Refill the bucket from the rate limit headers of a response.
+        """
+        headers = response.headers
+        try:
+            reset = float(headers.get('X-RateLimit-Reset', headers.get('Retry-After')))
+        except (TypeError, ValueError):
+            reset = 1.0
+        try:
+            remaining = int(headers['X-RateLimit-Remaining'])
+        except (KeyError, TypeError, ValueError):
+            if response.status_code != 429:
+                return
+            remaining = 0
+        with self.lock:
+            self.tokens = 0 if response.status_code == 429 else remaining
+            self.reset_at = time.time() + reset
+
+
+class Session(requests.Session):
+    """
+    Keep-alive http session with a bounded connection pool and a default timeout applied to
+    every request.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+        super(Session, self).__init__()
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size,
+                                                pool_maxsize=pool_size)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):  # pylint: disable=arguments-differ
+        """
+        Send the request through the pool, using the session timeout unless one is given.
+        Requests are paced by the rate limiter and retried when the rate limit was hit.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        for _ in range(RATE_LIMIT_RETRIES):
+            self.rate_limiter.acquire()
+            response = super(Session, self).request(method, url, **kwargs)
+            self.rate_limiter.update(response)
+            if response.status_code != 429:
+                break
+        return response
+
+
+def get_session():
+    """
+    Get the http session shared by all api modules, creating it on first use and again when the
+    configured pool size or timeout changes.
+    """
+    global _SESSION  # pylint: disable=global-statement
+    pool_size, timeout = get_pool_size(), get_timeout()
+    with _SESSION_LOCK:
+        session = _SESSION
+        if session is None or (session.pool_size, session.timeout) != (pool_size, timeout):
+            if session is not None:
+                session.close()
+            session = _SESSION = Session(pool_size, timeout)
+        return session
 
 
 def build_url(nodes):
@@ -0,0 +1,110 @@
+"""
+Batch API module.
+"""
+import json
+import sys
+import traceback
+from multiprocessing.pool import ThreadPool
+
+import click
+
+from lecli.api_key import api as api_key_api
+from lecli.log import api as log_api
+from lecli.logset import api as logset_api
+from lecli.team import api as team_api
+from lecli.user import api as user_api
+
+OPERATIONS = {
+    'create_log': log_api.create_log,
+    'delete_log': log_api.delete_log,
+    'rename_log': log_api.rename_log,
+    'replace_log': log_api.replace_log,
+    'update_log': log_api.update_log,
+    'create_logset': logset_api.create_logset,
+    'delete_logset': logset_api.delete_logset,
+    'rename_logset': logset_api.rename_logset,
+    'replace_logset': logset_api.replace_logset,
+    'add_log_to_logset': logset_api.add_log,
+    'delete_log_from_logset': logset_api.delete_log,
+    'create_team': team_api.create_team,
+    'delete_team': team_api.delete_team,
+    'rename_team': team_api.rename_team,
+    'add_user_to_team': team_api.add_user_to_team,
+    'delete_user_from_team': team_api.delete_user_from_team,
+    'add_new_user': user_api.add_new_user,
+    'add_existing_user': user_api.add_existing_user,
+    'delete_user': user_api.delete_user,
+    'create_api_key': api_key_api.create,
+    'delete_api_key': api_key_api.delete,
+    'update_api_key': api_key_api.update,
+}
+
+
+def load_operations(filename):
+    """
+    Load the list of operations from a json file, or a yaml file if PyYAML is installed.
+    """
+    with open(filename) as operations_file:
+        if filename.endswith(('.yml', '.yaml')):
+            try:
+                import yaml
+            except ImportError:
+                click.echo('PyYAML is required to read yaml batch files, install it with '
+                           '"pip install pyyaml".', err=True)
+                sys.exit(1)
+            operations = yaml.safe_load(operations_file)
+        else:
+            operations = json.load(operations_file)
+
+    if not isinstance(operations, list):
+        click.echo('Batch file must contain a list of operations.', err=True)
+        sys.exit(1)
+    return operations
+
+
+def run_operation(job):
+    """
+    Run a single operation and return its index, name, whether it succeeded and an error message.
+    """
+    index, operation = job
+    if not isinstance(operation, dict):
+        return index, None, False, 'Operation must be an object'
+    name = operation.get('operation')
+    if name not in OPERATIONS:
+        return index, name, False, 'Unknown operation'
+
+    args = operation.get('args') or {}
+    try:
+        if isinstance(args, dict):
+            OPERATIONS[name](**args)
+        else:
+            OPERATIONS[name](*args)
+    except SystemExit as error:
+        if error.code:
+            return index, name, False, 'Exited with status %s' % error.code
+    except Exception:  # pylint: disable=broad-except
+        return index, name, False, traceback.format_exc().strip().splitlines()[-1]
+    return index, name, True, None
+
+
+def run_batch(filename, workers=1):
+    """
+    Run the operations of the batch file in this process, with up to 'workers' of them running
+    at the same time, and report the result of every operation. Return True if all succeeded.
+    """
+    operations = load_operations(filename)
+    pool = ThreadPool(max(1, min(workers, len(operations) or 1)))
+    failures = 0
+    try:
+        for index, name, success, message in pool.imap(run_operation, enumerate(operations)):
+            if success:
+                click.echo('[%d] %s: OK' % (index + 1, name))
+            else:
+                failures += 1
+                click.echo('[%d] %s: FAILED (%s)' % (index + 1, name, message), err=True)
+    finally:
+        pool.terminate()
+
+    click.echo('%d operations, %d succeeded, %d failed' %
+               (len(operations), len(operations) - failures, failures))
+    return failures == 0
@@ -0,0 +1,25 @@
+"""
+Module for batch commands
+"""
+import sys
+
+import click
+
+from lecli.batch import api
+
+
+@click.command()
+@click.argument('filename', type=click.Path(exists=True, dir_okay=False))
+@click.option('-w', '--workers', type=click.IntRange(1, None), default=1,
+              help='Number of operations to run at the same time, default is 1')
+def batch(filename, workers):
+    """
+    Run the operations listed in a JSON or YAML file in a single process.
+
+    The file contains a list of objects with the name of an "operation" and its "args", either
+    as a list or as an object of named arguments, for example:
+
+    [{"operation": "create_log", "args": {"logname": "web-1", "params": null}}]
+    """
+    if not api.run_batch(filename, workers):
+        sys.exit(1)
@@ -0,0 +1,209 @@
+"""
+Local cache utils module.
+"""
+import json
+import os
+import tempfile
+import time
+
+from appdirs import user_cache_dir
+
+import lecli
+
+CACHE_DIR = user_cache_dir(lecli.__name__)
+RESULTS_DIR = 'query_results'
+
+
+def cache_path(name):
+    """
+    Get the path of a cache file in the OS specific cache directory.
+    """
+    return os.path.join(CACHE_DIR, name)
+
+
+def load(name):
+    """
+    Load a json cache file, return an empty dict if it does not exist or cannot be read.
+    """
+    try:
+        with open(cache_path(name)) as cache_file:
+            data = json.load(cache_file)
+    except (IOError, OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def store(name, data):
+    """
+    Write a json cache file, return False if it could not be written. The file is replaced
+    atomically so concurrent lecli processes never read a partially written cache.
+    """
+    try:
+        write_json_atomically(cache_path(name), data)
+    except (IOError, OSError):
+        return False
+    return True
+
+
+def write_json_atomically(path, data):
+    """
+    Write data to a json file through a temporary file in the same directory, which then
+    replaces the file at once.
+    """
+    directory = os.path.dirname(path)
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    handle, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path))
+    with os.fdopen(handle, 'w') as temp_file:
+        json.dump(data, temp_file)
+    os.rename(temp_path, path)
+
+
+def get_entry(name, key, ttl):
+    """
+    Get the value stored under key in a cache file, None if it is missing or older than ttl
+    seconds.
+    """
+    entry = load(name).get(key)
+    if not entry or time.time() - entry.get('stored_at', 0) > ttl:
+        return None
+    return entry.get('value')
+
+
+def set_entry(name, key, value):
+    """
+    Store a value under key in a cache file.
+    """
+    data = load(name)
+    data[key] = {'stored_at': time.time(), 'value': value}
+    store(name, data)
+
+
+def delete_entry(name, key=None):
+    """
+    Delete the entry stored under key from a cache file, or every entry if key is not given.
+    """
+    if not os.path.exists(cache_path(name)):
+        return
+    data = load(name)
+    if key is None:
+        data = {}
+    elif key in data:
+        del data[key]
+    else:
+        return
+    store(name, data)
+
+
+def result_path(key):
+    """
+    Get the path of a query result in the result cache.
+    """
+    return os.path.join(CACHE_DIR, RESULTS_DIR, key + '.ndjson')
+
+
+def load_result(key):
+    """
+    Get the page bodies of a cached query result as an iterator, None if it is not cached.
+    The result is marked as the most recently used one.
+    """
+    try:
+        os.utime(result_path(key), None)
+    except OSError:
+        return None
+    return _iter_result(result_path(key))
+
+
+def _iter_result(path):
+    """
+    Yield the page bodies stored in a result file.
+    """
+    with open(path) as result_file:
+        for line in result_file:
+            yield json.loads(line)
+
+
+def evict_results(max_size):
+    """
+    Delete the least recently used query results until the result cache fits in max_size bytes.
+    """
+    directory = os.path.join(CACHE_DIR, RESULTS_DIR)
+    try:
+        paths = [os.path.join(directory, name) for name in os.listdir(directory)
+                 if not name.startswith('.')]
+        results = sorted((os.path.getmtime(path), os.path.getsize(path), path) for path in paths)
+        total_size = sum(size for _, size, _ in results)
+        for _, size, path in results:
+            if total_size <= max_size:
+                break
+            os.remove(path)
+            total_size -= size
+    except OSError:
+        pass
+
+
+class ResultRecorder(object):
+    """
+    Writer of the page bodies of a query result to a temporary file, which joins the result
+    cache once the query is complete. Results larger than max_size bytes are not cached.
+    """
+
+    def __init__(self, key, max_size):
+        self.key = key
+        self.max_size = max_size
+        self.size = 0
+        self.result_file = None
+        self.temp_path = None
+        self.abandoned = False
+
+    def record(self, body):
+        """
+        Write the body of a page to the temporary file.
+        """
+        if self.abandoned:
+            return
+        line = json.dumps(body, separators=(',', ':')) + '\n'
+        self.size += len(line)
+        if self.size > self.max_size:
+            self.discard()
+            return
+        try:
+            if self.result_file is None:
+                directory = os.path.dirname(result_path(self.key))
+                if not os.path.exists(directory):
+                    os.makedirs(directory)
+                handle, self.temp_path = tempfile.mkstemp(dir=directory, prefix='.' + self.key)
+                self.result_file = os.fdopen(handle, 'w')
+            self.result_file.write(line)
+        except (IOError, OSError):
+            self.discard()
+
+    def commit(self):
+        """
+        Move the recorded result into the result cache, evicting least recently used results
+        beyond the size of the cache.
+        """
+        if self.abandoned or self.result_file is None:
+            return
+        try:
+            self.result_file.close()
+            os.rename(self.temp_path, result_path(self.key))
+        except (IOError, OSError):
+            self.discard()
+            return
+        self.result_file = None
+        self.abandoned = True
+        evict_results(self.max_size)
+
+    def discard(self):
+        """
+        Stop recording and delete whatever has been recorded.
+        """
+        self.abandoned = True
+        if self.result_file is not None:
+            self.result_file.close()
+            self.result_file = None
+            try:
+                os.remove(self.temp_path)
+            except OSError:
+                pass
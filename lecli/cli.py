@@ -1,115 +1,165 @@
 """
 Main lecli module powered by click library.
 """
+import importlib
+
 import click
 
 import lecli
-from lecli import api_utils
-from lecli.query import commands as query_commands
-from lecli.saved_query import commands as saved_query_commands
-from lecli.team import commands as team_commands
-from lecli.usage import commands as usage_commands
-from lecli.user import commands as user_commands
-from lecli.log import commands as log_commands
-from lecli.logset import commands as logset_commands
-from lecli.api_key import commands as api_key_commands
-
-
-@click.group()
+
+
+class LazyGroup(click.Group):
+    """
+    Click group that imports the module of a subcommand only when that subcommand is used.
+    Lazy commands are given as a mapping of command name to (module name, attribute name).
+    """
+
+    def __init__(self, name=None, commands=None, lazy_commands=None, **attrs):
+        super(LazyGroup, self).__init__(name, commands, **attrs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx):
+        """
+        List names of both loaded and lazy commands.
+        """
+        return sorted(set(super(LazyGroup, self).list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        """
+        Get a command, importing its module first if it has not been loaded yet.
+        """
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            module_name, attribute_name = self.lazy_commands[cmd_name]
+            module = importlib.import_module(module_name)
+            self.add_command(getattr(module, attribute_name), cmd_name)
+        return super(LazyGroup, self).get_command(ctx, cmd_name)
+
+
+def run(args):
+    """
+    Run a lecli command in this process and return its exit code instead of exiting, so that
+    long running processes can run one command after another.
+    """
+    try:
+        cli.main(args=args, prog_name='lecli', standalone_mode=False)
+    except click.ClickException as error:
+        error.show()
+        return error.exit_code
+    except click.Abort:
+        click.echo('Aborted!', err=True)
+        return 1
+    except SystemExit as error:
+        if error.code is None or isinstance(error.code, int):
+            return error.code or 0
+        click.echo(error.code, err=True)
+        return 1
+    return 0
+
+
+@click.group(cls=LazyGroup, lazy_commands={
+    'query': ('lecli.query.commands', 'query'),
+    'batch': ('lecli.batch.commands', 'batch'),
+    'export': ('lecli.export.commands', 'export'),
+    'daemon': ('lecli.daemon.commands', 'daemon'),
+    'shell': ('lecli.shell.commands', 'shell'),
+})
 @click.version_option(version=lecli.__version__)
 def cli():
     """Logentries Command Line Interface"""
+    # api_utils pulls in requests and validators, so it is only imported when a command runs
+    from lecli import api_utils
     # load configs from config.ini file in user_config_dir depending on running OS
     api_utils.load_config()
 
 
-@cli.group()
+@cli.group(cls=LazyGroup, lazy_commands={
+    'events': ('lecli.query.commands', 'get_events'),
+    'exportedevents': ('lecli.export.commands', 'get_exported_events'),
+    'recentevents': ('lecli.query.commands', 'get_recent_events'),
+    'savedquery': ('lecli.saved_query.commands', 'get_saved_query'),
+    'savedqueries': ('lecli.saved_query.commands', 'get_saved_queries'),
+    'team': ('lecli.team.commands', 'get_team'),
+    'teams': ('lecli.team.commands', 'get_teams'),
+    'usage': ('lecli.usage.commands', 'get_usage'),
+    'owner': ('lecli.user.commands', 'get_owner'),
+    'users': ('lecli.user.commands', 'get_users'),
+    'log': ('lecli.log.commands', 'getlog'),
+    'logs': ('lecli.log.commands', 'getlogs'),
+    'logset': ('lecli.logset.commands', 'getlogset'),
+    'logsets': ('lecli.logset.commands', 'getlogsets'),
+    'apikey': ('lecli.api_key.commands', 'get_api_key'),
+    'apikeys': ('lecli.api_key.commands', 'get_api_keys'),
+})
 def get():
     """Get a resource"""
     pass
 
 
-@cli.group()
+@cli.group(cls=LazyGroup, lazy_commands={
+    'savedquery': ('lecli.saved_query.commands', 'create_saved_query'),
+    'team': ('lecli.team.commands', 'create_team'),
+    'user': ('lecli.user.commands', 'create_user'),
+    'users': ('lecli.user.commands', 'import_users'),
+    'log': ('lecli.log.commands', 'createlog'),
+    'logset': ('lecli.logset.commands', 'createlogset'),
+    'apikey': ('lecli.api_key.commands', 'create_api_key'),
+})
 def create():
     """Create a resource"""
     pass
 
 
-@cli.group()
+@cli.group(cls=LazyGroup, lazy_commands={
+    'savedquery': ('lecli.saved_query.commands', 'update_saved_query'),
+    'team': ('lecli.team.commands', 'updateteam'),
+    'log': ('lecli.log.commands', 'updatelog'),
+    'logset': ('lecli.logset.commands', 'updatelogset'),
+    'apikey': ('lecli.api_key.commands', 'update_api_key'),
+})
 def update():
     """Update a resource"""
     pass
 
 
-@cli.group()
+@cli.group(cls=LazyGroup, lazy_commands={
+    'team': ('lecli.team.commands', 'rename_team'),
+    'log': ('lecli.log.commands', 'renamelog'),
+    'logset': ('lecli.logset.commands', 'renamelogset'),
+})
 def rename():
     """Rename a resource"""
     pass
 
 
-@cli.group()
+@cli.group(cls=LazyGroup, lazy_commands={
+    'log': ('lecli.log.commands', 'replacelog'),
+    'logset': ('lecli.logset.commands', 'replacelogset'),
+})
 def replace():
     """Replace a resource"""
     pass
 
 
-@cli.group()
+@cli.group(cls=LazyGroup, lazy_commands={
+    'savedquery': ('lecli.saved_query.commands', 'delete_saved_query'),
+    'team': ('lecli.team.commands', 'delete_team'),
+    'user': ('lecli.user.commands', 'delete_user'),
+    'log': ('lecli.log.commands', 'deletelog'),
+    'logset': ('lecli.logset.commands', 'deletelogset'),
+    'apikey': ('lecli.api_key.commands', 'delete_api_key'),
+})
 def delete():
     """Delete a resource"""
     pass
 
 
-@cli.group()
+@cli.group(cls=LazyGroup, lazy_commands={
+    'events': ('lecli.query.commands', 'tail_events'),
+})
 def tail():
     """Tail logs"""
     pass
 
+
 if __name__ == '__main__':
     cli()
-
-cli.add_command(query_commands.query)
-
-get.add_command(query_commands.get_events, "events")
-get.add_command(query_commands.get_recent_events, "recentevents")
-get.add_command(saved_query_commands.get_saved_query, "savedquery")
-get.add_command(saved_query_commands.get_saved_queries, "savedqueries")
-get.add_command(team_commands.get_team, "team")
-get.add_command(team_commands.get_teams, "teams")
-get.add_command(usage_commands.get_usage, "usage")
-get.add_command(user_commands.get_owner, "owner")
-get.add_command(user_commands.get_users, "users")
-get.add_command(log_commands.getlog, "log")
-get.add_command(log_commands.getlogs, "logs")
-get.add_command(logset_commands.getlogset, "logset")
-get.add_command(logset_commands.getlogsets, "logsets")
-get.add_command(api_key_commands.get_api_key, "apikey")
-get.add_command(api_key_commands.get_api_keys, "apikeys")
-
-create.add_command(saved_query_commands.create_saved_query, "savedquery")
-create.add_command(team_commands.create_team, "team")
-create.add_command(user_commands.create_user, "user")
-create.add_command(log_commands.createlog, "log")
-create.add_command(logset_commands.createlogset, "logset")
-create.add_command(api_key_commands.create_api_key, "apikey")
-
-update.add_command(saved_query_commands.update_saved_query, "savedquery")
-update.add_command(team_commands.updateteam, "team")
-update.add_command(log_commands.updatelog, "log")
-update.add_command(logset_commands.updatelogset, "logset")
-update.add_command(api_key_commands.update_api_key, "apikey")
-
-rename.add_command(team_commands.rename_team, "team")
-rename.add_command(log_commands.renamelog, "log")
-rename.add_command(logset_commands.renamelogset, "logset")
-
-replace.add_command(log_commands.replacelog, "log")
-replace.add_command(logset_commands.replacelogset, "logset")
-
-delete.add_command(saved_query_commands.delete_saved_query, "savedquery")
-delete.add_command(team_commands.delete_team, "team")
-delete.add_command(user_commands.delete_user, "user")
-delete.add_command(log_commands.deletelog, "log")
-delete.add_command(logset_commands.deletelogset, "logset")
-delete.add_command(api_key_commands.delete_api_key, "apikey")
-
-tail.add_command(query_commands.tail_events, "events")
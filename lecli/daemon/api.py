@@ -0,0 +1,185 @@
+"""
+Daemon API module.
+"""
+import json
+import os
+import select
+import signal
+import socket
+import SocketServer
+import stat
+import sys
+import traceback
+
+import click
+
+from lecli import cli
+from lecli.daemon import client
+
+
+class ClientGone(Exception):
+    """
+    Raised when output cannot be sent to a client because it disconnected.
+    """
+    pass
+
+
+def is_disconnected(connection):
+    """
+    Check without blocking whether the client closed its end of the connection. The client only
+    sends data when asked for input, so a readable connection is a closed one otherwise.
+    """
+    try:
+        if not select.select([connection], [], [], 0)[0]:
+            return False
+        return not connection.recv(1, socket.MSG_PEEK)
+    except (select.error, socket.error):
+        return True
+
+
+class ClientStream(object):
+    """
+    File like object forwarding everything written to it to the client as messages of the
+    given kind, 'out' or 'err'.
+    """
+
+    def __init__(self, wfile, kind, tty=False, connection=None):
+        self.wfile = wfile
+        self.kind = kind
+        self.tty = tty
+        self.connection = connection
+
+    def write(self, data):
+        """Send text to the client"""
+        if isinstance(data, str):
+            data = data.decode('utf-8', 'replace')
+        try:
+            self.wfile.write(json.dumps({self.kind: data}) + '\n')
+            self.wfile.flush()
+        except IOError:
+            raise ClientGone()
+
+    def flush(self):
+        """Messages are sent as they are written, only check the client is still there"""
+        if self.connection is not None and is_disconnected(self.connection):
+            raise ClientGone()
+
+    def isatty(self):
+        """Report whether the output of the client is a terminal"""
+        return self.tty
+
+
+class ClientInput(object):
+    """
+    File like object reading lines from the standard input of the client, which sends a line
+    each time it is asked for one. This lets commands prompt the user of the client.
+    """
+
+    def __init__(self, rfile, wfile):
+        self.rfile = rfile
+        self.wfile = wfile
+
+    def readline(self, dummy_size=-1):
+        """Ask the client for a line of its input, an empty string once its input has ended"""
+        try:
+            self.wfile.write(json.dumps({'read': True}) + '\n')
+            self.wfile.flush()
+            line = self.rfile.readline()
+            return (json.loads(line).get('in') or u'').encode('utf-8')
+        except (IOError, ValueError, AttributeError):
+            raise ClientGone()
+
+    def isatty(self):
+        """Input is read a line at a time whether or not the client reads from a terminal"""
+        return False
+
+
+class CommandHandler(SocketServer.StreamRequestHandler):
+    """
+    Run the command a client sends and stream its output back, followed by its exit code.
+    """
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            args, cwd = list(request['args']), request['cwd']
+        except (ValueError, KeyError, TypeError):
+            return
+        tty = bool(request.get('tty'))
+        out = ClientStream(self.wfile, 'out', tty, self.request)
+        err = ClientStream(self.wfile, 'err', tty, self.request)
+        try:
+            if args[:1] == ['daemon']:
+                err.write('The daemon cannot run another daemon.\n')
+                exit_code = 1
+            else:
+                exit_code = run_command(args, cwd, out, err, ClientInput(self.rfile, self.wfile))
+            self.wfile.write(json.dumps({'exit': exit_code}) + '\n')
+        except (ClientGone, IOError):
+            pass  # the client went away, e.g. when a live tail was interrupted
+
+
+def run_command(args, cwd, out, err, inp=None):
+    """
+    Run a lecli command in the working directory of the client, with its output going to the
+    given streams and its prompts reading from the given input, and return its exit code.
+    Commands run one at a time, since the standard streams and the working directory belong to
+    the whole process.
+    """
+    previous_cwd, stdin, stdout, stderr = os.getcwd(), sys.stdin, sys.stdout, sys.stderr
+    sys.stdin, sys.stdout, sys.stderr = inp or stdin, out, err
+    try:
+        os.chdir(cwd)
+        return cli.run(args)
+    except ClientGone:
+        raise
+    except Exception:  # pylint: disable=broad-except
+        err.write(traceback.format_exc())
+        return 1
+    finally:
+        sys.stdin, sys.stdout, sys.stderr = stdin, stdout, stderr
+        os.chdir(previous_cwd)
+
+
+def create_server(path):
+    """
+    Create a server listening on a unix domain socket, replacing a stale socket file. Exit if a
+    daemon is running on it already, or if the path is taken by anything but a socket. The
+    socket is only accessible by the current user, as commands run with their api keys.
+    """
+    connection = client.connect(path)
+    if connection is not None:
+        connection.close()
+        click.echo('A daemon is already running on %s' % path, err=True)
+        sys.exit(1)
+    if os.path.lexists(path):
+        if not stat.S_ISSOCK(os.lstat(path).st_mode):
+            click.echo('%s exists and is not a socket' % path, err=True)
+            sys.exit(1)
+        os.remove(path)
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    previous_umask = os.umask(0o077)
+    try:
+        return SocketServer.UnixStreamServer(path, CommandHandler)
+    finally:
+        os.umask(previous_umask)
+
+
+def serve(path=None):
+    """
+    Serve lecli commands on a unix domain socket until interrupted or terminated.
+    """
+    path = path or client.socket_path()
+    server = create_server(path)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    click.echo('Serving lecli commands on %s' % path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(path)
@@ -0,0 +1,90 @@
+"""
+Thin client of the lecli daemon. It only imports what it needs to talk to the daemon, and runs
+the command itself if no daemon is running.
+"""
+import json
+import os
+import socket
+import sys
+
+from appdirs import user_cache_dir
+
+import lecli
+
+SOCKET_NAME = 'daemon.sock'
+SOCKET_ENV = 'LECLI_DAEMON_SOCKET'
+
+
+def socket_path():
+    """
+    Get the path of the daemon socket, which can be overridden with the LECLI_DAEMON_SOCKET
+    environment variable.
+    """
+    return os.environ.get(SOCKET_ENV) or os.path.join(user_cache_dir(lecli.__name__), SOCKET_NAME)
+
+
+def connect(path=None):
+    """
+    Connect to the daemon, return None if it is not running.
+    """
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(path or socket_path())
+    except socket.error:
+        connection.close()
+        return None
+    return connection
+
+
+def send_command(connection, args, cwd, tty=False):
+    """
+    Send a command to the daemon and yield the messages it answers with: output as 'out' or
+    'err' text, 'read' requests for a line of input, and finally the 'exit' code.
+    """
+    connection.sendall(json.dumps({'args': args, 'cwd': cwd, 'tty': tty}) + '\n')
+    for line in connection.makefile('r'):
+        yield json.loads(line)
+
+
+def _write(stream, data):
+    """
+    Write text received from the daemon to a local stream.
+    """
+    stream.write(data.encode('utf-8'))
+    stream.flush()
+
+
+def send_input(connection, stream):
+    """
+    Send a line read from a local stream to the daemon, an empty one once the stream has ended.
+    """
+    line = stream.readline()
+    connection.sendall(json.dumps({'in': line.decode('utf-8', 'replace')}) + '\n')
+
+
+def main(args=None):
+    """
+    Run a lecli command through the daemon and exit with its exit code.
+    """
+    args = sys.argv[1:] if args is None else list(args)
+    connection = connect()
+    if connection is None:
+        from lecli.cli import cli
+        cli.main(args=args, prog_name='lecli')
+        return
+
+    try:
+        for message in send_command(connection, args, os.getcwd(), sys.stdout.isatty()):
+            if 'out' in message:
+                _write(sys.stdout, message['out'])
+            elif 'err' in message:
+                _write(sys.stderr, message['err'])
+            elif 'read' in message:
+                send_input(connection, sys.stdin)
+            elif 'exit' in message:
+                sys.exit(message['exit'])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connection.close()
+    sys.exit(1)
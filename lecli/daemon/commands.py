@@ -0,0 +1,18 @@
+"""
+Module for daemon commands
+"""
+import click
+
+from lecli.daemon import api
+
+
+@click.command()
+@click.option('--socket', 'socket_path', type=click.Path(dir_okay=False),
+              help='Path of the unix domain socket to serve on, default is daemon.sock in the '
+                   'cache directory or the LECLI_DAEMON_SOCKET environment variable')
+def daemon(socket_path):
+    """
+    Serve lecli commands to lecli-client on a unix domain socket, keeping the configuration and
+    the connection pool warm between commands.
+    """
+    api.serve(socket_path)
@@ -0,0 +1,72 @@
+"""
+Event utils module.
+"""
+import hashlib
+import heapq
+
+# events older than this many milliseconds before the newest seen event are forgotten
+DEDUP_WINDOW = 10 * 60 * 1000
+DEDUP_MAX_SIZE = 100000
+
+
+def event_key(event):
+    """
+    Get a key identifying an event: its id, its sequence number within its log, or else its
+    log, timestamp and a digest of its message.
+    """
+    if event.get('id'):
+        return event['id']
+    if event.get('sequence_number') is not None:
+        return '%s:%s' % (event.get('log_id'), event['sequence_number'])
+    message = event.get('message') or ''
+    if isinstance(message, unicode):
+        message = message.encode('utf-8')
+    return '%s:%s:%s' % (event.get('log_id'), event.get('timestamp'),
+                         hashlib.md5(message).hexdigest())
+
+
+class SeenEvents(object):
+    """
+    Bounded set of recently seen events, used to print every event only once. Events are
+    forgotten once they are more than 'window' milliseconds older than the newest seen event, or
+    oldest first when more than 'max_size' events are held.
+    """
+
+    def __init__(self, window=DEDUP_WINDOW, max_size=DEDUP_MAX_SIZE):
+        self.window = window
+        self.max_size = max_size
+        self.keys = set()
+        self.expiry = []
+        self.newest = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, event):
+        """
+        Remember an event, return False if it has been seen before.
+        """
+        key = event_key(event)
+        if key in self.keys:
+            return False
+        timestamp = event.get('timestamp') or 0
+        self.keys.add(key)
+        heapq.heappush(self.expiry, (timestamp, key))
+        self.newest = max(self.newest, timestamp)
+        self.evict()
+        return True
+
+    def evict(self):
+        """
+        Forget events that are out of the window, and the oldest ones beyond max_size.
+        """
+        while self.expiry and (len(self.keys) > self.max_size or
+                               self.expiry[0][0] < self.newest - self.window):
+            _, key = heapq.heappop(self.expiry)
+            self.keys.discard(key)
+
+    def filter(self, events):
+        """
+        Get the events of the list that have not been seen before.
+        """
+        return [event for event in events if self.add(event)]
@@ -0,0 +1,393 @@
+"""
+Export API module.
+"""
+import gzip
+import json
+import os
+import StringIO
+import sys
+import zlib
+
+import click
+import requests
+
+from lecli import api_utils
+from lecli import cache_utils
+from lecli import event_utils
+from lecli.logset import api as logset_api
+from lecli.query import api as query_api
+
+CHECKPOINT_FILE = 'checkpoint.json'
+EVENTS_FILE = 'events-%05d.ndjson'
+INDEX_FILE = 'events-%05d.index'
+DEFAULT_MAX_FILE_SIZE = 100
+# uncompressed bytes of events gathered into a single compressed chunk
+CHUNK_SIZE = 1024 * 1024
+FORMAT_NDJSON = 'ndjson'
+FORMAT_GZIP = 'gzip'
+FORMATS = (FORMAT_NDJSON, FORMAT_GZIP)
+
+
+class EventFiles(object):
+    """
+    Writer of events as newline delimited json to numbered files in a directory, moving on to
+    the next file once the current one would grow beyond max_size bytes.
+    """
+    suffix = ''
+
+    def __init__(self, directory, max_size, checkpoint=None):
+        checkpoint = checkpoint or {}
+        self.directory = directory
+        self.max_size = max_size
+        self.index = checkpoint.get('file_index', 1)
+        self.size = checkpoint.get('file_size', 0)
+        self.events_file = None
+
+    def path(self, index=None):
+        """
+        Get the path of the current file, or of the file with the given number.
+        """
+        return os.path.join(self.directory, EVENTS_FILE % (index or self.index) + self.suffix)
+
+    def open(self):
+        """
+        Open the current file, dropping anything written to it after its recorded size.
+        """
+        self.events_file = open(self.path(), 'ab')
+        self.events_file.truncate(self.size)
+
+    def write(self, events):
+        """
+        Write events to the current file, rotating files as they fill up.
+        """
+        if self.events_file is None:
+            self.open()
+        for event in events:
+            line = json.dumps(event, separators=(',', ':')) + '\n'
+            if self.size and self.size + len(line) > self.max_size:
+                self.rotate()
+            self.events_file.write(line)
+            self.size += len(line)
+
+    def commit(self, final=False):  # pylint: disable=unused-argument
+        """
+        Make sure every event written so far is on disk, return True once it is.
+        """
+        if self.events_file is not None:
+            self.events_file.flush()
+            os.fsync(self.events_file.fileno())
+        return True
+
+    def position(self):
+        """
+        Get the position up to which events are on disk, to be recorded in the checkpoint.
+        """
+        return {'file_index': self.index, 'file_size': self.size}
+
+    def rotate(self):
+        """
+        Close the current file and move on to the next one.
+        """
+        self.close()
+        self.index += 1
+        self.size = 0
+        self.open()
+
+    def close(self):
+        """
+        Close the current file.
+        """
+        if self.events_file is not None:
+            self.events_file.close()
+            self.events_file = None
+
+
+class GzipEventFiles(EventFiles):
+    """
+    Writer of events as chunks of gzip compressed newline delimited json. Every chunk is a
+    complete gzip member, so the files can also be read with standard gzip tools, and an index
+    file next to each of them records the offset, length and time range of its chunks.
+    """
+    suffix = '.gz'
+
+    def __init__(self, directory, max_size, checkpoint=None):
+        super(GzipEventFiles, self).__init__(directory, max_size, checkpoint)
+        self.index_size = (checkpoint or {}).get('index_size', 0)
+        self.index_file = None
+        self.chunk = []
+        self.chunk_size = 0
+
+    def index_path(self, index=None):
+        """
+        Get the path of the index of the current file, or of the file with the given number.
+        """
+        return os.path.join(self.directory, INDEX_FILE % (index or self.index))
+
+    def open(self):
+        """
+        Open the current file and its index, dropping anything written after their recorded
+        sizes.
+        """
+        super(GzipEventFiles, self).open()
+        self.index_file = open(self.index_path(), 'ab')
+        self.index_file.truncate(self.index_size)
+
+    def write(self, events):
+        """
+        Gather events into the current chunk.
+        """
+        for event in events:
+            line = json.dumps(event, separators=(',', ':')) + '\n'
+            self.chunk.append((event.get('timestamp'), line))
+            self.chunk_size += len(line)
+
+    def commit(self, final=False):
+        """
+        Compress the current chunk and write it once it is big enough, or if this is the final
+        commit. Return True if every event written so far is on disk.
+        """
+        if not self.chunk or (self.chunk_size < CHUNK_SIZE and not final):
+            return not self.chunk
+        if self.events_file is None:
+            self.open()
+        if self.size and self.size >= self.max_size:
+            self.rotate()
+
+        buf = StringIO.StringIO()
+        with gzip.GzipFile(fileobj=buf, mode='wb') as chunk_file:
+            chunk_file.write(''.join(line for _, line in self.chunk))
+        data = buf.getvalue()
+        timestamps = [timestamp for timestamp, _ in self.chunk if timestamp is not None]
+        entry = json.dumps({'offset': self.size, 'length': len(data), 'events': len(self.chunk),
+                            'from': min(timestamps) if timestamps else None,
+                            'to': max(timestamps) if timestamps else None}) + '\n'
+        self.events_file.write(data)
+        self.index_file.write(entry)
+        self.size += len(data)
+        self.index_size += len(entry)
+        self.chunk = []
+        self.chunk_size = 0
+        for synced_file in (self.events_file, self.index_file):
+            synced_file.flush()
+            os.fsync(synced_file.fileno())
+        return True
+
+    def position(self):
+        """
+        Get the position up to which events are on disk, to be recorded in the checkpoint.
+        """
+        position = super(GzipEventFiles, self).position()
+        position['index_size'] = self.index_size
+        return position
+
+    def rotate(self):
+        """
+        Close the current file and its index and move on to the next ones.
+        """
+        self.index_size = 0
+        super(GzipEventFiles, self).rotate()
+
+    def close(self):
+        """
+        Close the current file and its index.
+        """
+        super(GzipEventFiles, self).close()
+        if self.index_file is not None:
+            self.index_file.close()
+            self.index_file = None
+
+
+WRITERS = {FORMAT_NDJSON: EventFiles, FORMAT_GZIP: GzipEventFiles}
+
+
+def checkpoint_path(directory):
+    """
+    Get the path of the checkpoint file of an export directory.
+    """
+    return os.path.join(directory, CHECKPOINT_FILE)
+
+
+def load_checkpoint(directory):
+    """
+    Load the checkpoint of an export directory, None if there is none.
+    """
+    try:
+        with open(checkpoint_path(directory)) as checkpoint_file:
+            return json.load(checkpoint_file)
+    except IOError:
+        return None
+    except ValueError:
+        click.echo('Checkpoint file %s cannot be read.' % checkpoint_path(directory), err=True)
+        sys.exit(1)
+
+
+def new_checkpoint(export_query):
+    """
+    Get the checkpoint of an export that has not started yet.
+    """
+    return {
+        'query': export_query,
+        'next_url': None,
+        'last_timestamp': None,
+        'last_keys': [],
+        'events': 0,
+        'complete': False,
+    }
+
+
+def new_events(page, checkpoint):
+    """
+    Get the events of the page that have not been exported yet and move the checkpoint past
+    them. A query resumed from the last exported timestamp returns the events exported at that
+    timestamp again, these are told apart by their keys.
+    """
+    events = []
+    for event in page.json().get('events', []):
+        timestamp = event.get('timestamp')
+        key = event_utils.event_key(event)
+        if timestamp == checkpoint['last_timestamp'] and key in checkpoint['last_keys']:
+            continue
+        events.append(event)
+        if checkpoint['last_timestamp'] is None or timestamp > checkpoint['last_timestamp']:
+            checkpoint['last_timestamp'] = timestamp
+            checkpoint['last_keys'] = [key]
+        elif timestamp == checkpoint['last_timestamp']:
+            checkpoint['last_keys'].append(key)
+    return events
+
+
+def iter_export_pages(checkpoint):
+    """
+    Yield the pages of the export query from its checkpoint on: follow the checkpointed next
+    page link, or query again from the last exported timestamp if the link has expired.
+    """
+    export_query = checkpoint['query']
+    response = None
+    if checkpoint['next_url']:
+        response = query_api.fetch_results(checkpoint['next_url'])
+        if response.status_code not in (200, 202):
+            click.echo('Next page link has expired, querying again from the last exported '
+                       'event.', err=True)
+            response = None
+    if response is None:
+        time_range = {'from': export_query['from'], 'to': export_query['to']}
+        if checkpoint['last_timestamp'] is not None:
+            time_range['from'] = checkpoint['last_timestamp']
+        response = query_api.post_query(export_query['logs'], export_query['statement'],
+                                        time_range)
+    return query_api.iter_pages(response, query_api.NullProgressBar())
+
+
+def export_events(directory, log_keys, query_string, time_range, max_file_size,
+                  export_format=FORMAT_NDJSON):
+    """
+    Export the events of a query to rotating files in the directory, recording a checkpoint
+    whenever the events exported so far are on disk. An export interrupted for any reason
+    resumes from its checkpoint when it is run again with the same query.
+    """
+    export_query = {'logs': sorted(log_keys), 'statement': query_string,
+                    'from': time_range['from'], 'to': time_range['to'], 'format': export_format}
+    checkpoint = load_checkpoint(directory)
+    if checkpoint is None:
+        checkpoint = new_checkpoint(export_query)
+    elif checkpoint['query'] != export_query:
+        click.echo('Directory %s holds the export of another query, use a different directory.'
+                   % directory, err=True)
+        sys.exit(1)
+    elif checkpoint['complete']:
+        click.echo('Export to %s is already complete.' % directory)
+        return
+    else:
+        click.echo('Resuming export after %d events.' % checkpoint['events'], err=True)
+
+    files = WRITERS[export_format](directory, max_file_size, checkpoint)
+    try:
+        for page in iter_export_pages(checkpoint):
+            events = new_events(page, checkpoint)
+            files.write(events)
+            links = page.json().get('links')
+            checkpoint.update(next_url=links[0]['href'] if links else None,
+                              events=checkpoint['events'] + len(events), complete=not links)
+            if files.commit(final=not links):
+                checkpoint.update(files.position())
+                cache_utils.write_json_atomically(checkpoint_path(directory), checkpoint)
+    finally:
+        files.close()
+    click.echo('Exported %d events to %s' % (checkpoint['events'], directory))
+
+
+def export(directory, log_keys=None, favorites=None, logset=None, query_string=None,
+           time_range=None, max_file_size=DEFAULT_MAX_FILE_SIZE, use_cache=True,
+           export_format=FORMAT_NDJSON):
+    """
+    Export events of the logs, favorites or logset over an absolute time range, max_file_size
+    being in megabytes.
+    """
+    if favorites:
+        log_keys = api_utils.get_named_logkey_group(favorites)
+    elif logset:
+        log_keys = logset_api.get_log_keys_from_logset(logset, use_cache)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    try:
+        export_events(directory, log_keys, query_string or query_api.ALL_EVENTS_QUERY,
+                      time_range, max_file_size * 1024 * 1024, export_format)
+    except requests.exceptions.RequestException as error:
+        click.echo(error, err=True)
+        sys.exit(1)
+
+
+def iter_chunk_lines(directory, time_from=None, time_to=None):
+    """
+    Yield the lines of the chunks of a gzip export whose time range overlaps the given one,
+    reading and decompressing only those chunks.
+    """
+    index = 1
+    while os.path.exists(os.path.join(directory, INDEX_FILE % index)):
+        with open(os.path.join(directory, INDEX_FILE % index)) as index_file, \
+                open(os.path.join(directory, EVENTS_FILE % index + GzipEventFiles.suffix),
+                     'rb') as events_file:
+            for line in index_file:
+                chunk = json.loads(line)
+                if chunk['from'] is not None and (
+                        (time_to is not None and chunk['from'] > time_to) or
+                        (time_from is not None and chunk['to'] < time_from)):
+                    continue
+                events_file.seek(chunk['offset'])
+                data = events_file.read(chunk['length'])
+                for event_line in zlib.decompress(data, 16 + zlib.MAX_WBITS).splitlines():
+                    yield event_line
+        index += 1
+
+
+def iter_ndjson_lines(directory):
+    """
+    Yield the lines of the files of an ndjson export.
+    """
+    index = 1
+    while os.path.exists(os.path.join(directory, EVENTS_FILE % index)):
+        with open(os.path.join(directory, EVENTS_FILE % index)) as events_file:
+            for line in events_file:
+                yield line
+        index += 1
+
+
+def read_export(directory, time_from=None, time_to=None, output=query_api.OUTPUT_TEXT):
+    """
+    Print the exported events of the directory within the time range, given in milliseconds.
+    Compressed exports only decompress the chunks overlapping the time range.
+    """
+    checkpoint = load_checkpoint(directory)
+    if checkpoint is None:
+        click.echo('No export found in %s.' % directory, err=True)
+        sys.exit(1)
+    if checkpoint['query'].get('format') == FORMAT_GZIP:
+        lines = iter_chunk_lines(directory, time_from, time_to)
+    else:
+        lines = iter_ndjson_lines(directory)
+    for line in lines:
+        event = json.loads(line)
+        timestamp = event.get('timestamp')
+        if (time_from is None or timestamp >= time_from) and \
+                (time_to is None or timestamp <= time_to):
+            query_api.print_event(event, output)
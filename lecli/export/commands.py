@@ -0,0 +1,89 @@
+# pylint: disable=too-many-arguments
+"""
+Module for export commands
+"""
+import time
+
+import click
+
+from lecli import inventory_utils
+from lecli.export import api
+from lecli.query import api as query_api
+
+
+@click.command()
+# nargs (-1) makes sure multiple log keys is supported
+@click.argument('logkeys', type=click.STRING, nargs=-1,
+                callback=inventory_utils.resolve_logs_callback)
+@click.option('-d', '--directory', type=click.Path(file_okay=False), required=True,
+              help='Directory to write the exported events and the checkpoint to')
+@click.option('-c', '--favorites', type=click.STRING,
+              help='Alias of log in config file')
+@click.option('-g', '--logset', type=click.STRING,
+              callback=inventory_utils.resolve_logsets_callback,
+              help='Id or name of logset to be got from server')
+@click.option('-l', '--leql', type=click.STRING,
+              help='LEQL query to filter the exported events, default is all events')
+@click.option('-f', '--timefrom', type=click.INT,
+              help='Time to export events from (unix epoch)')
+@click.option('-t', '--timeto', type=click.INT,
+              help='Time to export events to (unix epoch)')
+@click.option('--datefrom', type=click.STRING,
+              help='Date/Time to export events from (ISO-8601 datetime)')
+@click.option('--dateto', type=click.STRING,
+              help='Date/Time to export events to (ISO-8601 datetime)')
+@click.option('--max-file-size', type=click.IntRange(1, None), default=api.DEFAULT_MAX_FILE_SIZE,
+              help='Size in megabytes after which a new file is started, default is 100')
+@click.option('--format', 'export_format', type=click.Choice(api.FORMATS),
+              default=api.FORMAT_NDJSON,
+              help='File format, gzip writes compressed chunks of ndjson with a time index')
+@click.option('--no-cache', is_flag=True,
+              help='Fetch log keys of the logset from the server instead of the local cache')
+def export(logkeys, directory, favorites, logset, leql, timefrom, timeto, datefrom, dateto,
+           max_file_size, export_format, no_cache):
+    """
+    Export events to newline delimited json files in a directory, or to gzip compressed chunks
+    of them with a time index. A checkpoint is recorded whenever the events exported so far are
+    on disk, and running the same export again resumes from it.
+    """
+    absolute_range = all([timefrom, timeto]) or all([datefrom, dateto])
+    if not query_api.validate_query(date_from=datefrom, time_from=timefrom, log_keys=logkeys,
+                                    favorites=favorites, logset=logset, query_string=leql,
+                                    time_to=timeto, date_to=dateto) or not absolute_range:
+        if not absolute_range:
+            click.echo('Exports need both start and end of the time range to be supplied.',
+                       err=True)
+        click.echo("Example usage: lecli export --logset mylogset -d ./export "
+                   "--datefrom '2016-05-18 00:00:00' --dateto '2016-05-19 00:00:00'")
+        click.echo("Example usage: lecli export 12345678-aaaa-bbbb-1234-1234cb123456 -d ./export "
+                   "-f 1465370400 -t 1465456800 --leql 'where(status=500)'")
+        return
+
+    time_range = query_api.prepare_time_range(timefrom, timeto, None, datefrom, dateto)
+    api.export(directory, logkeys, favorites, logset, leql, time_range, max_file_size,
+               not no_cache, export_format)
+
+
+@click.command()
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('-f', '--timefrom', type=click.INT,
+              help='Time to get exported events from (unix epoch)')
+@click.option('-t', '--timeto', type=click.INT,
+              help='Time to get exported events to (unix epoch)')
+@click.option('--datefrom', type=click.STRING,
+              help='Date/Time to get exported events from (ISO-8601 datetime)')
+@click.option('--dateto', type=click.STRING,
+              help='Date/Time to get exported events to (ISO-8601 datetime)')
+@click.option('-o', '--output', type=click.Choice(query_api.OUTPUT_FORMATS),
+              default=query_api.OUTPUT_TEXT,
+              help='Output format, ndjson writes every event as a single line of json')
+def get_exported_events(directory, timefrom, timeto, datefrom, dateto, output):
+    """
+    Get events of an export directory, optionally within a time range
+    """
+    if timefrom is None and datefrom:
+        timefrom = time.mktime(time.strptime(datefrom, "%Y-%m-%d %H:%M:%S"))
+    if timeto is None and dateto:
+        timeto = time.mktime(time.strptime(dateto, "%Y-%m-%d %H:%M:%S"))
+    api.read_export(directory, None if timefrom is None else int(timefrom) * 1000,
+                    None if timeto is None else int(timeto) * 1000, output)
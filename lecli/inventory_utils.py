@@ -0,0 +1,158 @@
+"""
+Local inventory of logs and logsets, used to resolve names into ids without calling the API.
+
+The inventory is rebuilt from the responses of 'get logs' and 'get logsets', and kept up to date
+from the responses of commands that get, create, change or delete a single log or logset.
+"""
+import bisect
+import sys
+
+import click
+import validators
+
+from lecli import cache_utils
+
+INVENTORY_CACHE = 'inventory.json'
+LOGS = 'logs'
+LOGSETS = 'logsets'
+# singular resource key in responses and the key listing its related resources
+RESOURCE_KEYS = {
+    LOGS: ('log', 'logsets_info', 'logsets'),
+    LOGSETS: ('logset', 'logs_info', 'logs'),
+}
+
+
+def _entry(kind, resource):
+    """
+    Build the inventory entry of a log or logset from its representation in a response.
+    """
+    related_key, related_name = RESOURCE_KEYS[kind][1:]
+    return {
+        'name': resource.get('name') or '',
+        related_name: [related['id'] for related in resource.get(related_key) or []]
+    }
+
+
+def _names(section):
+    """
+    Map lowercased names to the ids of the resources having them.
+    """
+    names = {}
+    for resource_id, entry in section.iteritems():
+        names.setdefault(entry['name'].lower(), []).append(resource_id)
+    return names
+
+
+def _store(inventory, kind, section):
+    """
+    Store a changed section of the inventory along with its name index.
+    """
+    names = _names(section)
+    inventory[kind] = section
+    inventory[kind + '_by_name'] = names
+    inventory[kind + '_names'] = sorted(names)
+    cache_utils.store(INVENTORY_CACHE, inventory)
+
+
+def record(kind, body):
+    """
+    Record the logs or logsets of a response body in the inventory. A list of resources replaces
+    every resource of its kind, a single resource is added or updated.
+    """
+    if not isinstance(body, dict):
+        return
+    inventory = cache_utils.load(INVENTORY_CACHE)
+    singular = RESOURCE_KEYS[kind][0]
+    if isinstance(body.get(kind), list):
+        section = {}
+        resources = body[kind]
+    elif isinstance(body.get(singular), dict) and body[singular].get('id'):
+        section = inventory.get(kind, {})
+        resources = [body[singular]]
+    else:
+        return
+    for resource in resources:
+        section[resource['id']] = _entry(kind, resource)
+    _store(inventory, kind, section)
+
+
+def remove(kind, resource_id):
+    """
+    Remove a deleted log or logset from the inventory.
+    """
+    inventory = cache_utils.load(INVENTORY_CACHE)
+    section = inventory.get(kind, {})
+    if resource_id in section:
+        del section[resource_id]
+        _store(inventory, kind, section)
+
+
+def lookup(kind, name):
+    """
+    Get ids of the logs or logsets whose name is the given name, case insensitively. If there is
+    no such name, get ids of the ones whose name starts with it. Return None if the inventory of
+    that kind has never been built.
+    """
+    inventory = cache_utils.load(INVENTORY_CACHE)
+    if kind not in inventory:
+        return None
+    by_name = inventory.get(kind + '_by_name', {})
+    key = name.lower()
+    if key in by_name:
+        return by_name[key]
+
+    names = inventory.get(kind + '_names', [])
+    matches = []
+    for index in range(bisect.bisect_left(names, key), len(names)):
+        if not names[index].startswith(key):
+            break
+        matches.extend(by_name.get(names[index], []))
+    return matches
+
+
+def get_name(kind, resource_id):
+    """
+    Get the name of a log or logset in the inventory, None if it is not there.
+    """
+    entry = cache_utils.load(INVENTORY_CACHE).get(kind, {}).get(resource_id)
+    return entry['name'] if entry else None
+
+
+def resolve(kind, value):
+    """
+    Resolve a log or logset name into its id. Ids, and names that are not in the inventory, are
+    returned as they are.
+    """
+    if not value or validators.uuid(value):
+        return value
+    ids = lookup(kind, value)
+    if ids is None:
+        return value
+    if len(ids) == 1:
+        return ids[0]
+    singular = RESOURCE_KEYS[kind][0]
+    if ids:
+        click.echo("Error: %s name '%s' is ambiguous, it matches: %s" %
+                   (singular, value, ', '.join(sorted(ids))), err=True)
+        sys.exit(1)
+    click.echo("Warning: '%s' is neither a %s id nor a known %s name, run 'lecli get %s' to "
+               "refresh the local inventory." % (value, singular, singular, kind), err=True)
+    return value
+
+
+def resolve_logs_callback(dummy_ctx, dummy_param, value):
+    """
+    Click callback resolving log name(s) given to a command into log id(s).
+    """
+    if isinstance(value, tuple):
+        return tuple(resolve(LOGS, item) for item in value)
+    return resolve(LOGS, value)
+
+
+def resolve_logsets_callback(dummy_ctx, dummy_param, value):
+    """
+    Click callback resolving logset name(s) given to a command into logset id(s).
+    """
+    if isinstance(value, tuple):
+        return tuple(resolve(LOGSETS, item) for item in value)
+    return resolve(LOGSETS, value)
@@ -5,7 +5,9 @@ import sys
 import requests
 
 from lecli import api_utils
+from lecli import inventory_utils
 from lecli import response_utils
+from lecli.logset import api as logset_api
 
 
 def _url(provided_parts=('logs',)):
@@ -24,6 +26,7 @@ def handle_get_log_response(response):
     if response_utils.response_error(response):
         sys.exit(1)
     elif response.status_code == 200:
+        inventory_utils.record(inventory_utils.LOGS, response.json())
         api_utils.pretty_print_string_as_json(response.text)
 
 
@@ -33,7 +36,7 @@ def get_logs():
     """
     headers = api_utils.generate_headers('ro')
     try:
-        response = requests.get(_url()[1], headers=headers)
+        response = api_utils.get_session().get(_url()[1], headers=headers)
         handle_get_log_response(response)
     except requests.exceptions.RequestException as error:
         sys.stderr.write(error)
@@ -46,7 +49,7 @@ def get_log(log_id):
     """
     headers = api_utils.generate_headers('ro')
     try:
-        response = requests.get(_url(('logs', log_id))[1], headers=headers)
+        response = api_utils.get_session().get(_url(('logs', log_id))[1], headers=headers)
         handle_get_log_response(response)
     except requests.exceptions.RequestException as error:
         sys.stderr.write(error)
@@ -70,11 +73,13 @@ def create_log(logname, params):
     headers = api_utils.generate_headers('rw')
 
     try:
-        response = requests.post(_url()[1], json=request_params, headers=headers)
+        response = api_utils.get_session().post(_url()[1], json=request_params, headers=headers)
+        logset_api.invalidate_log_keys()
         if response_utils.response_error(response):
             sys.stderr.write('Create log failed, status code: %d' % response.status_code)
             sys.exit(1)
         elif response.status_code == 201:
+            inventory_utils.record(inventory_utils.LOGS, response.json())
             api_utils.pretty_print_string_as_json(response.text)
     except requests.exceptions.RequestException as error:
         sys.stderr.write(error)
@@ -88,11 +93,13 @@ def delete_log(log_id):
     headers = api_utils.generate_headers('rw')
 
     try:
-        response = requests.delete(_url(('logs', log_id))[1], headers=headers)
+        response = api_utils.get_session().delete(_url(('logs', log_id))[1], headers=headers)
+        logset_api.invalidate_log_keys()
         if response_utils.response_error(response):
             sys.stderr.write('Delete log failed.')
             sys.exit(1)
         elif response.status_code == 204:
+            inventory_utils.remove(inventory_utils.LOGS, log_id)
             sys.stdout.write('Deleted log with id: %s \n' % log_id)
     except requests.exceptions.RequestException as error:
         sys.stderr.write(error)
@@ -106,11 +113,14 @@ def replace_log(log_id, params):
     headers = api_utils.generate_headers('rw')
 
     try:
-        response = requests.put(_url(('logs', log_id))[1], json=params, headers=headers)
+        response = api_utils.get_session().put(_url(('logs', log_id))[1], json=params,
+                                               headers=headers)
+        logset_api.invalidate_log_keys()
         if response_utils.response_error(response):
             sys.stderr.write('Update log failed.\n')
             sys.exit(1)
         elif response.status_code == 200:
+            inventory_utils.record(inventory_utils.LOGS, response.json())
             sys.stdout.write('Log: %s updated to:\n' % log_id)
             api_utils.pretty_print_string_as_json(response.text)
     except requests.exceptions.RequestException as error:
@@ -125,7 +135,7 @@ def rename_log(log_id, log_name):
     headers = api_utils.generate_headers('ro')
 
     try:
-        response = requests.get(_url(('logs', log_id))[1], headers=headers)
+        response = api_utils.get_session().get(_url(('logs', log_id))[1], headers=headers)
         if response_utils.response_error(response):
             sys.stderr.write('Rename log failed.\n')
             sys.exit(1)
@@ -153,7 +163,7 @@ def check_logset_exists(params):
                 url = _url(('logsets', item['id']))[1]
                 headers = api_utils.generate_headers('ro')
                 try:
-                    response = requests.get(url, headers=headers)
+                    response = api_utils.get_session().get(url, headers=headers)
                     if response.status_code is not 200:
                         return False
                 except requests.exceptions.RequestException as error:
@@ -171,7 +181,7 @@ def update_log(log_id, params):
 
     if check_logset_exists(params):
         try:
-            response = requests.get(url, headers=headers)
+            response = api_utils.get_session().get(url, headers=headers)
             existing_log = response.json()
             replace_log(log_id, api_utils.combine_objects(existing_log, params))
         except requests.exceptions.RequestException as error:
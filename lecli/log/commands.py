@@ -5,6 +5,7 @@ import sys
 import json
 import click
 
+from lecli import inventory_utils
 from lecli.log import api
 
 
@@ -33,7 +34,7 @@ def createlog(name, filename):
 
 
 @click.command()
-@click.argument('logid', type=click.STRING)
+@click.argument('logid', type=click.STRING, callback=inventory_utils.resolve_logs_callback)
 def deletelog(logid):
     """
     Delete a log with the provided id
@@ -50,7 +51,7 @@ def getlogs():
 
 
 @click.command()
-@click.argument('logid', type=click.STRING)
+@click.argument('logid', type=click.STRING, callback=inventory_utils.resolve_logs_callback)
 def getlog(logid):
     """
     Get a log with the given id
@@ -59,7 +60,7 @@ def getlog(logid):
 
 
 @click.command()
-@click.argument('logid', type=click.STRING)
+@click.argument('logid', type=click.STRING, callback=inventory_utils.resolve_logs_callback)
 @click.argument('name', type=click.STRING)
 def renamelog(logid, name):
     """
@@ -69,7 +70,7 @@ def renamelog(logid, name):
 
 
 @click.command()
-@click.argument('logid', type=click.STRING)
+@click.argument('logid', type=click.STRING, callback=inventory_utils.resolve_logs_callback)
 @click.argument('filename', type=click.Path(exists=True, dir_okay=False))
 def replacelog(logid, filename):
     """
@@ -85,7 +86,7 @@ def replacelog(logid, filename):
 
 
 @click.command()
-@click.argument('logid', type=click.STRING)
+@click.argument('logid', type=click.STRING, callback=inventory_utils.resolve_logs_callback)
 @click.argument('filename', type=click.Path(exists=True, dir_okay=False))
 def updatelog(logid, filename):
     """
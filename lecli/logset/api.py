@@ -7,8 +7,12 @@ import sys
 import requests
 
 from lecli import api_utils
+from lecli import cache_utils
+from lecli import inventory_utils
 from lecli import response_utils
 
+LOG_KEYS_CACHE = 'logset_log_keys.json'
+
 
 def _url(provided_path_parts=()):
     """
@@ -20,7 +24,7 @@ def _url(provided_path_parts=()):
 
 
 def handle_response(response, error_message, success_code, success_message=None):
-    """Handle logset responses"""
+    """Handle logset responses, recording returned logsets in the local inventory"""
     if response_utils.response_error(response):
         sys.stderr.write(error_message)
         sys.exit(1)
@@ -28,6 +32,7 @@ def handle_response(response, error_message, success_code, success_message=None)
         if success_message:
             sys.stdout.write(success_message)
         else:
+            inventory_utils.record(inventory_utils.LOGSETS, response.json())
             api_utils.pretty_print_string_as_json(response.text)
 
 
@@ -37,7 +42,7 @@ def get_logsets():
     """
     headers = api_utils.generate_headers('ro')
     try:
-        response = requests.request('GET', _url()[1], headers=headers)
+        response = api_utils.get_session().request('GET', _url()[1], headers=headers)
         handle_response(response, 'Unable to fetch logsets\n', 200)
     except requests.exceptions.RequestException as error:
         sys.stderr.write(error)
@@ -50,7 +55,7 @@ def get_logset(logset_id):
     """
     headers = api_utils.generate_headers('ro')
     try:
-        response = requests.get(_url((logset_id,))[1], headers=headers)
+        response = api_utils.get_session().get(_url((logset_id,))[1], headers=headers)
         handle_response(response, 'Unable to fetch logset %s \n' % logset_id, 200)
     except requests.exceptions.RequestException as error:
         sys.stderr.write(error)
@@ -76,7 +81,7 @@ def create_logset(logset_name=None, params=None):
     headers = api_utils.generate_headers('rw')
 
     try:
-        response = requests.post(_url()[1], json=request_params, headers=headers)
+        response = api_utils.get_session().post(_url()[1], json=request_params, headers=headers)
         handle_response(response, 'Creating logset failed.\n', 201)
     except requests.exceptions.RequestException as error:
         sys.stderr.write(error)
@@ -90,9 +95,12 @@ def delete_logset(logset_id):
     headers = api_utils.generate_headers('rw')
 
     try:
-        response = requests.delete(_url((logset_id,))[1], headers=headers)
+        response = api_utils.get_session().delete(_url((logset_id,))[1], headers=headers)
+        invalidate_log_keys(logset_id)
         handle_response(response, 'Delete logset failed.\n', 204,
                         'Deleted logset with id: %s \n' % logset_id)
+        if response.status_code == 204:
+            inventory_utils.remove(inventory_utils.LOGSETS, logset_id)
     except requests.exceptions.RequestException as error:
         sys.stderr.write(error)
         sys.exit(1)
@@ -105,7 +113,7 @@ def rename_logset(logset_id, logset_name):
     headers = api_utils.generate_headers('ro')
 
     try:
-        response = requests.get(_url((logset_id,))[1], headers=headers)
+        response = api_utils.get_session().get(_url((logset_id,))[1], headers=headers)
         if response_utils.response_error(response):
             sys.stderr.write('Rename logset failed.\n')
             sys.exit(1)
@@ -125,7 +133,8 @@ def replace_logset(logset_id, params):
     headers = api_utils.generate_headers('rw')
 
     try:
-        response = requests.put(_url((logset_id,))[1], json=params, headers=headers)
+        response = api_utils.get_session().put(_url((logset_id,))[1], json=params, headers=headers)
+        invalidate_log_keys(logset_id)
         handle_response(response, 'Update logset with details %s failed.\n' % params, 200)
     except requests.exceptions.RequestException as error:
         sys.stderr.write(error)
@@ -146,7 +155,7 @@ def add_log(logset_id, log_id):
     headers = api_utils.generate_headers('ro')
 
     try:
-        response = requests.get(_url((logset_id,))[1], headers=headers)
+        response = api_utils.get_session().get(_url((logset_id,))[1], headers=headers)
         if response_utils.response_error(response):
             sys.stderr.write('Add log %s to logset %s failed\n'
                              % (log_id, logset_id))
@@ -175,12 +184,26 @@ def extract_log_from_logset(logset, log_id):
         sys.exit(1)
 
 
-def get_log_keys_from_logset(logset_id):
-    """Helper method to get list of log IDs in a logset"""
+def invalidate_log_keys(logset_id=None):
+    """
+    Drop cached log keys of the logset, or of every logset if no id is given.
+    """
+    cache_utils.delete_entry(LOG_KEYS_CACHE, logset_id)
+
+
+def get_log_keys_from_logset(logset_id, use_cache=True):
+    """Helper method to get list of log IDs in a logset.
+    Log IDs are cached locally for the configured TTL unless use_cache is False"""
+    ttl = api_utils.get_logset_cache_ttl()
+    if use_cache and ttl:
+        log_ids = cache_utils.get_entry(LOG_KEYS_CACHE, logset_id, ttl)
+        if log_ids is not None:
+            return log_ids
+
     headers = api_utils.generate_headers('ro')
     log_ids = []
     try:
-        response = requests.get(_url((logset_id,))[1], headers=headers)
+        response = api_utils.get_session().get(_url((logset_id,))[1], headers=headers)
         if response_utils.response_error(response):
             sys.stderr.write('Attempt to access logset %s failed\n' % logset_id)
             sys.exit(1)
@@ -189,6 +212,8 @@ def get_log_keys_from_logset(logset_id):
             if 'logs_info' in existing_logset['logset']:
                 for log in existing_logset['logset']['logs_info']:
                     log_ids.append(log['id'])
+            if ttl:
+                cache_utils.set_entry(LOG_KEYS_CACHE, logset_id, log_ids)
     except requests.exceptions.RequestException as error:
         sys.stderr.write(error)
         sys.exit(1)
@@ -206,7 +231,7 @@ def delete_log(logset_id, log_id):
     """
     headers = api_utils.generate_headers('ro')
     try:
-        response = requests.get(_url((logset_id,))[1], headers=headers)
+        response = api_utils.get_session().get(_url((logset_id,))[1], headers=headers)
         if response_utils.response_error(response):
             sys.stderr.write('Delete log %s from logset %s failed\n'
                              % (log_id, logset_id))
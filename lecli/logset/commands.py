@@ -5,6 +5,7 @@ import sys
 import json
 import click
 
+from lecli import inventory_utils
 from lecli.logset import api
 
 
@@ -41,7 +42,8 @@ def getlogsets():
 
 
 @click.command()
-@click.argument('logset_id', type=click.STRING)
+@click.argument('logset_id', type=click.STRING,
+                callback=inventory_utils.resolve_logsets_callback)
 def getlogset(logset_id):
     """
     Get a logset with the provided ID
@@ -50,7 +52,8 @@ def getlogset(logset_id):
 
 
 @click.command()
-@click.argument('logset_id', type=click.STRING)
+@click.argument('logset_id', type=click.STRING,
+                callback=inventory_utils.resolve_logsets_callback)
 @click.argument('new_name', type=click.STRING)
 def renamelogset(logset_id, new_name):
     """
@@ -61,8 +64,10 @@ def renamelogset(logset_id, new_name):
 
 @click.command(help='Available commands are:\n\t"delete_log"\n\t"add_log"')
 @click.argument('command', type=click.STRING, default=None)
-@click.argument('logset_id', type=click.STRING, default=None)
-@click.argument('log_id', type=click.STRING, default=None)
+@click.argument('logset_id', type=click.STRING, default=None,
+                callback=inventory_utils.resolve_logsets_callback)
+@click.argument('log_id', type=click.STRING, default=None,
+                callback=inventory_utils.resolve_logs_callback)
 def updatelogset(command, logset_id, log_id):
     """Update a logset by adding or deleting a log."""
     if command == 'add_log':
@@ -72,7 +77,8 @@ def updatelogset(command, logset_id, log_id):
 
 
 @click.command()
-@click.argument('logset_id', type=click.STRING)
+@click.argument('logset_id', type=click.STRING,
+                callback=inventory_utils.resolve_logsets_callback)
 def deletelogset(logset_id):
     """
     Delete a logset
@@ -81,7 +87,8 @@ def deletelogset(logset_id):
 
 
 @click.command()
-@click.argument('logset_id', type=click.STRING)
+@click.argument('logset_id', type=click.STRING,
+                callback=inventory_utils.resolve_logsets_callback)
 @click.argument('filename', type=click.Path(exists=True, dir_okay=False))
 def replacelogset(logset_id, filename):
     """
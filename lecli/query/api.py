@@ -3,20 +3,81 @@ Query API module.
 """
 from __future__ import division
 
+import hashlib
+import heapq
+import itertools
 import json
+import Queue
 import sys
+import threading
 import time
 import datetime
+import fnmatch
+import uuid
+from multiprocessing.pool import ThreadPool
 
 import click
 import requests
 from termcolor import colored
 
+from lecli import aggregate_utils
 from lecli import api_utils
+from lecli import cache_utils
+from lecli import event_utils
+from lecli import inventory_utils
 from lecli import response_utils
+from lecli import timeseries_utils
 from lecli.logset import api
+from lecli.saved_query import api as saved_query_api
 
 ALL_EVENTS_QUERY = "where(/.*/)"
+MIN_POLL_DELAY = 0.05
+MAX_POLL_DELAY = 5.0
+OUTPUT_TEXT = 'text'
+OUTPUT_NDJSON = 'ndjson'
+OUTPUT_FORMATS = (OUTPUT_TEXT, OUTPUT_NDJSON)
+# the poll interval of a live tail adapts within this factor of the requested interval
+TAIL_POLL_RANGE = 4
+TAIL_MAX_BACKOFF = 60.0
+TAIL_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+TAIL_EXPIRED_STATUS_CODES = (404, 410)
+# results of queries ending less than this many seconds ago may still change, so are not cached
+RESULT_CACHE_MIN_AGE = 300
+# seconds the merged tail waits for new events before checking its reorder buffer again
+TAIL_MERGE_TICK = 0.1
+SAVED_QUERY_WORKERS = 8
+# pages of a parallel query window fetched ahead of printing, later windows wait when it is full
+WINDOW_QUEUE_SIZE = 4
+WINDOW_QUEUE_TIMEOUT = 0.5
+
+
+class NullProgressBar(object):
+    """
+    Progress bar that renders nothing, used where several queries run at the same time.
+    """
+
+    def update(self, n_steps):
+        """Ignore progress updates"""
+        pass
+
+    def render_finish(self):
+        """Ignore the finish of progress"""
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+def progressbar(length, output=OUTPUT_TEXT):
+    """
+    Get a progress bar for the given output format, machine readable output gets none.
+    """
+    if output == OUTPUT_NDJSON:
+        return NullProgressBar()
+    return click.progressbar(length=length, label='Progress\t')
 
 
 def _url(provided_path_parts=()):
@@ -28,60 +89,180 @@ def _url(provided_path_parts=()):
     return api_utils.build_url(ordered_path_parts)
 
 
-def handle_response(response, progress_bar):
+def handle_response(response, progress_bar, output=OUTPUT_TEXT, seen_events=None,
+                    recorder=None, aggregation=None):
     """
-    Handle response. Exit if it has any errors, continue if status code is 202, print response
-    if status code is 200.
+    Handle response. Exit if it has any errors, keep polling while status code is 202, print
+    every page of results once it is complete.
     """
+    for page in iter_pages(response, progress_bar):
+        if recorder is not None:
+            recorder.record(page.json())
+        emit_page(page, output, seen_events, aggregation)
 
-    if response_utils.response_error(response) is True:  # Check response has no errors
-        sys.exit(1)
-    elif response.status_code == 200:
-        progress = response.json().get('progress')
-        if progress:
-            progress_bar.update(progress)
-        else:
-            progress_bar.update(100)
-            progress_bar.render_finish()
-            print_response(response)
-        if 'links' in response.json():
-            next_url = response.json()['links'][0]['href']
-            next_response = fetch_results(next_url)
-            handle_response(next_response, progress_bar)
-    elif response.status_code == 202:
-        continue_request(response, progress_bar)
+
+def emit_page(page, output=OUTPUT_TEXT, seen_events=None, aggregation=None):
+    """
+    Print a page of results, or feed its events to the aggregation if there is one.
+    """
+    page = drop_seen_events(page, seen_events)
+    if aggregation is not None:
+        aggregation.add_events(page.json().get('events', []))
+    else:
+        print_response(page, output)
 
 
-def handle_tail(response, poll_interval, poll_iteration=1000):
+def drop_seen_events(page, seen_events):
     """
-    handle tailing loop
+    Drop the events of the page that have been seen before, if seen events are tracked at all,
+    and return the page.
     """
-    for _ in range(poll_iteration):
-        if response_utils.response_error(response):
+    if seen_events is not None:
+        data = page.json()
+        if 'events' in data:
+            # the decoded body is cached, so the page keeps the filtered events
+            data['events'] = seen_events.filter(data['events'])
+    return page
+
+
+def iter_pages(response, progress_bar):
+    """
+    Walk the pages of a query result one at a time and yield each completed page.
+
+    Continue links (status code 202) and next page links are followed iteratively, so only
+    the current page is held in memory no matter how many pages the result has.
+    """
+    attempt = 0
+    while response is not None:
+        if response_utils.response_error(response) is True:  # Check response has no errors
             sys.exit(1)
         elif response.status_code == 200:
-            print_response(response)
+            progress = response.json().get('progress')
+            if progress:
+                progress_bar.update(progress)
+            else:
+                progress_bar.update(100)
+                progress_bar.render_finish()
+                yield response
+            response = next_page(response)
+            attempt = 0
+        elif response.status_code == 202:
+            response = continue_request(response, progress_bar, attempt)
+            attempt += 1
+        else:
+            response = None
+
+
+def next_page(response):
+    """
+    Fetch the page the response links to, return None if there is no link to follow.
+    """
+    links = response.json().get('links')
+    if links:
+        return fetch_results(links[0]['href'])
+    return None
 
-        # fetch results from the next link
-        if 'links' in response.json():
-            next_url = response.json()['links'][0]['href']
-            time.sleep(poll_interval)
-            response = fetch_results(next_url)
+
+def handle_tail(response, poll_interval, restart, output=OUTPUT_TEXT, seen_events=None):
+    """
+    Print the pages of a live query until interrupted.
+    """
+    for page in iter_tail(response, poll_interval, restart):
+        print_response(drop_seen_events(page, seen_events), output)
+        sys.stdout.flush()
+
+
+def iter_tail(response, poll_interval, restart):
+    """
+    Yield the pages of a live query until interrupted, starting from its first response.
+
+    Failed requests are retried with exponential backoff, and the live query is re-created by
+    calling restart when its continue link expires or is missing. The poll interval shrinks
+    while events are flowing and grows while the logs are idle.
+    """
+    interval = poll_interval
+    failures = 0
+    next_url = None
+    while True:
+        if response is not None and response.status_code == 200:
+            failures = 0
+            yield response
+            interval = adapt_poll_interval(interval, poll_interval,
+                                           bool(response.json().get('events')))
+            links = response.json().get('links')
+            next_url = links[0]['href'] if links else None
+            if not links:
+                click.echo('No continue link found in the received response, re-creating the '
+                           'live query.', err=True)
+            delay = interval
+        elif response is not None and response.status_code in TAIL_EXPIRED_STATUS_CODES \
+                and next_url:
+            click.echo('Live query expired, re-creating it.', err=True)
+            next_url = None
+            delay = interval
+        elif response is None or response.status_code in TAIL_RETRY_STATUS_CODES:
+            failures += 1
+            delay = min(poll_interval * 2 ** failures, TAIL_MAX_BACKOFF)
+            click.echo('Live tail request failed, retrying in %.1f seconds.' % delay, err=True)
         else:
-            click.echo('No continue link found in the received response.', err=True)
+            response_utils.response_error(response)
+            sys.exit(1)
+
+        time.sleep(delay)
+        try:
+            response = get_results(next_url) if next_url else restart()
+        except requests.exceptions.RequestException as error:
+            click.echo(error, err=True)
+            response = None
+
+
+def adapt_poll_interval(interval, poll_interval, has_events):
+    """
+    Halve the poll interval while events are flowing and grow it by half while the logs are
+    idle, staying within TAIL_POLL_RANGE times the requested poll interval either way.
+    """
+    if has_events:
+        return max(interval / 2, poll_interval / TAIL_POLL_RANGE)
+    return min(interval * 1.5, poll_interval * TAIL_POLL_RANGE)
 
 
-def continue_request(response, progress_bar):
+def continue_request(response, progress_bar, attempt=0):
     """
-    Continue making request to the url in the response.
+    Continue making request to the url in the response and return the new response.
     """
     progress_bar.update(0)
-    time.sleep(1)  # Wait for 1 second before hitting continue endpoint to prevent hitting API
-    # limit
-    if 'links' in response.json():
-        continue_url = response.json()['links'][0]['href']
-        new_response = fetch_results(continue_url)
-        handle_response(new_response, progress_bar)
+    # Wait before hitting continue endpoint to prevent hitting API limit
+    time.sleep(poll_delay(attempt, response.json().get('progress'), response.headers))
+    return next_page(response)
+
+
+def poll_delay(attempt, progress=None, headers=None):
+    """
+    Pick how long to wait in seconds before polling a running query again.
+
+    The delay starts at MIN_POLL_DELAY and doubles with every attempt up to MAX_POLL_DELAY. It
+    shrinks as the reported progress approaches 100 and grows when needed so that the remaining
+    rate limit budget lasts until the limit resets.
+    """
+    delay = min(MIN_POLL_DELAY * 2 ** attempt, MAX_POLL_DELAY)
+    if progress:
+        delay = max(delay * (100 - min(progress, 100)) / 100, MIN_POLL_DELAY)
+    try:
+        remaining = int(headers['X-RateLimit-Remaining'])
+        reset = int(headers['X-RateLimit-Reset'])
+    except (KeyError, TypeError, ValueError):
+        return delay
+    return max(delay, reset / max(remaining, 1))
+
+
+def get_results(provided_url, params=None):
+    """
+    Make the get request to the url and return the response, raising any request exception.
+    """
+    response = api_utils.get_session().get(provided_url,
+                                           headers=api_utils.generate_headers('rw'),
+                                           params=params)
+    return response_utils.CachedResponse(response)
 
 
 def fetch_results(provided_url, params=None):
@@ -89,9 +270,7 @@ def fetch_results(provided_url, params=None):
     Make the get request to the url and return the response.
     """
     try:
-        response = requests.get(provided_url, headers=api_utils.generate_headers('rw'),
-                                params=params)
-        return response
+        return get_results(provided_url, params)
     except requests.exceptions.RequestException as error:
         click.echo(error, err=True)
         sys.exit(1)
@@ -104,11 +283,12 @@ def validate_query(**kwargs):
     date_from = kwargs.get('date_from')
     time_from = kwargs.get('time_from')
     relative_time_range = kwargs.get('relative_time_range')
-    saved_query_id = kwargs.get('saved_query_id')
+    saved_query_id = kwargs.get('saved_query_id') or kwargs.get('saved_queries')
     query_string = kwargs.get('query_string')
     log_keys = kwargs.get('log_keys')
     favorites = kwargs.get('favorites')
     logset = kwargs.get('logset')
+    parallel = kwargs.get('parallel') or 1
 
     valid = True
     if all([any([favorites, logset]), log_keys]):
@@ -139,6 +319,52 @@ def validate_query(**kwargs):
         valid = False
         click.echo('Either of start time, start date or relative time range must be supplied.',
                    err=True)
+    if parallel > 1 and not any([all([time_from, kwargs.get('time_to')]),
+                                 all([date_from, kwargs.get('date_to')])]):
+        valid = False
+        click.echo('Parallel queries need both start and end of the time range to be supplied.',
+                   err=True)
+    if not validate_modes(dict(kwargs, parallel=parallel)):
+        valid = False
+    return valid
+
+
+def validate_modes(options):
+    """
+    Validate the options of incremental statistics and of concurrent saved queries.
+    """
+    valid = True
+    if options.get('incremental') and not validate_incremental(
+            options.get('query_string'), options.get('relative_time_range'),
+            options.get('saved_query_id') or options.get('saved_queries'), options['parallel'],
+            options.get('aggregate')):
+        valid = False
+    if options.get('saved_queries') and any([options.get('saved_query_id'),
+                                             options['parallel'] > 1, options.get('aggregate')]):
+        valid = False
+        click.echo('Several saved queries cannot be combined with a single saved query, parallel '
+                   'queries or aggregations.', err=True)
+    return valid
+
+
+def validate_incremental(query_string, relative_time_range, saved_query_id, parallel,
+                         aggregate=None):
+    """
+    Validate the options of an incremental statistics query.
+    """
+    valid = True
+    if saved_query_id or parallel > 1 or aggregate:
+        valid = False
+        click.echo('Incremental statistics cannot be combined with saved queries, parallel '
+                   'queries or aggregations.', err=True)
+    if timeseries_utils.calculation(query_string) not in timeseries_utils.MERGEABLE_CALCULATIONS:
+        valid = False
+        click.echo('Incremental statistics need a LEQL query calculating one of: %s.'
+                   % ', '.join(sorted(timeseries_utils.MERGEABLE_CALCULATIONS)), err=True)
+    if not timeseries_utils.parse_relative_range(relative_time_range):
+        valid = False
+        click.echo("Incremental statistics need a relative time range like 'last 24 hours' in "
+                   "minutes, hours, days or weeks.", err=True)
     return valid
 
 
@@ -147,36 +373,276 @@ def query(**kwargs):
     Post query to Logentries.
     """
     date_from = kwargs.get('date_from')
-    date_to = kwargs.get('date_to')
     time_from = kwargs.get('time_from')
-    time_to = kwargs.get('time_to')
     relative_time_range = kwargs.get('relative_time_range')
     saved_query_id = kwargs.get('saved_query_id')
     query_string = kwargs.get('query_string')
     log_keys = kwargs.get('log_keys')
     favorites = kwargs.get('favorites')
     logset = kwargs.get('logset')
+    parallel = kwargs.get('parallel') or 1
+    output = kwargs.get('output') or OUTPUT_TEXT
+    use_cache = kwargs.get('use_cache', True)
+    seen_events = event_utils.SeenEvents() if kwargs.get('dedup') else None
+    aggregation = aggregate_utils.Aggregation(kwargs['aggregate']) \
+        if kwargs.get('aggregate') else None
     if not validate_query(date_from=date_from, time_from=time_from, query_string=query_string,
                           relative_time_range=relative_time_range, saved_query_id=saved_query_id,
-                          log_keys=log_keys, favorites=favorites, logset=logset):
+                          log_keys=log_keys, favorites=favorites, logset=logset,
+                          time_to=kwargs.get('time_to'), date_to=kwargs.get('date_to'),
+                          parallel=parallel, incremental=kwargs.get('incremental'),
+                          aggregate=kwargs.get('aggregate'),
+                          saved_queries=kwargs.get('saved_queries')):
         return False
 
-    time_range = prepare_time_range(time_from, time_to, relative_time_range, date_from, date_to)
-    if favorites:
-        log_keys = api_utils.get_named_logkey_group(favorites)
-    if logset:
-        log_keys = api.get_log_keys_from_logset(logset)
+    time_range = prepare_time_range(time_from, kwargs.get('time_to'), relative_time_range,
+                                    date_from, kwargs.get('date_to'))
+    log_keys = resolve_log_keys(log_keys, favorites, logset, use_cache)
+    if kwargs.get('incremental'):
+        query_incremental(log_keys, query_string, relative_time_range, output, use_cache)
+        return True
+    if kwargs.get('saved_queries'):
+        run_saved_queries(kwargs['saved_queries'], log_keys, time_range, output, seen_events)
+        return True
+    recorder = None
+    cache_key = result_cache_key(saved_query_id, log_keys, query_string, time_range)
+    if use_cache and cache_key and api_utils.get_query_cache_size():
+        if print_cached_result(cache_key, output, seen_events, aggregation):
+            return print_aggregation(aggregation, output)
+        recorder = cache_utils.ResultRecorder(cache_key,
+                                              api_utils.get_query_cache_size() * 1024 * 1024)
     try:
-        if saved_query_id:
-            response = run_saved_query(saved_query_id, time_range, log_keys)
+        if parallel > 1:
+            handle_parallel_query(saved_query_id, log_keys, query_string, time_range, parallel,
+                                  output, seen_events, recorder, aggregation)
         else:
-            response = post_query(log_keys, query_string, time_range)
-        with click.progressbar(length=100, label='Progress\t') as progress_bar:
-            handle_response(response, progress_bar)
-        return True
+            with progressbar(100, output) as progress_bar:
+                handle_response(run_query(saved_query_id, log_keys, query_string, time_range),
+                                progress_bar, output, seen_events, recorder, aggregation)
+        if recorder is not None:
+            recorder.commit()
+        return print_aggregation(aggregation, output)
     except requests.exceptions.RequestException as error:
         click.echo(error)
         sys.exit(1)
+    finally:
+        if recorder is not None:
+            recorder.discard()
+
+
+def resolve_log_keys(log_keys, favorites=None, logset=None, use_cache=True):
+    """
+    Get the log keys of the favorites or the logset if either is given, else the log keys.
+    """
+    if favorites:
+        return api_utils.get_named_logkey_group(favorites)
+    if logset:
+        return api.get_log_keys_from_logset(logset, use_cache)
+    return log_keys
+
+
+def result_cache_key(saved_query_id, log_keys, query_string, time_range):
+    """
+    Get the key of a query in the local result cache, None if its results may still change
+    because its time range is relative or ends less than RESULT_CACHE_MIN_AGE seconds ago.
+    """
+    if not time_range or 'to' not in time_range or \
+            time_range['to'] > (time.time() - RESULT_CACHE_MIN_AGE) * 1000:
+        return None
+    payload = {
+        'saved_query': str(saved_query_id) if saved_query_id else None,
+        'logs': sorted(log_keys or []),
+        'statement': None if saved_query_id else query_string,
+        'from': time_range['from'],
+        'to': time_range['to'],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True)).hexdigest()
+
+
+def print_cached_result(cache_key, output=OUTPUT_TEXT, seen_events=None, aggregation=None):
+    """
+    Print the pages of a cached query result, return False if the result is not cached.
+    """
+    pages = cache_utils.load_result(cache_key)
+    if pages is None:
+        return False
+    for body in pages:
+        emit_page(response_utils.CachedResponse.from_body(body), output, seen_events, aggregation)
+    return True
+
+
+def print_aggregation(aggregation, output=OUTPUT_TEXT):
+    """
+    Print the results of an aggregation, if there is one, as lines of text or as a single line of
+    json. Return True.
+    """
+    if aggregation is None:
+        return True
+    results = aggregation.results()
+    if output == OUTPUT_NDJSON:
+        sys.stdout.write(json.dumps(dict(results), separators=(',', ':')) + '\n')
+        return True
+    for spec, result in results:
+        if isinstance(result, list):
+            click.echo(spec + ':')
+            for value, count in result:
+                click.echo('\t%s: %s' % (value, count))
+        else:
+            click.echo('%s: %s' % (spec, result))
+    return True
+
+
+def query_incremental(log_keys, query_string, relative_time_range, output=OUTPUT_TEXT,
+                      use_cache=True):
+    """
+    Print the timeseries statistics of a rolling window, querying only the buckets that are not
+    stored locally yet.
+
+    Buckets are aligned to multiples of their width, so the window ends with the bucket the
+    current time falls into. That bucket, and buckets ending less than RESULT_CACHE_MIN_AGE
+    seconds ago, are always queried again; older buckets are stored and reused by later runs.
+    """
+    buckets = timeseries_utils.bucket_count(query_string)
+    width = max(1000, timeseries_utils.parse_relative_range(relative_time_range) * 1000 // buckets)
+    now = int(time.time() * 1000)
+    current = now // width * width
+    window_from = current - (buckets - 1) * width
+    key = timeseries_utils.series_key(log_keys, query_string, width)
+    stored = timeseries_utils.load_buckets(key, window_from) if use_cache else {}
+
+    missing_from = window_from
+    while missing_from in stored and missing_from < current:
+        missing_from += width
+    fetched = {}
+    if missing_from < current:
+        _, values = fetch_buckets(log_keys, query_string, missing_from, current,
+                                  (current - missing_from) // width)
+        fetched = dict((missing_from + index * width, value)
+                       for index, value in enumerate(values))
+    timeseries_key, values = fetch_buckets(log_keys, query_string, current, max(now, current + 1),
+                                           1)
+
+    timeseries_utils.store_buckets(key, dict(
+        (start, value) for start, value in fetched.iteritems()
+        if start + width <= now - RESULT_CACHE_MIN_AGE * 1000), window_from)
+    stored.update(fetched)
+    merged = [stored[start] for start in range(window_from, current, width)] + values
+    body = timeseries_utils.statistics_body(timeseries_key, merged, window_from, width)
+    print_response(response_utils.CachedResponse.from_body(body), output)
+
+
+def fetch_buckets(log_keys, query_string, time_from, time_to, buckets):
+    """
+    Query a timeseries of the given number of buckets over a time range, return the key of the
+    timeseries and its bucket values. Exit if the result is not a timeseries of such buckets.
+    """
+    statement = timeseries_utils.with_timeslice(query_string, buckets)
+    response = post_query(log_keys, statement, {'from': time_from, 'to': time_to})
+    pages = list(iter_pages(response, NullProgressBar()))
+    timeseries = pages[-1].json().get('statistics', {}).get('timeseries') if pages else None
+    if not timeseries or len(timeseries.values()[0]) != buckets:
+        click.echo('Incremental statistics need a query that returns a single timeseries.',
+                   err=True)
+        sys.exit(1)
+    return timeseries.keys()[0], timeseries.values()[0]
+
+
+def run_query(saved_query_id, log_keys, query_string, time_range):
+    """
+    Start either a saved query or a LEQL query over the time range and return the first response.
+    """
+    if saved_query_id:
+        return run_saved_query(saved_query_id, time_range, log_keys)
+    return post_query(log_keys, query_string, time_range)
+
+
+def split_time_range(time_range, parts):
+    """
+    Split an absolute time range into consecutive sub-ranges of roughly equal length.
+    """
+    start, end = time_range['from'], time_range['to']
+    parts = max(1, min(parts, end - start))
+    bounds = [start + (end - start) * index // parts for index in range(parts)] + [end]
+    return [{'from': lower, 'to': upper} for lower, upper in zip(bounds, bounds[1:])]
+
+
+def put_window_item(pages, item, cancelled):
+    """
+    Put an item on a window queue once there is room, False if the query was cancelled first.
+    """
+    while not cancelled.is_set():
+        try:
+            pages.put(item, timeout=WINDOW_QUEUE_TIMEOUT)
+            return True
+        except Queue.Full:
+            pass
+    return False
+
+
+def get_window_item(pages):
+    """
+    Get the next item from a window queue, waiting in short steps to stay interruptible.
+    """
+    while True:
+        try:
+            return pages.get(timeout=WINDOW_QUEUE_TIMEOUT)
+        except Queue.Empty:
+            pass
+
+
+def stream_window(job):
+    """
+    Run a query over a single sub-window and put each of its pages on the window's queue as
+    (True, page) as soon as it completes, followed by (False, whether the window succeeded).
+    """
+    saved_query_id, log_keys, query_string, time_range, pages, cancelled = job
+    succeeded = False
+    try:
+        response = run_query(saved_query_id, log_keys, query_string, time_range)
+        for page in iter_pages(response, NullProgressBar()):
+            if not put_window_item(pages, (True, page), cancelled):
+                return
+        succeeded = True
+    except requests.exceptions.RequestException as error:
+        click.echo(error, err=True)
+    except SystemExit:
+        pass
+    finally:
+        put_window_item(pages, (False, succeeded), cancelled)
+
+
+def handle_parallel_query(saved_query_id, log_keys, query_string, time_range, parallel,
+                          output=OUTPUT_TEXT, seen_events=None, recorder=None, aggregation=None):
+    """
+    Split the time range into sub-windows, query them concurrently and print their pages in
+    timestamp order.
+
+    Sub-windows do not overlap, so printing them in window order keeps the merged event stream
+    ordered while later windows are still being fetched. At most pool size windows run at once,
+    each buffering at most WINDOW_QUEUE_SIZE pages ahead of printing.
+    """
+    windows = split_time_range(time_range, parallel)
+    cancelled = threading.Event()
+    jobs = [(saved_query_id, log_keys, query_string, window,
+             Queue.Queue(maxsize=WINDOW_QUEUE_SIZE), cancelled) for window in windows]
+    pool = ThreadPool(min(len(jobs), api_utils.get_pool_size()))
+    try:
+        with progressbar(len(jobs), output) as progress_bar:
+            for job in jobs:
+                pool.apply_async(stream_window, (job,))
+            for job in jobs:
+                is_page, item = get_window_item(job[4])
+                while is_page:
+                    if recorder is not None:
+                        recorder.record(item.json())
+                    emit_page(item, output, seen_events, aggregation)
+                    is_page, item = get_window_item(job[4])
+                if not item:
+                    sys.exit(1)
+                progress_bar.update(1)
+    finally:
+        cancelled.set()
+        pool.terminate()
 
 
 def post_query(log_keys, query_string, time_range):
@@ -189,9 +655,10 @@ def post_query(log_keys, query_string, time_range):
     :return: response
     """
     payload = {"logs": log_keys, "leql": {"statement": query_string, "during": time_range}}
-    response = requests.post(_url(('logs',))[1], headers=api_utils.generate_headers('rw'),
-                             json=payload)
-    return response
+    response = api_utils.get_session().post(_url(('logs',))[1],
+                                            headers=api_utils.generate_headers('rw'),
+                                            json=payload)
+    return response_utils.CachedResponse(response)
 
 
 def prepare_time_range(time_from, time_to, relative_time_range, date_from=None, date_to=None):
@@ -208,37 +675,135 @@ def prepare_time_range(time_from, time_to, relative_time_range, date_from=None,
         return {"from": from_ts, "to": to_ts}
 
 
-def tail_logs(logkeys, leql, poll_interval, favorites=None, logset=None, saved_query_id=None):
+def start_tail(logkeys, leql, saved_query_id=None):
     """
-    Tail given logs
+    Create a live query over the logs, or run a saved one, and return its first response.
     """
-    if favorites:
-        logkeys = api_utils.get_named_logkey_group(favorites)
-    elif logset:
-        logkeys = api.get_log_keys_from_logset(logset)
     if saved_query_id:
         if logkeys:
             url = _url(('live', 'logs', ':'.join(logkeys), str(saved_query_id)))[1]
         else:
             url = _url(('live', 'saved_query', str(saved_query_id)))[1]
+        response = api_utils.get_session().get(url, headers=api_utils.generate_headers('rw'))
     else:
-        url = _url(('live', 'logs'))[1]
-    try:
-        if saved_query_id:
-            response = requests.get(url, headers=api_utils.generate_headers('rw'))
-        else:
-            payload = {'logs': logkeys}
-            if leql:
-                payload.update({'leql': {'statement': leql}})
+        payload = {'logs': logkeys}
+        if leql:
+            payload.update({'leql': {'statement': leql}})
+
+        response = api_utils.get_session().post(_url(('live', 'logs'))[1],
+                                                headers=api_utils.generate_headers('rw'),
+                                                json=payload)
+    return response_utils.CachedResponse(response)
 
-            response = requests.post(url, headers=api_utils.generate_headers('rw'), json=payload)
-        handle_tail(response, poll_interval)
+
+def tail_logs(logkeys, leql, poll_interval, favorites=None, logset=None, saved_query_id=None,
+              output=OUTPUT_TEXT, use_cache=True, dedup=False):
+    """
+    Tail given logs, printing every event only once if dedup is set
+    """
+    logkeys = resolve_log_keys(logkeys, favorites, logset, use_cache)
+    try:
+        handle_tail(start_tail(logkeys, leql, saved_query_id), poll_interval,
+                    lambda: start_tail(logkeys, leql, saved_query_id), output,
+                    event_utils.SeenEvents() if dedup else None)
         return True
     except requests.exceptions.RequestException as error:
         click.echo(error, err=True)
         sys.exit(1)
 
 
+def tail_sources(logkeys, favorites=(), logsets=(), saved_query_ids=(), use_cache=True):
+    """
+    Get the tag, log keys and saved query id of every live query of a merged tail. Each
+    favorite and logset is a source of its own, saved queries run over the given log keys or
+    over their own logs.
+    """
+    logkeys = [logkey for logkey in logkeys if logkey]
+    sources = []
+    if logkeys and not saved_query_ids:
+        sources.append(('logs', logkeys, None))
+    for favorite in favorites:
+        sources.append((favorite, api_utils.get_named_logkey_group(favorite), None))
+    for logset in logsets:
+        tag = inventory_utils.get_name(inventory_utils.LOGSETS, logset) or logset
+        sources.append((tag, api.get_log_keys_from_logset(logset, use_cache), None))
+    for saved_query_id in saved_query_ids:
+        sources.append((str(saved_query_id), logkeys, saved_query_id))
+    return sources
+
+
+def tail_source(job):
+    """
+    Poll the live query of a single source until interrupted and put its events on the queue
+    tagged with the source. Return once the live query failed for good or the tail is stopped.
+    """
+    tag, logkeys, leql, saved_query_id, poll_interval, events, stopped = job
+    try:
+        response = start_tail(logkeys, leql, saved_query_id)
+        for page in iter_tail(response, poll_interval,
+                              lambda: start_tail(logkeys, leql, saved_query_id)):
+            if stopped.is_set():
+                return
+            for event in page.json().get('events', []):
+                events.put((tag, event))
+    except requests.exceptions.RequestException as error:
+        click.echo('[%s] %s' % (tag, error), err=True)
+    except SystemExit:
+        click.echo('[%s] Live query failed.' % tag, err=True)
+
+
+def merge_tail_events(events, is_running, reorder_delay, output=OUTPUT_TEXT, seen_events=None):
+    """
+    Print the events that tail_source workers put on the queue as a single stream ordered by
+    timestamp. Each event is held in a reorder buffer for reorder_delay seconds after it
+    arrives, so that earlier events of slower sources are still printed before it. Events seen
+    before, from any source, are dropped if seen events are tracked.
+    """
+    buffered = []
+    sequence = itertools.count()
+    while True:
+        running = is_running()
+        try:
+            tag, event = events.get(timeout=TAIL_MERGE_TICK)
+            if seen_events is None or seen_events.add(event):
+                heapq.heappush(buffered, (event.get('timestamp', 0), next(sequence),
+                                          time.time(), tag, event))
+        except Queue.Empty:
+            if not running and not buffered:
+                return
+            sys.stdout.flush()  # notice a closed output while the logs are idle
+        # release everything once all sources are done and the queue has been drained
+        release_before = time.time() - reorder_delay if running or not events.empty() else None
+        while buffered and (release_before is None or buffered[0][2] <= release_before):
+            _, _, _, tag, event = heapq.heappop(buffered)
+            print_event(event, output, tag)
+
+
+def tail_many(logkeys, leql, poll_interval, favorites=(), logsets=(), saved_query_ids=(),
+              output=OUTPUT_TEXT, use_cache=True, dedup=False):
+    """
+    Tail several logs, logsets, favorites and saved queries at once in a single process and
+    print their events as one stream ordered by timestamp, each line tagged with its source.
+    Run until interrupted, or exit once every live query has failed for good.
+    """
+    sources = tail_sources(logkeys, favorites, logsets, saved_query_ids, use_cache)
+    if not sources:
+        return False
+    events = Queue.Queue()
+    stopped = threading.Event()
+    pool = ThreadPool(len(sources))
+    try:
+        results = [pool.apply_async(tail_source, ((tag, source_logkeys, leql, saved_query_id,
+                                                   poll_interval, events, stopped),))
+                   for tag, source_logkeys, saved_query_id in sources]
+        merge_tail_events(events, lambda: not all(result.ready() for result in results),
+                          poll_interval, output, event_utils.SeenEvents() if dedup else None)
+        sys.exit(1)
+    finally:
+        stopped.set()
+        pool.terminate()
+
+
 def run_saved_query(saved_query_id, params, log_keys):
     """
     Run the given saved query
@@ -251,31 +816,148 @@ def run_saved_query(saved_query_id, params, log_keys):
     return fetch_results(url, params)
 
 
-def print_response(response):
+def select_saved_queries(selectors):
+    """
+    Get the id and name of every saved query given by id, or whose name matches one of the
+    given shell style patterns, in the order of the selectors.
+    """
+    saved_queries = saved_query_api.list_saved_queries()
+    names = dict((saved_query['id'], saved_query['name']) for saved_query in saved_queries)
+    selected = []
+    for selector in selectors:
+        try:
+            saved_query_id = str(uuid.UUID(selector))
+            selected.append((saved_query_id, names.get(saved_query_id, saved_query_id)))
+            continue
+        except ValueError:
+            pass
+        matches = [(saved_query['id'], saved_query['name']) for saved_query in saved_queries
+                   if fnmatch.fnmatch(saved_query['name'].lower(), selector.lower())]
+        if not matches:
+            click.echo("No saved query matches '%s'." % selector, err=True)
+        selected.extend(match for match in matches if match not in selected)
+    return selected
+
+
+def fetch_saved_query(job):
     """
-    Print response in a human readable way.
+    Run a saved query of a concurrent run, return its name and pages, None if it failed.
     """
-    if 'events' in response.json():
+    saved_query_id, name, log_keys, time_range = job
+    try:
+        response = run_query(saved_query_id, log_keys, None, time_range)
+        return name, list(iter_pages(response, NullProgressBar()))
+    except requests.exceptions.RequestException as error:
+        click.echo(error, err=True)
+    except SystemExit:
+        pass
+    return name, None
+
+
+def run_saved_queries(selectors, log_keys, time_range, output=OUTPUT_TEXT, seen_events=None):
+    """
+    Run saved queries concurrently and print the results of each, tagged by its name, as soon as
+    it completes. Exit with an error once all of them are done if any of them failed.
+
+    At most SAVED_QUERY_WORKERS queries run at the same time, sharing the connection pool and
+    the rate limit of the session.
+    """
+    saved_queries = select_saved_queries(selectors)
+    if not saved_queries:
+        sys.exit(1)
+    jobs = [(saved_query_id, name, log_keys, time_range)
+            for saved_query_id, name in saved_queries]
+    failed = []
+    pool = ThreadPool(min(len(jobs), SAVED_QUERY_WORKERS))
+    try:
+        for name, pages in pool.imap_unordered(fetch_saved_query, jobs):
+            if pages is None:
+                failed.append(name)
+                click.echo('Saved query %s failed.' % name, err=True)
+                continue
+            for page in pages:
+                print_tagged_response(drop_seen_events(page, seen_events), name, output)
+    finally:
+        pool.terminate()
+    if failed:
+        sys.exit(1)
+
+
+def print_tagged_response(response, source, output=OUTPUT_TEXT):
+    """
+    Print a response tagged with its source: every event carries the tag, statistics follow it.
+    """
+    data = response.json()
+    if 'events' in data:
+        for event in data['events']:
+            print_event(event, output, source)
+    elif 'statistics' in data:
+        if output == OUTPUT_NDJSON:
+            sys.stdout.write(json.dumps(dict(data['statistics'], source=source),
+                                        separators=(',', ':')) + '\n')
+        else:
+            click.echo(colored('[%s]' % source, 'cyan'))
+            prettyprint_statistics(response)
+
+
+def print_response(response, output=OUTPUT_TEXT):
+    """
+    Print response in a human readable way, or as newline delimited json.
+    """
+    data = response.json()
+    if output == OUTPUT_NDJSON:
+        write_ndjson(response)
+    elif 'events' in data:
         prettyprint_events(response)
-    elif 'statistics' in response.json():
+    elif 'statistics' in data:
         prettyprint_statistics(response)
 
 
+def write_ndjson(response):
+    """
+    Write every event of the response, or its statistics, as a single line of json to stdout.
+    """
+    data = response.json()
+    if 'events' in data:
+        records = data['events']
+    elif 'statistics' in data:
+        records = [data['statistics']]
+    else:
+        return
+    sys.stdout.write(''.join(json.dumps(record, separators=(',', ':')) + '\n'
+                             for record in records))
+
+
 def prettyprint_events(response):
     """
     Print events in a human readable way.
     """
     data = response.json()
     for event in data['events']:
-        time_value = datetime.datetime.fromtimestamp(event['timestamp'] / 1000)
-        human_ts = time_value.strftime('%Y-%m-%d %H:%M:%S')
-        try:
-            message = json.loads(event['message'])
-            click.echo(
-                colored(str(human_ts), 'red') + '\t' +
-                colored(json.dumps(message, indent=4, separators={':', ';'}), 'white'))
-        except ValueError:
-            click.echo(colored(str(human_ts), 'red') + '\t' + colored(event['message'], 'white'))
+        print_event(event)
+
+
+def print_event(event, output=OUTPUT_TEXT, source=None):
+    """
+    Print a single event in a human readable way, or as a line of json, tagged with its source
+    if one is given.
+    """
+    if output == OUTPUT_NDJSON:
+        if source is not None:
+            event = dict(event, source=source)
+        sys.stdout.write(json.dumps(event, separators=(',', ':')) + '\n')
+        return
+
+    time_value = datetime.datetime.fromtimestamp(event['timestamp'] / 1000)
+    human_ts = colored(str(time_value.strftime('%Y-%m-%d %H:%M:%S')), 'red') + '\t'
+    if source is not None:
+        human_ts += colored('[%s]' % source, 'cyan') + '\t'
+    try:
+        message = json.loads(event['message'])
+        click.echo(human_ts + colored(json.dumps(message, indent=4, separators={':', ';'}),
+                                      'white'))
+    except ValueError:
+        click.echo(human_ts + colored(event['message'], 'white'))
 
 
 def prettyprint_statistics(response):
@@ -315,4 +997,4 @@ def prettyprint_statistics(response):
                     click.echo('\t' + str(innerkey) + ': ' + str(innervalue))
 
     else:
-        click.echo(json.dumps(response.json(), indent=4, separators={':', ';'}))
+        click.echo(json.dumps(data, indent=4, separators={':', ';'}))
@@ -5,16 +5,29 @@ Module for query commands
 import time
 import click
 
+from lecli import aggregate_utils
+from lecli import inventory_utils
 from lecli.query import api
 
 
+def split_saved_queries(dummy_ctx, dummy_param, value):
+    """
+    Click callback splitting comma separated saved queries.
+    """
+    if not value:
+        return ()
+    return tuple(selector.strip() for selector in value.split(',') if selector.strip())
+
+
 @click.command()
 # nargs (-1) makes sure multiple log keys is supported
-@click.argument('logkeys', type=click.STRING, nargs=-1)
+@click.argument('logkeys', type=click.STRING, nargs=-1,
+                callback=inventory_utils.resolve_logs_callback)
 @click.option('-c', '--favorites', default=None,
               help='Alias of log in config file')
 @click.option('-g', '--logset', default=None,
-              help='Name of logset to be got from server')
+              callback=inventory_utils.resolve_logsets_callback,
+              help='Id or name of logset to be got from server')
 @click.option('-l', '--leql', default=None,
               help='LEQL query')
 @click.option('-f', '--timefrom',
@@ -29,12 +42,34 @@ from lecli.query import api
               help='Relative range to query until now (Examples: today, yesterday, last 10 min, '
                    'last 6 weeks')
 @click.option('-s', '--saved-query', help='Saved query UUID to run.', type=click.UUID)
+@click.option('--saved-queries', callback=split_saved_queries,
+              help='Comma separated UUIDs or name patterns (like "health*") of saved queries to '
+                   'run concurrently')
+@click.option('-p', '--parallel', type=click.IntRange(1, None), default=1,
+              help='Split the time range into this many windows and query them concurrently')
+@click.option('--no-cache', is_flag=True,
+              help='Fetch log keys of the logset and query results from the server instead of '
+                   'the local cache')
+@click.option('-o', '--output', type=click.Choice(api.OUTPUT_FORMATS), default=api.OUTPUT_TEXT,
+              help='Output format, ndjson writes every event as a single line of json')
+@click.option('--dedup', is_flag=True,
+              help='Print every event only once, dropping events seen before')
+@click.option('-a', '--aggregate', multiple=True, callback=aggregate_utils.parse_specs_callback,
+              help='Aggregate the events locally instead of printing them: count, or sum, avg, '
+                   'min, max, pNN (percentile) or topK of a field, like p99:latency or top10:path')
+@click.option('--incremental', is_flag=True,
+              help='Reuse the locally stored buckets of a timeseries over a relative range and '
+                   'only query the buckets that are new')
 def query(logkeys, favorites, logset, leql, timefrom, timeto, datefrom, dateto,
-          relative_range, saved_query):
+          relative_range, saved_query, saved_queries, parallel, no_cache, output, dedup, aggregate,
+          incremental):
     """Query logs using LEQL"""
     success = api.query(log_keys=logkeys, query_string=leql, date_from=datefrom, date_to=dateto,
                         time_from=timefrom, time_to=timeto, saved_query_id=saved_query,
-                        relative_time_range=relative_range, favorites=favorites, logset=logset)
+                        relative_time_range=relative_range, favorites=favorites, logset=logset,
+                        parallel=parallel, output=output, use_cache=not no_cache, dedup=dedup,
+                        aggregate=aggregate, incremental=incremental,
+                        saved_queries=saved_queries)
 
     if not success:
         click.echo("Example usage: lecli query --logset mylogset --leql "
@@ -46,15 +81,24 @@ def query(logkeys, favorites, logset, leql, timefrom, timeto, datefrom, dateto,
         click.echo("Example usage: lecli query --favorites mylogalias --leql "
                    "'where(method=GET) calculate(count)' "
                    "-r 'last 3 days'")
+        click.echo("Example usage: lecli query --logset mylogset --leql 'where(method=GET)' "
+                   "--datefrom '2016-05-11 00:00:00' --dateto '2016-05-18 00:00:00' "
+                   "--parallel 7")
+        click.echo("Example usage: lecli query --logset mylogset --leql "
+                   "'where(status=500) calculate(count) timeslice(24)' "
+                   "-r 'last 24 hours' --incremental")
+        click.echo("Example usage: lecli query --saved-queries 'health*' -r 'last 1 day'")
 
 
 @click.command()
 # nargs (-1) makes sure multiple log keys is supported
-@click.argument('logkeys', type=click.STRING, nargs=-1)
+@click.argument('logkeys', type=click.STRING, nargs=-1,
+                callback=inventory_utils.resolve_logs_callback)
 @click.option('-c', '--favorites', type=click.STRING,
               help='Alias of log in config file')
 @click.option('-g', '--logset', type=click.STRING,
-              help='Name of logset to be got from server')
+              callback=inventory_utils.resolve_logsets_callback,
+              help='Id or name of logset to be got from server')
 @click.option('-f', '--timefrom', type=click.INT,
               help='Time to get events from (unix epoch)')
 @click.option('-t', '--timeto', type=click.INT,
@@ -67,13 +111,26 @@ def query(logkeys, favorites, logset, leql, timefrom, timeto, datefrom, dateto,
               help='Relative range to query until now (Examples: today, yesterday, '
                    'last x timeunit: last 2 hours, last 6 weeks etc.')
 @click.option('-s', '--saved-query', help='Saved query UUID to run.', type=click.UUID)
+@click.option('-p', '--parallel', type=click.IntRange(1, None), default=1,
+              help='Split the time range into this many windows and query them concurrently')
+@click.option('--no-cache', is_flag=True,
+              help='Fetch log keys of the logset and query results from the server instead of '
+                   'the local cache')
+@click.option('-o', '--output', type=click.Choice(api.OUTPUT_FORMATS), default=api.OUTPUT_TEXT,
+              help='Output format, ndjson writes every event as a single line of json')
+@click.option('--dedup', is_flag=True,
+              help='Print every event only once, dropping events seen before')
+@click.option('-a', '--aggregate', multiple=True, callback=aggregate_utils.parse_specs_callback,
+              help='Aggregate the events locally instead of printing them: count, or sum, avg, '
+                   'min, max, pNN (percentile) or topK of a field, like p99:latency or top10:path')
 def get_events(logkeys, favorites, logset, timefrom, timeto, datefrom, dateto, relative_range,
-               saved_query):
+               saved_query, parallel, no_cache, output, dedup, aggregate):
     """Get log events"""
     success = api.query(log_keys=logkeys, time_from=timefrom, query_string=api.ALL_EVENTS_QUERY,
                         time_to=timeto, date_from=datefrom, date_to=dateto, logset=logset,
                         relative_time_range=relative_range, favorites=favorites,
-                        saved_query_id=saved_query)
+                        saved_query_id=saved_query, parallel=parallel, output=output,
+                        use_cache=not no_cache, dedup=dedup, aggregate=aggregate)
     if not success:
         click.echo("Example usage: lecli get events 12345678-aaaa-bbbb-1234-1234cb123456 "
                    "-f 1465370400 -t 1465370500")
@@ -89,11 +146,13 @@ def get_events(logkeys, favorites, logset, timefrom, timeto, datefrom, dateto, r
 
 @click.command()
 # nargs (-1) makes sure multiple log keys is supported
-@click.argument('logkeys', type=click.STRING, nargs=-1)
+@click.argument('logkeys', type=click.STRING, nargs=-1,
+                callback=inventory_utils.resolve_logs_callback)
 @click.option('-c', '--favorites', type=click.STRING, default=None,
               help='Alias of log in config file')
 @click.option('-g', '--logset', type=click.STRING, default=None,
-              help='Name of logset to be got from server')
+              callback=inventory_utils.resolve_logsets_callback,
+              help='Id or name of logset to be got from server')
 @click.option('-l', '--last', type=click.INT, default=1200,
               help='Time window from now to now-X in seconds over which events will be returned '
                    '(Defaults to 20 mins)')
@@ -101,7 +160,15 @@ def get_events(logkeys, favorites, logset, timefrom, timeto, datefrom, dateto, r
               help='Relative range to query until now (Examples: today, yesterday, '
                    'last x timeunit: last 2 hours, last 6 weeks etc.')
 @click.option('-s', '--saved-query', help='Saved query to run', type=click.UUID)
-def get_recent_events(logkeys, favorites, logset, last, relative_range, saved_query):
+@click.option('--no-cache', is_flag=True,
+              help='Fetch log keys of the logset and query results from the server instead of '
+                   'the local cache')
+@click.option('-o', '--output', type=click.Choice(api.OUTPUT_FORMATS), default=api.OUTPUT_TEXT,
+              help='Output format, ndjson writes every event as a single line of json')
+@click.option('--dedup', is_flag=True,
+              help='Print every event only once, dropping events seen before')
+def get_recent_events(logkeys, favorites, logset, last, relative_range, saved_query, no_cache,
+                      output, dedup):
     """Get recent log events"""
     start_time = now = None
     if not relative_range:
@@ -110,7 +177,8 @@ def get_recent_events(logkeys, favorites, logset, last, relative_range, saved_qu
 
     success = api.query(log_keys=logkeys, query_string=api.ALL_EVENTS_QUERY,
                         time_from=start_time, time_to=now, relative_time_range=relative_range,
-                        favorites=favorites, logset=logset, saved_query_id=saved_query)
+                        favorites=favorites, logset=logset, saved_query_id=saved_query,
+                        output=output, use_cache=not no_cache, dedup=dedup)
     if not success:
         click.echo(
             'Example usage: lecli get recentevents 12345678-aaaa-bbbb-1234-1234cb123456 -l 200')
@@ -121,19 +189,42 @@ def get_recent_events(logkeys, favorites, logset, last, relative_range, saved_qu
 
 @click.command()
 # nargs (-1) makes sure multiple log keys is supported
-@click.argument('logkeys', type=click.STRING, nargs=-1)
-@click.option('-c', '--favorites', type=click.STRING, default=None,
-              help='Alias of log in config file')
-@click.option('-g', '--logset', type=click.STRING, default=None,
-              help='Name of logset to be got from server')
+@click.argument('logkeys', type=click.STRING, nargs=-1,
+                callback=inventory_utils.resolve_logs_callback)
+@click.option('-c', '--favorites', type=click.STRING, multiple=True,
+              help='Alias of log in config file, can be given several times')
+@click.option('-g', '--logset', type=click.STRING, multiple=True,
+              callback=inventory_utils.resolve_logsets_callback,
+              help='Id or name of logset to be got from server, can be given several times')
 @click.option('-l', '--leql', type=click.STRING, default=None,
               help='LEQL query to filter')
 @click.option('-i', '--poll-interval', type=click.FLOAT, default=1.0,
               help='Request interval of live tail in seconds, default is 1.0 second.')
-@click.option('-s', '--saved-query', type=click.UUID, help='Saved query id to tail.')
-def tail_events(logkeys, favorites, logset, leql, poll_interval, saved_query):
-    """Tail events of given logkey(s) with provided options"""
-    success = api.tail_logs(logkeys, leql, poll_interval, favorites, logset, saved_query)
+@click.option('-s', '--saved-query', type=click.UUID, multiple=True,
+              help='Saved query id to tail, can be given several times')
+@click.option('--no-cache', is_flag=True,
+              help='Fetch log keys of the logset from the server instead of the local cache')
+@click.option('-o', '--output', type=click.Choice(api.OUTPUT_FORMATS), default=api.OUTPUT_TEXT,
+              help='Output format, ndjson writes every event as a single line of json')
+@click.option('--dedup', is_flag=True,
+              help='Print every event only once, dropping events seen before')
+def tail_events(logkeys, favorites, logset, leql, poll_interval, saved_query, no_cache, output,
+                dedup):
+    """
+    Tail events of given logkey(s) with provided options. When several favorites, logsets or
+    saved queries are given they are tailed at once and merged into a single stream in
+    timestamp order, every event tagged with its source.
+    """
+    if len(favorites) + len(logset) + len(saved_query) > 1:
+        success = api.tail_many(logkeys, leql, poll_interval, favorites, logset, saved_query,
+                                output, not no_cache, dedup)
+    else:
+        success = api.tail_logs(logkeys, leql, poll_interval,
+                                favorites[0] if favorites else None,
+                                logset[0] if logset else None,
+                                saved_query[0] if saved_query else None, output, not no_cache,
+                                dedup)
 
     if not success:
         click.echo("Example usage: lecli tail events 12345678-aaaa-bbbb-1234-1234cb123456")
+        click.echo("Example usage: lecli tail events --logset mylogset --logset myotherlogset")
@@ -9,11 +9,10 @@ def response_error(response):
     """
     Check response if it has any errors.
     """
-    if response.headers.get('X-RateLimit-Remaining') is not None:
-        if int(response.headers['X-RateLimit-Remaining']) == 0:
-            sys.stderr.write('Error: Rate Limit Reached, will reset in ' + response.headers.get(
-                'X-RateLimit-Reset') + ' seconds \n')
-            return True
+    if response.status_code == 429:
+        sys.stderr.write('Error: Rate Limit Reached, will reset in %s seconds \n' %
+                         response.headers.get('X-RateLimit-Reset'))
+        return True
     try:
         response.raise_for_status()
     except requests.exceptions.HTTPError as error:
@@ -38,3 +37,37 @@ def response_error(response):
         else:
             return False
     return False
+
+
+class CachedResponse(object):
+    """
+    Response wrapper that decodes the json body only once and caches the parsed object. Every
+    other attribute is read from the wrapped response.
+    """
+
+    def __init__(self, response):
+        self.response = response
+        self.parsed_body = None
+        self.is_parsed = False
+
+    @classmethod
+    def from_body(cls, body):
+        """
+        Get a response holding an already decoded body, such as a body read from a cache.
+        """
+        cached = cls(None)
+        cached.parsed_body = body
+        cached.is_parsed = True
+        return cached
+
+    def json(self):
+        """
+        Get the parsed json body, decoding it on first access.
+        """
+        if not self.is_parsed:
+            self.parsed_body = self.response.json()
+            self.is_parsed = True
+        return self.parsed_body
+
+    def __getattr__(self, name):
+        return getattr(self.response, name)
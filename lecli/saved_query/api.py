@@ -71,7 +71,7 @@ def get_saved_query(query_id=None):
         endpoint_url = _url((query_id,))[1]
     headers = api_utils.generate_headers('rw')
     try:
-        response = requests.get(endpoint_url, headers=headers)
+        response = api_utils.get_session().get(endpoint_url, headers=headers)
         if response_utils.response_error(response):
             if query_id:
                 sys.stderr.write("Unable to retrieve saved query with id %s" % query_id)
@@ -84,6 +84,22 @@ def get_saved_query(query_id=None):
         sys.exit(1)
 
 
+def list_saved_queries():
+    """
+    Get all saved queries of the account, exit if they cannot be retrieved.
+    """
+    try:
+        response = api_utils.get_session().get(_url()[1],
+                                               headers=api_utils.generate_headers('rw'))
+    except requests.exceptions.RequestException as error:
+        click.echo(error)
+        sys.exit(1)
+    if response_utils.response_error(response):
+        sys.stderr.write("Unable to retrieve saved queries.")
+        sys.exit(1)
+    return response.json().get('saved_queries', [])
+
+
 def delete_saved_query(query_id):
     """
     Delete a specific saved query
@@ -91,7 +107,7 @@ def delete_saved_query(query_id):
     """
     headers = api_utils.generate_headers('rw')
     try:
-        response = requests.delete(_url((query_id,))[1], headers=headers)
+        response = api_utils.get_session().delete(_url((query_id,))[1], headers=headers)
         if response_utils.response_error(response):
             sys.stderr.write('Delete saved query failed.\n')
         elif response.status_code == 204:
@@ -129,7 +145,7 @@ def create_saved_query(name, statement, from_ts=None, to_ts=None, time_range=Non
     }
 
     try:
-        response = requests.post(_url()[1], json=params, headers=headers)
+        response = api_utils.get_session().post(_url()[1], json=params, headers=headers)
         if response_utils.response_error(response):
             sys.stderr.write('Creating saved query failed.\n')
             _pretty_print_saved_query_error(response)
@@ -181,7 +197,7 @@ def update_saved_query(query_id, name=None, statement=None, from_ts=None, to_ts=
         params['saved_query']['leql'] = leql
 
     try:
-        response = requests.patch(_url((query_id,))[1], json=params, headers=headers)
+        response = api_utils.get_session().patch(_url((query_id,))[1], json=params, headers=headers)
         if response_utils.response_error(response):
             sys.stderr.write('Updating saved query failed.\n')
             _pretty_print_saved_query_error(response)
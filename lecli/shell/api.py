@@ -0,0 +1,131 @@
+"""
+Shell API module.
+"""
+import cmd
+import os
+import shlex
+
+import click
+
+from lecli import cache_utils
+from lecli import cli
+
+try:
+    import readline
+except ImportError:  # not available on every platform, the shell then has no history
+    readline = None
+
+HISTORY_FILE = 'shell_history'
+HISTORY_LENGTH = 1000
+PROMPT = 'lecli> '
+# commands that would take over the shell instead of running within it
+NESTED_COMMANDS = ('shell', 'daemon')
+
+
+class Shell(cmd.Cmd):
+    """
+    Interactive shell running lecli commands in a single process, so the loaded config, the
+    connection pool and the caches are reused from one command to the next.
+    """
+    prompt = PROMPT
+    intro = "lecli shell, type 'help' for the list of commands and 'exit' to leave."
+
+    def __init__(self):
+        cmd.Cmd.__init__(self)
+        self.exit_code = 0
+
+    def default(self, line):
+        """
+        Run a lecli command, given without the leading 'lecli'.
+        """
+        try:
+            args = shlex.split(line)
+        except ValueError as error:
+            click.echo('Invalid command: %s' % error, err=True)
+            return
+        if args[:1] == ['lecli']:
+            args = args[1:]
+        if args[:1] and args[0] in NESTED_COMMANDS:
+            click.echo("'%s' cannot be run within the shell." % args[0], err=True)
+            return
+        try:
+            self.exit_code = cli.run(args)
+        except KeyboardInterrupt:
+            click.echo('', err=True)
+            self.exit_code = 1
+
+    def emptyline(self):
+        """Do nothing on an empty line, rather than repeating the last command"""
+        pass
+
+    def do_help(self, arg):
+        """Show the help of lecli or of a command"""
+        self.default('%s --help' % arg)
+
+    def do_exit(self, dummy_arg):
+        """Leave the shell"""
+        return True
+
+    do_quit = do_exit
+
+    def do_EOF(self, dummy_arg):  # pylint: disable=invalid-name
+        """Leave the shell on end of input"""
+        click.echo('')
+        return True
+
+    def completenames(self, text, *ignored):
+        """Complete the names of lecli commands"""
+        return [name + ' ' for name in cli.cli.list_commands(None) if name.startswith(text)]
+
+
+def history_path():
+    """
+    Get the path of the shell history file in the cache directory.
+    """
+    return cache_utils.cache_path(HISTORY_FILE)
+
+
+def load_history():
+    """
+    Load the history of previous shell sessions, if there is any.
+    """
+    if readline is None:
+        return
+    readline.set_history_length(HISTORY_LENGTH)
+    try:
+        readline.read_history_file(history_path())
+    except IOError:
+        pass
+
+
+def save_history():
+    """
+    Save the history for later shell sessions.
+    """
+    if readline is None:
+        return
+    try:
+        if not os.path.isdir(os.path.dirname(history_path())):
+            os.makedirs(os.path.dirname(history_path()))
+        readline.write_history_file(history_path())
+    except (IOError, OSError):
+        pass
+
+
+def run_shell():
+    """
+    Run the shell until it is left. Interrupting at the prompt discards the current line.
+    """
+    shell = Shell()
+    load_history()
+    try:
+        while True:
+            try:
+                shell.cmdloop()
+                break
+            except KeyboardInterrupt:
+                click.echo('')
+                shell.intro = ''
+    finally:
+        save_history()
+    return shell.exit_code
@@ -0,0 +1,17 @@
+"""
+Module for shell commands
+"""
+import sys
+
+import click
+
+from lecli.shell import api
+
+
+@click.command()
+def shell():
+    """
+    Run lecli commands interactively, reusing the loaded configuration, the connection pool and
+    the caches between commands. Exits with the exit code of the last command.
+    """
+    sys.exit(api.run_shell())
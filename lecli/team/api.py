@@ -58,7 +58,7 @@ def get_teams():
     """
     headers = api_utils.generate_headers('rw')
     try:
-        response = requests.get(_url()[1], data='', headers=headers)
+        response = api_utils.get_session().get(_url()[1], data='', headers=headers)
         handle_get_teams_response(response)
     except requests.exceptions.RequestException as error:
         click.echo(error, err=True)
@@ -72,7 +72,7 @@ def get_team(team_id):
     headers = api_utils.generate_headers('rw')
     params = {'teamid': team_id}
     try:
-        response = requests.get(_url((team_id,))[1], params=params, headers=headers)
+        response = api_utils.get_session().get(_url((team_id,))[1], params=params, headers=headers)
         handle_get_teams_response(response)
     except requests.exceptions.RequestException as error:
         click.echo(error, err=True)
@@ -92,7 +92,7 @@ def create_team(name):
     headers = api_utils.generate_headers('rw')
 
     try:
-        response = requests.post(_url()[1], json=params, headers=headers)
+        response = api_utils.get_session().post(_url()[1], json=params, headers=headers)
         if response_utils.response_error(response):
             click.echo('Creating team failed.', err=True)
             sys.exit(1)
@@ -111,7 +111,7 @@ def delete_team(team_id):
     headers = api_utils.generate_headers('rw')
 
     try:
-        response = requests.delete(_url((team_id,))[1], headers=headers)
+        response = api_utils.get_session().delete(_url((team_id,))[1], headers=headers)
         if response_utils.response_error(response):  # Check response has no errors
             click.echo('Delete team failed.', err=True)
             sys.exit(1)
@@ -139,7 +139,7 @@ def rename_team(team_id, team_name):
     headers = api_utils.generate_headers('rw')
 
     try:
-        response = requests.patch(_url((team_id,))[1], json=params, headers=headers)
+        response = api_utils.get_session().patch(_url((team_id,))[1], json=params, headers=headers)
         if response_utils.response_error(response):  # Check response has no errors
             click.echo('Renaming team with id: %s failed.' % team_id, err=True)
             sys.exit(1)
@@ -157,7 +157,7 @@ def add_user_to_team(team_id, user_key):
     headers = api_utils.generate_headers('rw')
     params = {'teamid': team_id}
     try:
-        response = requests.get(_url((team_id,))[1], params=params, headers=headers)
+        response = api_utils.get_session().get(_url((team_id,))[1], params=params, headers=headers)
         if response.status_code == 200:
             params = {
                 'team': {
@@ -171,7 +171,8 @@ def add_user_to_team(team_id, user_key):
             }
             headers = api_utils.generate_headers('rw')
             try:
-                response = requests.patch(_url((team_id,))[1], json=params, headers=headers)
+                response = api_utils.get_session().patch(_url((team_id,))[1], json=params,
+                                                         headers=headers)
                 if response_utils.response_error(response):  # Check response has no errors
                     click.echo('Adding user to team with key: %s failed.' % team_id, err=True)
                     sys.exit(1)
@@ -195,8 +196,8 @@ def delete_user_from_team(team_id, user_key):
     headers = api_utils.generate_headers('rw')
     params = {'teamid': team_id}
     try:
-        response = requests.request('GET', _url((team_id,))[1], params=params,
-                                    headers=headers)
+        response = api_utils.get_session().request('GET', _url((team_id,))[1], params=params,
+                                                   headers=headers)
         if response.status_code == 200:
             params = {
                 'team': {
@@ -207,7 +208,8 @@ def delete_user_from_team(team_id, user_key):
             }
             headers = api_utils.generate_headers('rw')
             try:
-                response = requests.put(_url((team_id,))[1], json=params, headers=headers)
+                response = api_utils.get_session().put(_url((team_id,))[1], json=params,
+                                                       headers=headers)
                 if response_utils.response_error(response):  # Check response has no errors
                     click.echo('Deleting user from team with key: %s failed.' % team_id, err=True)
                     sys.exit(1)
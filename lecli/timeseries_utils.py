@@ -0,0 +1,120 @@
+"""
+Timeseries utils module.
+"""
+import hashlib
+import json
+import re
+import time
+
+from lecli import cache_utils
+
+TIMESERIES_CACHE = 'timeseries.json'
+# number of buckets of a timeseries whose statement does not ask for a timeslice
+DEFAULT_BUCKETS = 10
+# series stored at most, the least recently used ones are dropped first
+MAX_SERIES = 100
+# calculations whose total over a window can be derived from the values of its buckets
+MERGEABLE_CALCULATIONS = {'count': sum, 'sum': sum, 'min': min, 'max': max}
+TIME_UNITS = {
+    'min': 60, 'mins': 60, 'minute': 60, 'minutes': 60,
+    'hr': 3600, 'hrs': 3600, 'hour': 3600, 'hours': 3600,
+    'day': 86400, 'days': 86400,
+    'week': 604800, 'weeks': 604800,
+}
+RELATIVE_RANGE_PATTERN = re.compile(r'^\s*last\s+(\d+)\s+([a-z]+)\s*$', re.IGNORECASE)
+CALCULATE_PATTERN = re.compile(r'calculate\(\s*(\w+)[^)]*\)', re.IGNORECASE)
+TIMESLICE_PATTERN = re.compile(r'\s*timeslice\(\s*(\d+)\s*\)', re.IGNORECASE)
+
+
+def parse_relative_range(relative_range):
+    """
+    Get the length in seconds of a 'last n timeunits' relative range, None for any other range
+    or for time units without a fixed length.
+    """
+    match = RELATIVE_RANGE_PATTERN.match(relative_range or '')
+    if not match or match.group(2).lower() not in TIME_UNITS:
+        return None
+    return int(match.group(1)) * TIME_UNITS[match.group(2).lower()]
+
+
+def calculation(statement):
+    """
+    Get the lower case name of the calculation of a LEQL statement, None if it has none.
+    """
+    match = CALCULATE_PATTERN.search(statement or '')
+    return match.group(1).lower() if match else None
+
+
+def bucket_count(statement):
+    """
+    Get the number of buckets the timeslice of a LEQL statement asks for.
+    """
+    match = TIMESLICE_PATTERN.search(statement)
+    return max(1, int(match.group(1))) if match else DEFAULT_BUCKETS
+
+
+def with_timeslice(statement, buckets):
+    """
+    Get the LEQL statement with its timeslice replaced to ask for the given number of buckets.
+    """
+    statement = TIMESLICE_PATTERN.sub('', statement)
+    return CALCULATE_PATTERN.sub(lambda match: '%s timeslice(%d)' % (match.group(0), buckets),
+                                 statement, count=1)
+
+
+def series_key(log_keys, statement, width):
+    """
+    Get the key of a timeseries in the local cache. Series of the same logs and calculation with
+    the same bucket width share their buckets, whatever the length of their windows.
+    """
+    payload = {
+        'logs': sorted(log_keys or []),
+        'statement': TIMESLICE_PATTERN.sub('', statement),
+        'width': width,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True)).hexdigest()
+
+
+def load_buckets(key, since):
+    """
+    Get the stored buckets of a series starting at or after since, keyed by their start in
+    milliseconds.
+    """
+    series = cache_utils.load(TIMESERIES_CACHE).get(key) or {}
+    buckets = dict((int(start), value) for start, value in series.get('buckets', {}).iteritems())
+    return dict((start, value) for start, value in buckets.iteritems() if start >= since)
+
+
+def store_buckets(key, buckets, since):
+    """
+    Add buckets to a stored series and drop its buckets starting before since.
+    """
+    data = cache_utils.load(TIMESERIES_CACHE)
+    merged = load_buckets(key, since)
+    merged.update((start, value) for start, value in buckets.iteritems() if start >= since)
+    data[key] = {'used_at': time.time(),
+                 'buckets': dict((str(start), value) for start, value in merged.iteritems())}
+    for stale in sorted(data, key=lambda name: data[name].get('used_at', 0))[:-MAX_SERIES]:
+        del data[stale]
+    return cache_utils.store(TIMESERIES_CACHE, data)
+
+
+def statistics_body(timeseries_key, values, time_from, width):
+    """
+    Build a statistics response body out of merged buckets, in the shape the query API returns.
+    """
+    calc_key = values[0].keys()[0] if values and values[0] else None
+    merge = MERGEABLE_CALCULATIONS.get((calc_key or '').split('(')[0].lower())
+    stats = {}
+    if merge is not None:
+        stats[calc_key] = merge(value.values()[0] for value in values)
+    return {
+        'statistics': {
+            'from': time_from,
+            'to': time_from + width * len(values),
+            'granularity': width,
+            'stats': {timeseries_key: stats},
+            'timeseries': {timeseries_key: values},
+            'groups': [],
+        }
+    }
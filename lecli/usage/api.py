@@ -42,7 +42,7 @@ def get_usage(start, end):
     params = {'from': start,
               'to': end}
     try:
-        response = requests.get(_url()[1], params=params, headers=headers)
+        response = api_utils.get_session().get(_url()[1], params=params, headers=headers)
         if response_utils.response_error(response):
             sys.stderr.write("Getting account usage failed. Status code %s"
                              % response.status_code)
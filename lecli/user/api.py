@@ -1,9 +1,12 @@
 """
 User API module.
 """
+import csv
 import sys
 import json
+from multiprocessing.pool import ThreadPool
 
+import click
 import requests
 from tabulate import tabulate
 
@@ -64,17 +67,34 @@ def list_users():
     """
     action, url = _url(('users',))
     try:
-        response = requests.request('GET', url,
-                                    headers=api_utils.generate_headers('owner', 'GET', action, ''))
+        response = api_utils.get_session().request(
+            'GET', url, headers=api_utils.generate_headers('owner', 'GET', action, ''))
         handle_userlist_response(response)
     except requests.exceptions.RequestException as error:
         sys.stderr.write(error)
         sys.exit(1)
 
 
-def add_new_user(first_name, last_name, email):
+def fetch_users():
     """
-    Add a new user to the current account.
+    Get the users of the current account, exit if they cannot be retrieved.
+    """
+    action, url = _url(('users',))
+    try:
+        response = api_utils.get_session().request(
+            'GET', url, headers=api_utils.generate_headers('owner', 'GET', action, ''))
+    except requests.exceptions.RequestException as error:
+        sys.stderr.write(str(error))
+        sys.exit(1)
+    if response_utils.response_error(response) is True:
+        sys.stderr.write(response.text)
+        sys.exit(1)
+    return response.json().get('users', [])
+
+
+def post_new_user(first_name, last_name, email):
+    """
+    Send the signed request adding a new user to the current account and return the response.
     """
     action, url = _url(('users',))
     json_content = {
@@ -87,10 +107,25 @@ def add_new_user(first_name, last_name, email):
     }
     body = json.dumps(json_content)
     headers = api_utils.generate_headers('owner', method='POST', action=action, body=body)
+    return api_utils.get_session().request('POST', url, json=json_content, headers=headers)
+
 
+def post_existing_user(user_key):
+    """
+    Send the signed request adding an existing user to the current account and return the
+    response.
+    """
+    action, url = _url(('users', user_key))
+    headers = api_utils.generate_headers('owner', method='POST', action=action, body='')
+    return api_utils.get_session().request('POST', url, data='', headers=headers)
+
+
+def add_new_user(first_name, last_name, email):
+    """
+    Add a new user to the current account.
+    """
     try:
-        response = requests.request('POST', url, json=json_content, headers=headers)
-        handle_create_user_response(response)
+        handle_create_user_response(post_new_user(first_name, last_name, email))
     except requests.exceptions.RequestException as error:
         sys.stderr.write(error)
         sys.exit(1)
@@ -100,12 +135,8 @@ def add_existing_user(user_key):
     """
     Add a user that already exist to the current account.
     """
-    action, url = _url(('users', user_key))
-    headers = api_utils.generate_headers('owner', method='POST', action=action, body='')
-
     try:
-        response = requests.request('POST', url, data='', headers=headers)
-        handle_create_user_response(response)
+        handle_create_user_response(post_existing_user(user_key))
     except requests.exceptions.RequestException as error:
         sys.stderr.write(error)
         sys.exit(1)
@@ -119,7 +150,7 @@ def delete_user(user_key):
     headers = api_utils.generate_headers('owner', method='DELETE', action=action, body='')
 
     try:
-        response = requests.request('DELETE', url, data='', headers=headers)
+        response = api_utils.get_session().request('DELETE', url, data='', headers=headers)
         if response_utils.response_error(response) is True:  # Check response has no errors
             sys.stderr.write('Delete user failed, status code: %s' % response.status_code)
             sys.exit(1)
@@ -136,8 +167,8 @@ def get_owner():
     """
     action, url = _url(('owners',))
     try:
-        response = requests.request('GET', url,
-                                    headers=api_utils.generate_headers('owner', 'GET', action, ''))
+        response = api_utils.get_session().request(
+            'GET', url, headers=api_utils.generate_headers('owner', 'GET', action, ''))
         handle_userlist_response(response)
     except requests.exceptions.RequestException as error:
         sys.stderr.write(error)
@@ -152,3 +183,96 @@ def print_users(response):
         print tabulate(response.json()['users'], headers={})
     elif 'owners' in response.json():
         print tabulate(response.json()['owners'], headers={})
+
+
+def load_users(filename):
+    """
+    Load the users to import from a json file holding a list of users, or from a csv file with
+    a header row. Every user has either a user_key, or a first_name, last_name and email.
+    Fields that are not text, such as json booleans or missing csv columns, are dropped.
+    """
+    with open(filename) as users_file:
+        if filename.endswith('.json'):
+            try:
+                users = json.load(users_file)
+            except ValueError as error:
+                click.echo('Invalid json in %s: %s' % (filename, error), err=True)
+                sys.exit(1)
+            if isinstance(users, dict):
+                users = users.get('users')
+        else:
+            users = list(csv.DictReader(users_file))
+    if not isinstance(users, list):
+        click.echo('Users file must contain a list of users.', err=True)
+        sys.exit(1)
+    return [dict((key.strip().lower(), value.strip()) for key, value in user.iteritems()
+                 if key and isinstance(value, basestring)) if isinstance(user, dict) else {}
+            for user in users]
+
+
+def user_label(user):
+    """
+    Get the email or user key of a user to import, used to report on it.
+    """
+    return user.get('email') or user.get('user_key') or 'invalid user'
+
+
+def import_user(job):
+    """
+    Add a single user of an import, return its index, label, whether it was added and a
+    message.
+    """
+    index, user = job
+    if user.get('user_key'):
+        request = lambda: post_existing_user(user['user_key'])
+    elif all(user.get(field) for field in ('first_name', 'last_name', 'email')):
+        request = lambda: post_new_user(user['first_name'], user['last_name'], user['email'])
+    else:
+        return index, user_label(user), False, 'needs user_key, or first_name, last_name and email'
+    try:
+        response = request()
+    except requests.exceptions.RequestException as error:
+        return index, user_label(user), False, str(error)
+    if response.status_code in (200, 201):
+        return index, user_label(user), True, None
+    message = 'status code %s: %s' % (response.status_code, response.text.strip())
+    return index, user_label(user), False, message
+
+
+def import_users(filename, workers=1):
+    """
+    Add the users of a file to the current account, with up to 'workers' signed requests
+    running at the same time. Users of the account are fetched once up front, and users that
+    are already in it are skipped. Report the result of every user and return True if none
+    failed.
+    """
+    users = load_users(filename)
+    existing = set()
+    for user in fetch_users():
+        existing.update(value.lower() for value in (user.get('email'), user.get('id')) if value)
+
+    jobs, skipped = [], 0
+    for index, user in enumerate(users):
+        key = (user.get('email') or user.get('user_key') or '').lower()
+        if key and key in existing:
+            skipped += 1
+            click.echo('[%d] %s: SKIPPED (already in account)' % (index + 1, user_label(user)))
+        else:
+            existing.add(key)
+            jobs.append((index, user))
+
+    failures = 0
+    pool = ThreadPool(max(1, min(workers, len(jobs) or 1)))
+    try:
+        for index, label, added, message in pool.imap(import_user, jobs):
+            if added:
+                click.echo('[%d] %s: ADDED' % (index + 1, label))
+            else:
+                failures += 1
+                click.echo('[%d] %s: FAILED (%s)' % (index + 1, label, message), err=True)
+    finally:
+        pool.terminate()
+
+    click.echo('%d users, %d added, %d skipped, %d failed' %
+               (len(users), len(jobs) - failures, skipped, failures))
+    return failures == 0
@@ -1,6 +1,8 @@
 """
 Module for user commands
 """
+import sys
+
 import click
 
 from lecli.user import api
@@ -46,6 +48,27 @@ def create_user(first, last, email, userkey, force):
                 api.add_existing_user(userkey)
 
 
+@click.command()
+@click.argument('filename', type=click.Path(exists=True, dir_okay=False))
+@click.option('-w', '--workers', type=click.IntRange(1, None), default=4,
+              help='Number of users to add at the same time, default is 4')
+@click.option('--force', is_flag=True,
+              help='Add the users without confirmation prompt')
+def import_users(filename, workers, force):
+    """
+    Add the users listed in a CSV or JSON file to this account, skipping users that are already
+    in it.
+
+    A CSV file has a header row, a JSON file holds a list of objects. Every user has either a
+    user_key, to add an existing user, or a first_name, last_name and email, for example:
+
+    [{"first_name": "John", "last_name": "Smith", "email": "john.smith@email.com"}]
+    """
+    if force or click.confirm('Please confirm you want to add the users of ' + filename):
+        if not api.import_users(filename, workers):
+            sys.exit(1)
+
+
 @click.command()
 @click.option('-u', '--userkey', type=click.STRING,
               help='User Key of user to be deleted')
@@ -12,7 +12,8 @@ setup(
     license='MIT',
     install_requires=['click==6.6', 'requests==2.9.1', 'pytz==2016.4', 'termcolor==1.1.0',
                       'tabulate==0.7.5', 'appdirs==1.4.0', 'validators==0.11.2'],
-    entry_points={'console_scripts': ['lecli = lecli.cli:cli']},
+    entry_points={'console_scripts': ['lecli = lecli.cli:cli',
+                                      'lecli-client = lecli.daemon.client:main']},
     url='https://github.com/logentries/lecli',
     zip_safe=False
 )
@@ -0,0 +1,8 @@
+import pytest
+
+from lecli import cache_utils
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmpdir, monkeypatch):
+    monkeypatch.setattr(cache_utils, 'CACHE_DIR', str(tmpdir.join('cache')))
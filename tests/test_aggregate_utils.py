@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from lecli import aggregate_utils
+
+EVENTS = [
+    {'message': json.dumps({'path': '/a', 'latency': 10, 'req': {'bytes': 100}})},
+    {'message': json.dumps({'path': '/b', 'latency': 20, 'req': {'bytes': 300}})},
+    {'message': json.dumps({'path': '/a', 'latency': 30})},
+    {'message': 'path=/a latency=40 status="not found"'},
+    {'message': 'plain text'},
+]
+
+
+def test_aggregation_over_json_and_kvp_fields():
+    aggregation = aggregate_utils.Aggregation(
+        ['count', 'count:latency', 'sum:req.bytes', 'avg:latency', 'min:latency',
+         'max:latency', 'p50:latency', 'top1:path'])
+    aggregation.add_events(EVENTS[:2])
+    aggregation.add_events(EVENTS[2:])
+
+    assert aggregation.results() == [
+        ('count', 5), ('count:latency', 4), ('sum:req.bytes', 400.0), ('avg:latency', 25.0),
+        ('min:latency', 10.0), ('max:latency', 40.0), ('p50:latency', 20.0),
+        ('top1:path', [['/a', 3]]),
+    ]
+
+
+def test_percentile_sample_is_bounded():
+    percentile = aggregate_utils.Percentile(90, size=100)
+    for value in range(10000):
+        percentile.add(value)
+
+    assert len(percentile.sample) == 100
+    assert 7000 < percentile.result() < 10000
+
+
+def test_top_is_bounded():
+    top = aggregate_utils.Top(2)
+    for value in range(1000):
+        top.add('common')
+        top.add('rare%d' % value)
+
+    assert len(top.counts) == 2 * aggregate_utils.TOP_CAPACITY_FACTOR
+    assert top.result()[0] == ['common', 1000]
+
+
+@pytest.mark.parametrize('spec', ['median:latency', 'sum', 'p999:latency'])
+def test_parse_spec_rejects_invalid_specs(spec):
+    with pytest.raises(ValueError):
+        aggregate_utils.parse_spec(spec)
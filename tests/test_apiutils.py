@@ -1,4 +1,5 @@
 import ConfigParser
+import base64
 import hmac
 import uuid
 import os
@@ -11,6 +12,13 @@ from lecli import api_utils, cli
 ID_WITH_VALID_LENGTH = str(uuid.uuid4())
 ID_WITH_INVALID_LENGTH = str(uuid.uuid4()) + 'invalid'
 MOCK_API_URL = 'http://mydummylink.com'
+# some tests replace load_config with a mock
+LOAD_CONFIG = api_utils.load_config
+
+
+@pytest.fixture(autouse=True)
+def unload_settings(monkeypatch):
+    monkeypatch.setattr(api_utils, '_SETTINGS', None)
 
 
 def test_gensignature():
@@ -59,6 +67,42 @@ def test_generate_header_owner(mocked_owner_apikey, mocked_owner_apikey_id):
     assert ID_WITH_VALID_LENGTH in headers['authorization-api-key']
 
 
+@pytest.mark.parametrize('method, body', [('GET', ''), ('POST', '{"user": {}}')])
+def test_owner_signer_matches_gensignature(method, body):
+    signer = api_utils.OwnerSigner(ID_WITH_VALID_LENGTH, ID_WITH_VALID_LENGTH)
+    headers = signer.headers(method, 'management/accounts/1/users', body)
+
+    signature = api_utils.gensignature(ID_WITH_VALID_LENGTH, headers['Date'], 'application/json',
+                                       method, 'management/accounts/1/users', body)
+    assert headers['authorization-api-key'] == '%s:%s' % (ID_WITH_VALID_LENGTH,
+                                                          base64.b64encode(signature))
+
+
+@patch('time.time')
+def test_owner_signer_formats_date_once_per_second(mocked_time):
+    signer = api_utils.OwnerSigner(ID_WITH_VALID_LENGTH, ID_WITH_VALID_LENGTH)
+    mocked_time.return_value = 0.2
+    assert signer.date() == 'Thu, 01 Jan 1970 00:00:00 GMT'
+    with patch('time.strftime') as mocked_strftime:
+        mocked_time.return_value = 0.9
+        assert signer.date() == 'Thu, 01 Jan 1970 00:00:00 GMT'
+        assert not mocked_strftime.called
+    mocked_time.return_value = 1.0
+    assert signer.date() == 'Thu, 01 Jan 1970 00:00:01 GMT'
+
+
+@patch('lecli.api_utils.get_owner_apikey')
+@patch('lecli.api_utils.get_owner_apikey_id')
+def test_owner_signer_is_reused_until_key_changes(mocked_owner_apikey_id, mocked_owner_apikey):
+    mocked_owner_apikey.return_value = ID_WITH_VALID_LENGTH
+    mocked_owner_apikey_id.return_value = ID_WITH_VALID_LENGTH
+    signer = api_utils.get_owner_signer()
+    assert api_utils.get_owner_signer() is signer
+
+    mocked_owner_apikey.return_value = str(uuid.uuid4())
+    assert api_utils.get_owner_signer() is not signer
+
+
 @patch('lecli.api_utils.get_ro_apikey')
 def test_generate_headers_user_agent(mocked_ro_apikey):
     mocked_ro_apikey.return_value = ID_WITH_VALID_LENGTH
@@ -284,3 +328,128 @@ def test_combine_objects():
     result = api_utils.combine_objects(left, right)
 
     assert result == expected_result
+
+
+def test_get_session_is_shared():
+    assert api_utils.get_session() is api_utils.get_session()
+
+
+@patch('lecli.api_utils.get_timeout')
+@patch('lecli.api_utils.get_pool_size')
+def test_get_session_is_rebuilt_when_pool_size_or_timeout_change(mocked_pool_size,
+                                                                 mocked_timeout):
+    mocked_pool_size.return_value, mocked_timeout.return_value = 4, 10.0
+    session = api_utils.get_session()
+    assert api_utils.get_session() is session
+
+    mocked_pool_size.return_value = 8
+    rebuilt = api_utils.get_session()
+    assert rebuilt is not session
+    assert rebuilt.pool_size == 8
+
+    mocked_timeout.return_value = 30.0
+    assert api_utils.get_session().timeout == 30.0
+
+
+def test_session_applies_default_timeout():
+    session = api_utils.Session(pool_size=2, timeout=5.0)
+    with patch('requests.Session.request') as mocked_request:
+        session.request('GET', MOCK_API_URL)
+        mocked_request.assert_called_once_with('GET', MOCK_API_URL, timeout=5.0)
+
+        session.request('GET', MOCK_API_URL, timeout=1.0)
+        mocked_request.assert_called_with('GET', MOCK_API_URL, timeout=1.0)
+
+
+def test_default_pool_size_and_timeout():
+    assert api_utils.get_pool_size() == api_utils.DEFAULT_POOL_SIZE
+    assert api_utils.get_timeout() == api_utils.DEFAULT_TIMEOUT
+
+
+def test_get_invalid_pool_size():
+    with patch.object(ConfigParser.ConfigParser, 'get', return_value='many'):
+        with pytest.raises(SystemExit):
+            api_utils.get_pool_size()
+
+
+def test_rate_limiter_waits_for_reset_when_exhausted():
+    limiter = api_utils.RateLimiter()
+    limiter.update(Mock(status_code=200,
+                        headers={'X-RateLimit-Remaining': '1', 'X-RateLimit-Reset': '30'}))
+
+    with patch('time.sleep') as mocked_sleep:
+        limiter.acquire()
+        assert not mocked_sleep.called
+
+        limiter.acquire()
+        assert mocked_sleep.called
+        assert 29 < mocked_sleep.call_args[0][0] <= 30
+
+
+def test_session_retries_rate_limited_requests():
+    session = api_utils.Session()
+    limited = Mock(status_code=429, headers={'X-RateLimit-Remaining': '0',
+                                             'X-RateLimit-Reset': '1'})
+    succeeded = Mock(status_code=200, headers={'X-RateLimit-Remaining': '10',
+                                               'X-RateLimit-Reset': '1'})
+    with patch('requests.Session.request', side_effect=[limited, succeeded]) as mocked_request:
+        with patch('time.sleep') as mocked_sleep:
+            response = session.request('GET', MOCK_API_URL)
+
+    assert response is succeeded
+    assert mocked_request.call_count == 2
+    assert mocked_sleep.called
+
+
+def test_settings_are_validated_once():
+    with patch.object(ConfigParser.ConfigParser, 'get',
+                      return_value=ID_WITH_VALID_LENGTH) as mocked_get:
+        for _ in range(3):
+            api_utils.get_rw_apikey()
+            api_utils.get_account_resource_id()
+
+    assert mocked_get.call_count == len(api_utils.SETTINGS_SCHEMA)
+
+
+def test_settings_record_invalid_values():
+    with patch.object(ConfigParser.ConfigParser, 'get', return_value=ID_WITH_INVALID_LENGTH):
+        settings = api_utils.build_settings()
+
+    assert settings.rw_api_key is None
+    assert ('rw_api_key', ID_WITH_INVALID_LENGTH) in settings.invalid
+    with pytest.raises(AttributeError):
+        settings.rw_api_key = ID_WITH_VALID_LENGTH
+
+
+def test_load_config_again_only_when_config_file_changes(tmpdir, monkeypatch):
+    config_file = tmpdir.join('config.ini')
+    config_file.write('[Auth]\naccount_resource_id = %s\n' % ID_WITH_VALID_LENGTH)
+    monkeypatch.setattr(api_utils, 'CONFIG_FILE_PATH', str(config_file))
+    monkeypatch.setattr(api_utils, 'CONFIG', ConfigParser.ConfigParser())
+
+    with patch.object(api_utils, 'reload_settings', wraps=api_utils.reload_settings) as reload:
+        LOAD_CONFIG()
+        LOAD_CONFIG()
+        assert reload.call_count == 1
+
+        config_file.write('[Auth]\naccount_resource_id = %s\nrw_api_key = %s\n'
+                          % (ID_WITH_VALID_LENGTH, ID_WITH_VALID_LENGTH))
+        LOAD_CONFIG()
+        assert reload.call_count == 2
+
+
+def test_load_config_again_drops_removed_keys(tmpdir, monkeypatch):
+    config_file = tmpdir.join('config.ini')
+    config_file.write('[Auth]\naccount_resource_id = %s\n[Cli_Favorites]\nweb = %s\n'
+                      % (ID_WITH_VALID_LENGTH, ID_WITH_VALID_LENGTH))
+    monkeypatch.setattr(api_utils, 'CONFIG_FILE_PATH', str(config_file))
+    monkeypatch.setattr(api_utils, 'CONFIG', ConfigParser.ConfigParser())
+
+    LOAD_CONFIG()
+    assert api_utils.CONFIG.has_section('Cli_Favorites')
+
+    config_file.write('[Auth]\naccount_resource_id = %s\nrw_api_key = %s\n'
+                      % (ID_WITH_VALID_LENGTH, ID_WITH_VALID_LENGTH))
+    LOAD_CONFIG()
+    assert not api_utils.CONFIG.has_section('Cli_Favorites')
+    assert api_utils.get_rw_apikey() == ID_WITH_VALID_LENGTH
@@ -0,0 +1,49 @@
+import json
+import sys
+
+from mock import patch, Mock
+
+from lecli.batch import api
+
+
+def write_operations(tmpdir, operations):
+    batch_file = tmpdir.join('batch.json')
+    batch_file.write(json.dumps(operations))
+    return str(batch_file)
+
+
+def test_run_batch(tmpdir, capsys):
+    create_log = Mock()
+    add_log = Mock()
+    filename = write_operations(tmpdir, [
+        {'operation': 'create_log', 'args': {'logname': 'web-1', 'params': None}},
+        {'operation': 'add_log_to_logset', 'args': ['logset-id', 'log-id']},
+    ])
+
+    with patch.dict(api.OPERATIONS, {'create_log': create_log, 'add_log_to_logset': add_log}):
+        assert api.run_batch(filename, workers=2) is True
+
+    out, err = capsys.readouterr()
+    create_log.assert_called_once_with(logname='web-1', params=None)
+    add_log.assert_called_once_with('logset-id', 'log-id')
+    assert '2 succeeded, 0 failed' in out
+
+
+def test_run_batch_reports_failed_operations(tmpdir, capsys):
+    def exit_with_error(log_id):
+        sys.exit(1)
+
+    filename = write_operations(tmpdir, [
+        {'operation': 'delete_log', 'args': {'log_id': 'log-id'}},
+        {'operation': 'unknown_operation'},
+        {'operation': 'create_log', 'args': {'wrong_argument': 1}},
+    ])
+
+    with patch.dict(api.OPERATIONS, {'delete_log': exit_with_error}):
+        assert api.run_batch(filename) is False
+
+    out, err = capsys.readouterr()
+    assert '[1] delete_log: FAILED' in err
+    assert '[2] unknown_operation: FAILED (Unknown operation)' in err
+    assert '[3] create_log: FAILED' in err
+    assert '0 succeeded, 3 failed' in out
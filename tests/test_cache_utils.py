@@ -0,0 +1,76 @@
+import os
+import time
+
+from mock import patch
+
+from lecli import cache_utils
+
+
+def test_get_missing_entry():
+    assert cache_utils.get_entry('test.json', 'key', 60) is None
+
+
+def test_set_and_get_entry():
+    cache_utils.set_entry('test.json', 'key', ['value'])
+
+    assert cache_utils.get_entry('test.json', 'key', 60) == ['value']
+
+
+def test_expired_entry():
+    cache_utils.set_entry('test.json', 'key', ['value'])
+
+    with patch('time.time', return_value=time.time() + 61):
+        assert cache_utils.get_entry('test.json', 'key', 60) is None
+
+
+def test_delete_entry():
+    cache_utils.set_entry('test.json', 'key', ['value'])
+    cache_utils.set_entry('test.json', 'other', ['value'])
+
+    cache_utils.delete_entry('test.json', 'key')
+    assert cache_utils.get_entry('test.json', 'key', 60) is None
+    assert cache_utils.get_entry('test.json', 'other', 60) == ['value']
+
+    cache_utils.delete_entry('test.json')
+    assert cache_utils.load('test.json') == {}
+
+
+def test_load_corrupt_cache():
+    cache_utils.store('test.json', {})
+    with open(cache_utils.cache_path('test.json'), 'w') as cache_file:
+        cache_file.write('{not json')
+
+    assert cache_utils.load('test.json') == {}
+
+
+def test_recorded_result_is_loaded():
+    recorder = cache_utils.ResultRecorder('key', 1024)
+    recorder.record({'events': [1]})
+    recorder.record({'events': [2]})
+
+    assert cache_utils.load_result('key') is None
+    recorder.commit()
+    assert list(cache_utils.load_result('key')) == [{'events': [1]}, {'events': [2]}]
+
+
+def test_result_larger_than_cache_is_not_stored():
+    recorder = cache_utils.ResultRecorder('key', 10)
+    recorder.record({'events': range(100)})
+    recorder.commit()
+
+    assert cache_utils.load_result('key') is None
+
+
+def test_least_recently_used_results_are_evicted():
+    for key in ('first', 'second'):
+        recorder = cache_utils.ResultRecorder(key, 1024)
+        recorder.record({'events': ['x' * 10]})
+        recorder.commit()
+    os.utime(cache_utils.result_path('first'), (0, 0))
+    os.utime(cache_utils.result_path('second'), (1, 1))
+    cache_utils.load_result('first')
+
+    cache_utils.evict_results(os.path.getsize(cache_utils.result_path('first')))
+
+    assert cache_utils.load_result('first') is not None
+    assert cache_utils.load_result('second') is None
@@ -0,0 +1,175 @@
+import json
+import os
+import socket
+import stat
+import threading
+from StringIO import StringIO
+
+import pytest
+from mock import patch, Mock
+
+import lecli
+from lecli.daemon import api
+from lecli.daemon import client
+
+
+@pytest.fixture
+def server(tmpdir, monkeypatch, request):
+    path = str(tmpdir.join('daemon.sock'))
+    monkeypatch.setenv(client.SOCKET_ENV, path)
+    daemon = api.create_server(path)
+    request.addfinalizer(daemon.server_close)
+    return daemon
+
+
+def _run(daemon, args):
+    thread = threading.Thread(target=daemon.handle_request)
+    thread.start()
+    connection = client.connect()
+    try:
+        messages = list(client.send_command(connection, args, os.getcwd()))
+    finally:
+        connection.close()
+        thread.join()
+    output = dict((kind, ''.join(message[kind] for message in messages if kind in message))
+                  for kind in ('out', 'err'))
+    return messages[-1]['exit'], output['out'], output['err']
+
+
+def test_socket_is_private(server):
+    mode = os.stat(client.socket_path()).st_mode
+    assert stat.S_ISSOCK(mode)
+    assert stat.S_IMODE(mode) & 0o077 == 0
+
+
+def test_daemon_runs_command(server):
+    exit_code, out, err = _run(server, ['--version'])
+
+    assert exit_code == 0
+    assert lecli.__version__ in out
+
+
+def test_daemon_returns_exit_code_and_errors(server):
+    exit_code, out, err = _run(server, ['nosuchcommand'])
+
+    assert exit_code == 2
+    assert 'No such command' in err
+
+
+def test_daemon_does_not_run_daemon(server):
+    exit_code, out, err = _run(server, ['daemon'])
+
+    assert exit_code == 1
+    assert 'cannot run another daemon' in err
+
+
+def test_daemon_reads_prompt_answers_from_client(server, tmpdir):
+    users = tmpdir.join('users.json')
+    users.write('[]')
+    thread = threading.Thread(target=server.handle_request)
+    thread.start()
+    connection = client.connect()
+    messages = []
+    try:
+        for message in client.send_command(connection, ['create', 'users', str(users)],
+                                           os.getcwd()):
+            messages.append(message)
+            if 'read' in message:
+                client.send_input(connection, StringIO('n\n'))
+    finally:
+        connection.close()
+        thread.join()
+
+    assert {'read': True} in messages
+    assert 'Please confirm' in ''.join(message.get('out', '') for message in messages)
+    assert messages[-1] == {'exit': 0}
+
+
+def test_client_stream_notices_disconnected_client():
+    daemon_end, client_end = socket.socketpair()
+    stream = api.ClientStream(daemon_end.makefile('w'), 'out', connection=daemon_end)
+    try:
+        stream.flush()
+        client_end.close()
+
+        with pytest.raises(api.ClientGone):
+            stream.flush()
+    finally:
+        daemon_end.close()
+
+
+def test_client_input_ends_when_client_disconnects():
+    daemon_end, client_end = socket.socketpair()
+    client_end.close()
+    stream = api.ClientInput(daemon_end.makefile('r'), daemon_end.makefile('w'))
+    try:
+        with pytest.raises(api.ClientGone):
+            stream.readline()
+    finally:
+        daemon_end.close()
+
+
+def test_second_daemon_exits(server):
+    with pytest.raises(SystemExit):
+        api.create_server(client.socket_path())
+
+
+def test_daemon_does_not_replace_other_files(tmpdir, capsys):
+    notes = tmpdir.join('notes.txt')
+    notes.write('keep me')
+
+    with pytest.raises(SystemExit):
+        api.create_server(str(notes))
+
+    assert notes.read() == 'keep me'
+    assert 'is not a socket' in capsys.readouterr()[1]
+
+
+def test_daemon_replaces_stale_socket(tmpdir):
+    path = str(tmpdir.join('stale.sock'))
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+
+    daemon = api.create_server(path)
+    try:
+        assert stat.S_ISSOCK(os.stat(path).st_mode)
+    finally:
+        daemon.server_close()
+
+
+@patch('lecli.daemon.client.send_command')
+def test_client_exits_with_exit_code_of_command(mocked_send_command, server, capsys):
+    mocked_send_command.return_value = iter([{'out': u'result\n'}, {'err': u'warning\n'},
+                                             {'exit': 3}])
+
+    with pytest.raises(SystemExit) as exit_info:
+        client.main(['get', 'logs'])
+
+    out, err = capsys.readouterr()
+    assert exit_info.value.code == 3
+    assert out == 'result\n'
+    assert err == 'warning\n'
+
+
+@patch('lecli.daemon.client.send_command')
+@patch('lecli.daemon.client.connect')
+def test_client_sends_its_input_when_asked(mocked_connect, mocked_send_command, monkeypatch):
+    connection = Mock()
+    mocked_connect.return_value = connection
+    mocked_send_command.return_value = iter([{'read': True}, {'exit': 0}])
+    monkeypatch.setattr('sys.stdin', StringIO('y\n'))
+
+    with pytest.raises(SystemExit):
+        client.main(['create', 'users', 'users.csv'])
+
+    connection.sendall.assert_called_once_with(json.dumps({'in': u'y\n'}) + '\n')
+
+
+@patch('lecli.cli.cli.main')
+def test_client_without_daemon_runs_command_itself(mocked_main, tmpdir, monkeypatch):
+    monkeypatch.setenv(client.SOCKET_ENV, str(tmpdir.join('missing.sock')))
+
+    client.main(['get', 'logs'])
+
+    mocked_main.assert_called_once_with(args=['get', 'logs'], prog_name='lecli')
@@ -0,0 +1,40 @@
+from lecli import event_utils
+
+
+def test_event_key_prefers_id_then_sequence_number():
+    assert event_utils.event_key({'id': 'abc', 'sequence_number': 1}) == 'abc'
+    assert event_utils.event_key({'log_id': 'log', 'sequence_number': 1}) == 'log:1'
+
+
+def test_event_key_of_events_without_id_depends_on_message():
+    event = {'timestamp': 1, 'message': u'message \u2713'}
+
+    assert event_utils.event_key(event) == event_utils.event_key(dict(event))
+    assert event_utils.event_key(event) != event_utils.event_key(dict(event, message='other'))
+
+
+def test_seen_events_drops_duplicates():
+    seen_events = event_utils.SeenEvents()
+    events = [{'timestamp': 1, 'message': 'a'}, {'timestamp': 2, 'message': 'b'}]
+
+    assert seen_events.filter(events) == events
+    assert seen_events.filter(events + [{'timestamp': 3, 'message': 'c'}]) == \
+        [{'timestamp': 3, 'message': 'c'}]
+
+
+def test_seen_events_forgets_events_out_of_window():
+    seen_events = event_utils.SeenEvents(window=10)
+    seen_events.add({'timestamp': 1, 'message': 'a'})
+    seen_events.add({'timestamp': 20, 'message': 'b'})
+
+    assert len(seen_events) == 1
+    assert seen_events.add({'timestamp': 1, 'message': 'a'})
+
+
+def test_seen_events_is_bounded():
+    seen_events = event_utils.SeenEvents(max_size=2)
+    for timestamp in range(5):
+        seen_events.add({'timestamp': timestamp, 'message': 'a'})
+
+    assert len(seen_events) == 2
+    assert not seen_events.add({'timestamp': 4, 'message': 'a'})
@@ -0,0 +1,189 @@
+import gzip
+import json
+
+import pytest
+from mock import patch, Mock
+
+from lecli.export import api
+
+MOCK_API_URL = 'http://mydummylink.com'
+LOG_KEYS = ['11111111-1111-1111-1111-111111111111']
+TIME_RANGE = {'from': 1000, 'to': 2000}
+
+
+def _mock_page(body, status_code=200):
+    response = Mock(status_code=status_code, headers={'Content-Type': 'application/json'})
+    response.json.return_value = body
+    return response
+
+
+def _events(*timestamps):
+    return [{'timestamp': timestamp, 'message': 'event %d' % timestamp}
+            for timestamp in timestamps]
+
+
+def _page(events, next_page=None):
+    body = {'events': events}
+    if next_page:
+        body['links'] = [{'rel': 'Next', 'href': MOCK_API_URL + '/' + next_page}]
+    return _mock_page(body)
+
+
+def _exported(directory):
+    lines = []
+    for path in sorted(directory.listdir('events-*')):
+        lines.extend(path.read().splitlines())
+    return [json.loads(line)['timestamp'] for line in lines]
+
+
+def _export(directory, max_file_size=1024, export_format=api.FORMAT_NDJSON):
+    api.export_events(str(directory), LOG_KEYS, 'where(/.*/)', TIME_RANGE, max_file_size,
+                      export_format)
+
+
+@patch('lecli.query.api.fetch_results')
+@patch('lecli.query.api.post_query')
+def test_export_writes_events_and_checkpoint(mocked_post_query, mocked_fetch_results, tmpdir):
+    mocked_post_query.return_value = _page(_events(1000, 1001), '2')
+    mocked_fetch_results.return_value = _page(_events(1002))
+
+    _export(tmpdir)
+
+    assert _exported(tmpdir) == [1000, 1001, 1002]
+    checkpoint = api.load_checkpoint(str(tmpdir))
+    assert checkpoint['complete']
+    assert checkpoint['events'] == 3
+
+
+@patch('lecli.query.api.fetch_results')
+@patch('lecli.query.api.post_query')
+def test_export_rotates_files(mocked_post_query, mocked_fetch_results, tmpdir):
+    mocked_post_query.return_value = _page(_events(1000, 1001, 1002))
+
+    _export(tmpdir, max_file_size=80)
+
+    assert len(tmpdir.listdir('events-*')) == 3
+    assert _exported(tmpdir) == [1000, 1001, 1002]
+
+
+@patch('lecli.query.api.fetch_results')
+@patch('lecli.query.api.post_query')
+def test_export_resumes_from_next_page_link(mocked_post_query, mocked_fetch_results, tmpdir):
+    mocked_post_query.return_value = _page(_events(1000, 1001), '2')
+    mocked_fetch_results.side_effect = SystemExit(1)
+    with pytest.raises(SystemExit):
+        _export(tmpdir)
+    # events written after the last checkpoint are dropped on resume
+    tmpdir.join('events-00001.ndjson').write('{"timestamp": 9999}\n', mode='a')
+
+    mocked_fetch_results.side_effect = None
+    mocked_fetch_results.return_value = _page(_events(1002))
+    _export(tmpdir)
+
+    assert mocked_post_query.call_count == 1
+    mocked_fetch_results.assert_called_with(MOCK_API_URL + '/2')
+    assert _exported(tmpdir) == [1000, 1001, 1002]
+
+
+@patch('lecli.query.api.fetch_results')
+@patch('lecli.query.api.post_query')
+def test_export_queries_again_when_link_expired(mocked_post_query, mocked_fetch_results,
+                                                tmpdir):
+    mocked_post_query.return_value = _page(_events(1000, 1001), '2')
+    mocked_fetch_results.side_effect = SystemExit(1)
+    with pytest.raises(SystemExit):
+        _export(tmpdir)
+
+    mocked_fetch_results.side_effect = None
+    mocked_fetch_results.return_value = _mock_page({}, 404)
+    mocked_post_query.return_value = _page(_events(1001, 1002))
+    _export(tmpdir)
+
+    assert mocked_post_query.call_args[0][2] == {'from': 1001, 'to': 2000}
+    assert _exported(tmpdir) == [1000, 1001, 1002]
+
+
+@patch('lecli.query.api.post_query')
+def test_export_refuses_directory_of_another_query(mocked_post_query, tmpdir):
+    mocked_post_query.return_value = _page(_events(1000))
+    _export(tmpdir)
+
+    with pytest.raises(SystemExit):
+        api.export_events(str(tmpdir), LOG_KEYS, 'where(status=500)', TIME_RANGE, 1024)
+
+
+@patch('lecli.export.api.CHUNK_SIZE', 100)
+@patch('lecli.query.api.fetch_results')
+@patch('lecli.query.api.post_query')
+def test_gzip_export_writes_indexed_chunks(mocked_post_query, mocked_fetch_results, tmpdir):
+    mocked_post_query.return_value = _page(_events(1000, 1001, 1002), '2')
+    mocked_fetch_results.return_value = _page(_events(1003))
+
+    _export(tmpdir, export_format=api.FORMAT_GZIP)
+
+    chunks = [json.loads(line) for line in tmpdir.join('events-00001.index').readlines()]
+    assert [(chunk['from'], chunk['to'], chunk['events']) for chunk in chunks] == \
+        [(1000, 1002, 3), (1003, 1003, 1)]
+    with gzip.open(str(tmpdir.join('events-00001.ndjson.gz'))) as events_file:
+        assert [json.loads(line)['timestamp'] for line in events_file] == [1000, 1001, 1002, 1003]
+
+
+@patch('lecli.query.api.fetch_results')
+@patch('lecli.query.api.post_query')
+def test_gzip_export_checkpoints_only_written_chunks(mocked_post_query, mocked_fetch_results,
+                                                     tmpdir):
+    mocked_post_query.return_value = _page(_events(1000, 1001), '2')
+    mocked_fetch_results.side_effect = SystemExit(1)
+    with pytest.raises(SystemExit):
+        _export(tmpdir, export_format=api.FORMAT_GZIP)
+
+    assert api.load_checkpoint(str(tmpdir)) is None
+
+
+def test_gzip_files_resumed_at_max_size_rotate_before_next_chunk(tmpdir):
+    files = api.GzipEventFiles(str(tmpdir), 10)
+    files.write(_events(1000, 1001))
+    files.commit(final=True)
+    checkpoint = files.position()
+    files.close()
+    assert checkpoint['file_size'] >= 10
+
+    files = api.GzipEventFiles(str(tmpdir), 10, checkpoint)
+    files.write(_events(1002))
+    files.commit(final=True)
+    files.close()
+
+    assert len(tmpdir.join('events-00001.index').readlines()) == 1
+    with gzip.open(str(tmpdir.join('events-00002.ndjson.gz'))) as events_file:
+        assert [json.loads(line)['timestamp'] for line in events_file] == [1002]
+
+
+@patch('lecli.export.api.CHUNK_SIZE', 1)
+@patch('lecli.query.api.fetch_results')
+@patch('lecli.query.api.post_query')
+def test_read_gzip_export_decompresses_only_chunks_in_range(mocked_post_query,
+                                                              mocked_fetch_results, tmpdir,
+                                                              capsys):
+    mocked_post_query.return_value = _page(_events(1000, 1001), '2')
+    mocked_fetch_results.return_value = _page(_events(1500, 1600))
+    _export(tmpdir, export_format=api.FORMAT_GZIP)
+    capsys.readouterr()
+
+    with patch('zlib.decompress', wraps=api.zlib.decompress) as mocked_decompress:
+        api.read_export(str(tmpdir), 1550, 2000, 'ndjson')
+
+    out, err = capsys.readouterr()
+    assert [json.loads(line)['timestamp'] for line in out.splitlines()] == [1600]
+    assert mocked_decompress.call_count == 1
+
+
+@patch('lecli.query.api.post_query')
+def test_read_ndjson_export(mocked_post_query, tmpdir, capsys):
+    mocked_post_query.return_value = _page(_events(1000, 1001, 1002))
+    _export(tmpdir)
+    capsys.readouterr()
+
+    api.read_export(str(tmpdir), None, 1001, 'ndjson')
+
+    out, err = capsys.readouterr()
+    assert [json.loads(line)['timestamp'] for line in out.splitlines()] == [1000, 1001]
@@ -0,0 +1,77 @@
+import pytest
+
+from lecli import cache_utils
+from lecli import inventory_utils
+
+LOG_ID = '11111111-1111-1111-1111-111111111111'
+OTHER_LOG_ID = '22222222-2222-2222-2222-222222222222'
+LOGSET_ID = '33333333-3333-3333-3333-333333333333'
+LOGS_RESPONSE = {
+    'logs': [
+        {'id': LOG_ID, 'name': 'Web Access', 'logsets_info': [{'id': LOGSET_ID}]},
+        {'id': OTHER_LOG_ID, 'name': 'Web Errors', 'logsets_info': []},
+    ]
+}
+
+
+def test_lookup_without_inventory():
+    assert inventory_utils.lookup(inventory_utils.LOGS, 'web access') is None
+
+
+def test_record_list_replaces_inventory():
+    inventory_utils.record(inventory_utils.LOGS, {'log': {'id': 'stale', 'name': 'Stale'}})
+    inventory_utils.record(inventory_utils.LOGS, LOGS_RESPONSE)
+
+    inventory = cache_utils.load(inventory_utils.INVENTORY_CACHE)
+    assert sorted(inventory['logs']) == [LOG_ID, OTHER_LOG_ID]
+    assert inventory['logs'][LOG_ID] == {'name': 'Web Access', 'logsets': [LOGSET_ID]}
+
+
+def test_record_single_resource_updates_inventory():
+    inventory_utils.record(inventory_utils.LOGS, LOGS_RESPONSE)
+    inventory_utils.record(inventory_utils.LOGS, {'log': {'id': LOG_ID, 'name': 'Renamed'}})
+
+    assert inventory_utils.lookup(inventory_utils.LOGS, 'renamed') == [LOG_ID]
+    assert inventory_utils.lookup(inventory_utils.LOGS, 'web access') == []
+
+
+def test_lookup_by_exact_name_and_prefix():
+    inventory_utils.record(inventory_utils.LOGS, LOGS_RESPONSE)
+
+    assert inventory_utils.lookup(inventory_utils.LOGS, 'WEB ACCESS') == [LOG_ID]
+    assert inventory_utils.lookup(inventory_utils.LOGS, 'web e') == [OTHER_LOG_ID]
+    assert sorted(inventory_utils.lookup(inventory_utils.LOGS, 'web')) == [LOG_ID, OTHER_LOG_ID]
+
+
+def test_remove():
+    inventory_utils.record(inventory_utils.LOGS, LOGS_RESPONSE)
+    inventory_utils.remove(inventory_utils.LOGS, LOG_ID)
+
+    assert inventory_utils.lookup(inventory_utils.LOGS, 'web') == [OTHER_LOG_ID]
+
+
+def test_resolve_name(capsys):
+    inventory_utils.record(inventory_utils.LOGS, LOGS_RESPONSE)
+
+    assert inventory_utils.resolve(inventory_utils.LOGS, 'web access') == LOG_ID
+    assert inventory_utils.resolve_logs_callback(None, None, ('web e', LOG_ID)) == \
+        (OTHER_LOG_ID, LOG_ID)
+    out, err = capsys.readouterr()
+    assert not err
+
+
+def test_resolve_unknown_name_is_kept(capsys):
+    inventory_utils.record(inventory_utils.LOGSETS, {'logsets': []})
+
+    assert inventory_utils.resolve(inventory_utils.LOGSETS, 'unknown') == 'unknown'
+    out, err = capsys.readouterr()
+    assert "lecli get logsets" in err
+
+
+def test_resolve_ambiguous_name_exits(capsys):
+    inventory_utils.record(inventory_utils.LOGS, LOGS_RESPONSE)
+
+    with pytest.raises(SystemExit):
+        inventory_utils.resolve(inventory_utils.LOGS, 'web')
+    out, err = capsys.readouterr()
+    assert 'ambiguous' in err
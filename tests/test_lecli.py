@@ -7,12 +7,22 @@ from mock import patch
 from mock import MagicMock
 
 from lecli import cli
+from lecli.api_key import commands as api_key_commands
+from lecli.batch import commands as batch_commands
+from lecli.export import commands as export_commands
+from lecli.log import commands as log_commands
+from lecli.logset import commands as logset_commands
+from lecli.query import commands as query_commands
+from lecli.saved_query import commands as saved_query_commands
+from lecli.team import commands as team_commands
+from lecli.usage import commands as usage_commands
+from lecli.user import commands as user_commands
 
 
 @patch('lecli.user.api.get_owner')
 def test_get_owner(mocked_get_owner):
     runner = CliRunner()
-    runner.invoke(cli.user_commands.get_owner)
+    runner.invoke(user_commands.get_owner)
 
     mocked_get_owner.assert_called_once_with()
 
@@ -20,12 +30,12 @@ def test_get_owner(mocked_get_owner):
 @patch('lecli.user.api.delete_user')
 def test_userdel(mocked_delete_user):
     runner = CliRunner()
-    result = runner.invoke(cli.user_commands.delete_user, input=None)
+    result = runner.invoke(user_commands.delete_user, input=None)
 
     assert result.output == "Example usage: lecli delete user -u 12345678-aaaa-bbbb-1234-1234cb123456\n"
 
     user_key = str(uuid.uuid4())
-    runner.invoke(cli.user_commands.delete_user, ['-u', user_key])
+    runner.invoke(user_commands.delete_user, ['-u', user_key])
     mocked_delete_user.assert_called_once_with(user_key)
 
 
@@ -36,21 +46,21 @@ def test_useradd(mocked_add_new_user):
     email = "email"
 
     runner = CliRunner()
-    runner.invoke(cli.user_commands.create_user, ['-f', first, '-l', last, '-e', email], input='y')
+    runner.invoke(user_commands.create_user, ['-f', first, '-l', last, '-e', email], input='y')
     mocked_add_new_user.assert_called_once_with(first, last, email)
 
 
 @patch('lecli.user.api.list_users')
 def test_userlist(mocked_list_users):
     runner = CliRunner()
-    runner.invoke(cli.user_commands.get_users)
+    runner.invoke(user_commands.get_users)
     mocked_list_users.assert_called_once_with()
 
 
 @patch('lecli.query.api.query')
 def test_recentevents(mocked_query):
     runner = CliRunner()
-    runner.invoke(cli.query_commands.get_recent_events, ['test'])
+    runner.invoke(query_commands.get_recent_events, ['test'])
 
     assert mocked_query.called
 
@@ -58,7 +68,7 @@ def test_recentevents(mocked_query):
 @patch('lecli.query.api.query')
 def test_recentevents_with_saved_query(mocked_query):
     runner = CliRunner()
-    runner.invoke(cli.query_commands.get_recent_events, ['test', '-s', str(uuid.uuid4())])
+    runner.invoke(query_commands.get_recent_events, ['test', '-s', str(uuid.uuid4())])
 
     assert mocked_query.called
 
@@ -66,7 +76,7 @@ def test_recentevents_with_saved_query(mocked_query):
 @patch('lecli.query.api.query')
 def test_recentevents_with_relative_range(mocked_query):
     runner = CliRunner()
-    runner.invoke(cli.query_commands.get_recent_events, ['test', '-r', 'last 3 min'])
+    runner.invoke(query_commands.get_recent_events, ['test', '-r', 'last 3 min'])
 
     assert mocked_query.called
 
@@ -74,7 +84,7 @@ def test_recentevents_with_relative_range(mocked_query):
 @patch('lecli.query.api.query')
 def test_events(mocked_query):
     runner = CliRunner()
-    runner.invoke(cli.query_commands.get_events, ['', '-f', int(time.time()), '-t', int(time.time())])
+    runner.invoke(query_commands.get_events, ['', '-f', int(time.time()), '-t', int(time.time())])
 
     assert mocked_query.called
 
@@ -82,7 +92,7 @@ def test_events(mocked_query):
 @patch('lecli.query.api.query')
 def test_events_with_relative_range(mocked_query):
     runner = CliRunner()
-    runner.invoke(cli.query_commands.get_events, ['', '-r', 'last 3 min'])
+    runner.invoke(query_commands.get_events, ['', '-r', 'last 3 min'])
 
     assert mocked_query.called
 
@@ -90,7 +100,7 @@ def test_events_with_relative_range(mocked_query):
 @patch('lecli.query.api.query')
 def test_events_with_saved_query(mocked_query):
     runner = CliRunner()
-    runner.invoke(cli.query_commands.get_events, ['123123123', '-s', str(uuid.uuid4())])
+    runner.invoke(query_commands.get_events, ['123123123', '-s', str(uuid.uuid4())])
 
     assert mocked_query.called
 
@@ -98,7 +108,7 @@ def test_events_with_saved_query(mocked_query):
 @patch('lecli.query.api.tail_logs')
 def test_live_tail(mocked_tail_logs):
     runner = CliRunner()
-    runner.invoke(cli.query_commands.tail_events, [str(uuid.uuid4())])
+    runner.invoke(query_commands.tail_events, [str(uuid.uuid4())])
 
     assert mocked_tail_logs.called
 
@@ -106,15 +116,26 @@ def test_live_tail(mocked_tail_logs):
 @patch('lecli.query.api.tail_logs')
 def test_live_tail_with_saved_query(mocked_tail_logs):
     runner = CliRunner()
-    runner.invoke(cli.query_commands.tail_events, ['', '-s', str(uuid.uuid4())])
+    runner.invoke(query_commands.tail_events, ['', '-s', str(uuid.uuid4())])
 
     assert mocked_tail_logs.called
 
 
+@patch('lecli.query.api.tail_many')
+@patch('lecli.query.api.tail_logs')
+def test_live_tail_with_many_logsets(mocked_tail_logs, mocked_tail_many):
+    runner = CliRunner()
+    first_logset, second_logset = str(uuid.uuid4()), str(uuid.uuid4())
+    runner.invoke(query_commands.tail_events, ['-g', first_logset, '-g', second_logset])
+
+    assert not mocked_tail_logs.called
+    assert mocked_tail_many.call_args[0][4] == (first_logset, second_logset)
+
+
 @patch('lecli.query.api.query')
 def test_query(mocked_post_query):
     runner = CliRunner()
-    runner.invoke(cli.query_commands.query, [str(uuid.uuid4()), '-l', 'where(event)', '-f',
+    runner.invoke(query_commands.query, [str(uuid.uuid4()), '-l', 'where(event)', '-f',
                                              int(time.time()), '-t', int(time.time())])
     assert mocked_post_query.called
 
@@ -122,7 +143,7 @@ def test_query(mocked_post_query):
 @patch('lecli.query.api.query')
 def test_query_with_relative_range(mocked_post_query):
     runner = CliRunner()
-    runner.invoke(cli.query_commands.query, ['', '-l', '', '-r', 'last 3 min'])
+    runner.invoke(query_commands.query, ['', '-l', '', '-r', 'last 3 min'])
 
     assert mocked_post_query.called
 
@@ -130,15 +151,48 @@ def test_query_with_relative_range(mocked_post_query):
 @patch('lecli.query.api.query')
 def test_query_with_saved_query(mocked_post_query):
     runner = CliRunner()
-    runner.invoke(cli.query_commands.query, ['', '-s', str(uuid.uuid4())])
+    runner.invoke(query_commands.query, ['', '-s', str(uuid.uuid4())])
 
     assert mocked_post_query.called
 
 
+@patch('lecli.query.api.query')
+def test_query_with_parallel(mocked_post_query):
+    runner = CliRunner()
+    runner.invoke(query_commands.query, ['', '-l', 'where(event)', '-f', 1000, '-t', 2000,
+                                             '-p', 4])
+
+    assert mocked_post_query.call_args[1]['parallel'] == 4
+
+
+@patch('lecli.query.api.query')
+def test_events_with_ndjson_output(mocked_query):
+    runner = CliRunner()
+    runner.invoke(query_commands.get_events, ['', '-r', 'last 3 min', '-o', 'ndjson'])
+
+    assert mocked_query.call_args[1]['output'] == 'ndjson'
+
+
+@patch('lecli.query.api.query')
+def test_events_with_dedup(mocked_query):
+    runner = CliRunner()
+    runner.invoke(query_commands.get_events, ['', '-r', 'last 3 min', '--dedup'])
+
+    assert mocked_query.call_args[1]['dedup'] is True
+
+
+@patch('lecli.query.api.tail_logs')
+def test_live_tail_with_dedup(mocked_tail_logs):
+    runner = CliRunner()
+    runner.invoke(query_commands.tail_events, [str(uuid.uuid4()), '--dedup'])
+
+    assert mocked_tail_logs.call_args[0][-1] is True
+
+
 @patch('lecli.team.api.get_teams')
 def test_get_teams(mocked_get_teams):
     runner = CliRunner()
-    runner.invoke(cli.team_commands.get_teams)
+    runner.invoke(team_commands.get_teams)
 
     assert mocked_get_teams.called
 
@@ -146,7 +200,7 @@ def test_get_teams(mocked_get_teams):
 @patch('lecli.team.api.get_team')
 def test_get_team(mocked_get_team):
     runner = CliRunner()
-    runner.invoke(cli.team_commands.get_team, [str(uuid.uuid4())])
+    runner.invoke(team_commands.get_team, [str(uuid.uuid4())])
 
     assert mocked_get_team.called
 
@@ -154,7 +208,7 @@ def test_get_team(mocked_get_team):
 @patch('lecli.team.api.create_team')
 def test_create_team(mocked_create_team):
     runner = CliRunner()
-    runner.invoke(cli.team_commands.create_team, ["test_team_name"])
+    runner.invoke(team_commands.create_team, ["test_team_name"])
 
     assert mocked_create_team.called
 
@@ -162,7 +216,7 @@ def test_create_team(mocked_create_team):
 @patch('lecli.team.api.delete_team')
 def test_delete_team(mocked_delete_team):
     runner = CliRunner()
-    runner.invoke(cli.team_commands.delete_team, [str(uuid.uuid4())])
+    runner.invoke(team_commands.delete_team, [str(uuid.uuid4())])
 
     assert mocked_delete_team.called
 
@@ -170,7 +224,7 @@ def test_delete_team(mocked_delete_team):
 @patch('lecli.team.api.rename_team')
 def test_rename_team(mocked_rename_team):
     runner = CliRunner()
-    runner.invoke(cli.team_commands.rename_team, [str(uuid.uuid4()), "new_name"])
+    runner.invoke(team_commands.rename_team, [str(uuid.uuid4()), "new_name"])
 
     assert mocked_rename_team.called
 
@@ -178,7 +232,7 @@ def test_rename_team(mocked_rename_team):
 @patch('lecli.team.api.add_user_to_team')
 def test_add_user_to_team(mocked_add_user):
     runner = CliRunner()
-    runner.invoke(cli.team_commands.addusertoteam, [str(uuid.uuid4()), "test_user_name"])
+    runner.invoke(team_commands.addusertoteam, [str(uuid.uuid4()), "test_user_name"])
 
     assert mocked_add_user.called
 
@@ -186,7 +240,7 @@ def test_add_user_to_team(mocked_add_user):
 @patch('lecli.usage.api.get_usage')
 def test_add_user_to_team(mocked_get_usage):
     runner = CliRunner()
-    runner.invoke(cli.usage_commands.get_usage, ['-s', 'start', '-e', 'end'])
+    runner.invoke(usage_commands.get_usage, ['-s', 'start', '-e', 'end'])
 
     assert mocked_get_usage.called
 
@@ -194,7 +248,7 @@ def test_add_user_to_team(mocked_get_usage):
 @patch('lecli.saved_query.api.create_saved_query')
 def test_create_saved_query(mocked_create_saved_query):
     runner = CliRunner()
-    runner.invoke(cli.saved_query_commands.create_saved_query, ['new_saved_query', 'where(/*/)', '-f', 10, '-t', 1000])
+    runner.invoke(saved_query_commands.create_saved_query, ['new_saved_query', 'where(/*/)', '-f', 10, '-t', 1000])
 
     assert mocked_create_saved_query.called
 
@@ -202,7 +256,7 @@ def test_create_saved_query(mocked_create_saved_query):
 @patch('lecli.saved_query.api.create_saved_query')
 def test_create_query_with_missing_statement(mocked_create_saved_query):
     runner = CliRunner()
-    runner.invoke(cli.saved_query_commands.create_saved_query, ['new_saved_query', '-f', 10, '-t', 1000])
+    runner.invoke(saved_query_commands.create_saved_query, ['new_saved_query', '-f', 10, '-t', 1000])
 
     assert not mocked_create_saved_query.called
 
@@ -210,7 +264,7 @@ def test_create_query_with_missing_statement(mocked_create_saved_query):
 @patch('lecli.saved_query.api.update_saved_query')
 def test_update_saved_query(mocked_update_saved_query):
     runner = CliRunner()
-    runner.invoke(cli.saved_query_commands.update_saved_query, ['123456789012345678901234567890123456', '-f', 10, '-t',
+    runner.invoke(saved_query_commands.update_saved_query, ['123456789012345678901234567890123456', '-f', 10, '-t',
                                          1000])
 
     assert mocked_update_saved_query.called
@@ -219,7 +273,7 @@ def test_update_saved_query(mocked_update_saved_query):
 @patch('lecli.saved_query.api.update_saved_query')
 def test_failing_update_saved_query(mocked_create_saved_query):
     runner = CliRunner()
-    runner.invoke(cli.saved_query_commands.create_saved_query, ['-f', 10, '-t', 1000])
+    runner.invoke(saved_query_commands.create_saved_query, ['-f', 10, '-t', 1000])
 
     assert not mocked_create_saved_query.called
 
@@ -227,7 +281,7 @@ def test_failing_update_saved_query(mocked_create_saved_query):
 @patch('lecli.saved_query.api.get_saved_query')
 def test_get_saved_query(mocked_get_saved_query):
     runner = CliRunner()
-    runner.invoke(cli.saved_query_commands.get_saved_query, ['123456789012345678901234567890123456'])
+    runner.invoke(saved_query_commands.get_saved_query, ['123456789012345678901234567890123456'])
 
     assert mocked_get_saved_query.called
 
@@ -235,7 +289,7 @@ def test_get_saved_query(mocked_get_saved_query):
 @patch('lecli.saved_query.api.get_saved_query')
 def test_get_saved_queries(mocked_get_saved_queries):
     runner = CliRunner()
-    runner.invoke(cli.saved_query_commands.get_saved_queries)
+    runner.invoke(saved_query_commands.get_saved_queries)
 
     assert mocked_get_saved_queries.called
 
@@ -243,7 +297,7 @@ def test_get_saved_queries(mocked_get_saved_queries):
 @patch('lecli.saved_query.api.get_saved_query')
 def test_get_saved_query(mocked_get_saved_query):
     runner = CliRunner()
-    runner.invoke(cli.saved_query_commands.get_saved_query, ['12341234'])
+    runner.invoke(saved_query_commands.get_saved_query, ['12341234'])
 
     assert mocked_get_saved_query.called
 
@@ -251,7 +305,7 @@ def test_get_saved_query(mocked_get_saved_query):
 @patch('lecli.saved_query.api.delete_saved_query')
 def test_delete_saved_query(mocked_delete_saved_query):
     runner = CliRunner()
-    runner.invoke(cli.saved_query_commands.delete_saved_query, ['123456789012345678901234567890123456'])
+    runner.invoke(saved_query_commands.delete_saved_query, ['123456789012345678901234567890123456'])
 
     assert mocked_delete_saved_query.called
 
@@ -259,7 +313,7 @@ def test_delete_saved_query(mocked_delete_saved_query):
 @patch('lecli.saved_query.api.delete_saved_query')
 def test_delete_saved_query_without_id(mocked_delete_saved_query):
     runner = CliRunner()
-    runner.invoke(cli.saved_query_commands.delete_saved_query)
+    runner.invoke(saved_query_commands.delete_saved_query)
 
     assert not mocked_delete_saved_query.called
 
@@ -267,7 +321,7 @@ def test_delete_saved_query_without_id(mocked_delete_saved_query):
 @patch('lecli.log.api.get_logs')
 def test_get_logs(mocked_get_logs):
     runner = CliRunner()
-    runner.invoke(cli.log_commands.getlogs)
+    runner.invoke(log_commands.getlogs)
 
     mocked_get_logs.assert_called_once()
 
@@ -275,7 +329,7 @@ def test_get_logs(mocked_get_logs):
 @patch('lecli.log.api.get_log')
 def test_get_log(mocked_get_log):
     runner = CliRunner()
-    runner.invoke(cli.log_commands.getlog, ['123'])
+    runner.invoke(log_commands.getlog, ['123'])
 
     mocked_get_log.assert_called_once_with('123')
 
@@ -283,7 +337,7 @@ def test_get_log(mocked_get_log):
 @patch('lecli.log.api.create_log')
 def test_create_log(mocked_create_log):
     runner = CliRunner()
-    runner.invoke(cli.log_commands.createlog, ['-n', 'new log'])
+    runner.invoke(log_commands.createlog, ['-n', 'new log'])
 
     mocked_create_log.assert_called_once_with('new log', None)
 
@@ -291,7 +345,7 @@ def test_create_log(mocked_create_log):
 @patch('lecli.log.api.delete_log')
 def test_delete_log(mocked_delete_log):
     runner = CliRunner()
-    runner.invoke(cli.log_commands.deletelog, ['123'])
+    runner.invoke(log_commands.deletelog, ['123'])
 
     mocked_delete_log.assert_called_once_with('123')
 
@@ -299,7 +353,7 @@ def test_delete_log(mocked_delete_log):
 @patch('lecli.log.api.rename_log')
 def test_rename_log(mocked_rename_log):
     runner = CliRunner()
-    runner.invoke(cli.log_commands.renamelog, ['123', 'new name'])
+    runner.invoke(log_commands.renamelog, ['123', 'new name'])
 
     mocked_rename_log.assert_called_once_with('123', 'new name')
 
@@ -310,7 +364,7 @@ def test_replace_log(mocked_replace_log):
     with open('file.json', 'w') as f:
         f.write('{"log": {"id": "ba2b371a-87fa-40ee-97fd-e9b0d2424b2f","name": "new_log"}}')
 
-    runner.invoke(cli.log_commands.replacelog, ['1234', 'file.json'])
+    runner.invoke(log_commands.replacelog, ['1234', 'file.json'])
 
     mocked_replace_log.assert_called_once()
     try:
@@ -324,7 +378,7 @@ def test_replace_log(mocked_replace_log):
 @patch('os.path.isfile', MagicMock(return_value=False))
 def test_non_existant_file(mocked_create_log):
     runner = CliRunner()
-    runner.invoke(cli.log_commands.createlog, ['123', 'non_existant_file.json'])
+    runner.invoke(log_commands.createlog, ['123', 'non_existant_file.json'])
 
     assert not mocked_create_log.called
 
@@ -334,7 +388,7 @@ def test_non_existant_file(mocked_create_log):
 @patch('os.path.isfile', MagicMock(return_value=False))
 def test_not_a_file(mocked_create_log):
     runner = CliRunner()
-    runner.invoke(cli.log_commands.createlog, ['123', 'not_a_file'])
+    runner.invoke(log_commands.createlog, ['123', 'not_a_file'])
 
     assert not mocked_create_log.called
 
@@ -342,7 +396,7 @@ def test_not_a_file(mocked_create_log):
 @patch('lecli.logset.api.get_logsets')
 def test_get_logsets(mocked_get_logsets):
     runner = CliRunner()
-    runner.invoke(cli.logset_commands.getlogsets)
+    runner.invoke(logset_commands.getlogsets)
 
     mocked_get_logsets.assert_called_once()
 
@@ -350,7 +404,7 @@ def test_get_logsets(mocked_get_logsets):
 @patch('lecli.logset.api.get_logset')
 def test_get_logset(mocked_get_logset):
     runner = CliRunner()
-    runner.invoke(cli.logset_commands.getlogset, ['1234'])
+    runner.invoke(logset_commands.getlogset, ['1234'])
 
     mocked_get_logset.assert_called_once_with('1234')
 
@@ -358,7 +412,7 @@ def test_get_logset(mocked_get_logset):
 @patch('lecli.logset.api.create_logset')
 def test_create_logset_with_name(mocked_create_logset):
     runner = CliRunner()
-    runner.invoke(cli.logset_commands.createlogset, ['-n', 'Test Logset'])
+    runner.invoke(logset_commands.createlogset, ['-n', 'Test Logset'])
 
     mocked_create_logset.assert_called_once_with('Test Logset', None)
 
@@ -366,7 +420,7 @@ def test_create_logset_with_name(mocked_create_logset):
 @patch('lecli.logset.api.rename_logset')
 def test_rename_logset(mocked_rename_logset):
     runner = CliRunner()
-    runner.invoke(cli.logset_commands.renamelogset, ['123', 'new_name'])
+    runner.invoke(logset_commands.renamelogset, ['123', 'new_name'])
 
     mocked_rename_logset.assert_called_once_with('123', 'new_name')
 
@@ -374,7 +428,7 @@ def test_rename_logset(mocked_rename_logset):
 @patch('lecli.logset.api.add_log')
 def test_add_log_to_logset(mocked_add_log_to_logset):
     runner = CliRunner()
-    runner.invoke(cli.logset_commands.updatelogset, ['add_log','123', 'abc'])
+    runner.invoke(logset_commands.updatelogset, ['add_log','123', 'abc'])
 
     mocked_add_log_to_logset.assert_called_once_with('123', 'abc')
 
@@ -382,7 +436,7 @@ def test_add_log_to_logset(mocked_add_log_to_logset):
 @patch('lecli.logset.api.delete_log')
 def test_remove_log_from_logset(mocked_delete_log_from_logset):
     runner = CliRunner()
-    runner.invoke(cli.logset_commands.updatelogset, ['delete_log','123', 'abc'])
+    runner.invoke(logset_commands.updatelogset, ['delete_log','123', 'abc'])
 
     mocked_delete_log_from_logset.assert_called_once_with('123', 'abc')
 
@@ -390,7 +444,7 @@ def test_remove_log_from_logset(mocked_delete_log_from_logset):
 @patch('lecli.logset.api.delete_logset')
 def test_delete_logset(mocked_delete_logset):
     runner = CliRunner()
-    runner.invoke(cli.logset_commands.deletelogset, ['123'])
+    runner.invoke(logset_commands.deletelogset, ['123'])
 
     mocked_delete_logset.assert_called_once_with('123')
 
@@ -401,7 +455,7 @@ def test_replace_logset(mocked_replace_logset):
     with open('logset.json', 'w') as f:
         f.write('{"logset": {"id": "ba2b371a-87fa-40ee-97fd-e9b0d2424b2f","name": "new logset"}}')
 
-    runner.invoke(cli.logset_commands.replacelogset, ['1234', 'logset.json'])
+    runner.invoke(logset_commands.replacelogset, ['1234', 'logset.json'])
 
     mocked_replace_logset.assert_called_once()
     try:
@@ -416,7 +470,7 @@ def test_create_apikey(mocked_create_apikey):
     with open('file.json', 'w') as f:
         f.write('{"test": {"key": "value"}}')
 
-    runner.invoke(cli.api_key_commands.create_api_key, ['file.json'])
+    runner.invoke(api_key_commands.create_api_key, ['file.json'])
     mocked_create_apikey.assert_called_once()
     try:
         os.remove('file.json')
@@ -427,7 +481,7 @@ def test_create_apikey(mocked_create_apikey):
 @patch('lecli.api_key.api.delete')
 def test_delete_apikey(mocked_delete_apikey):
     runner = CliRunner()
-    runner.invoke(cli.api_key_commands.delete_api_key, ['123'])
+    runner.invoke(api_key_commands.delete_api_key, ['123'])
 
     mocked_delete_apikey.assert_called_once_with('123')
 
@@ -435,7 +489,7 @@ def test_delete_apikey(mocked_delete_apikey):
 @patch('lecli.api_key.api.update')
 def test_enable_apikey(mocked_update_apikey):
     runner = CliRunner()
-    runner.invoke(cli.api_key_commands.update_api_key, ['123', '--enable'])
+    runner.invoke(api_key_commands.update_api_key, ['123', '--enable'])
 
     mocked_update_apikey.assert_called_once_with('123', True)
 
@@ -443,6 +497,78 @@ def test_enable_apikey(mocked_update_apikey):
 @patch('lecli.api_key.api.update')
 def test_disable_apikey(mocked_update_apikey):
     runner = CliRunner()
-    runner.invoke(cli.api_key_commands.update_api_key, ['123', '--disable'])
+    runner.invoke(api_key_commands.update_api_key, ['123', '--disable'])
 
     mocked_update_apikey.assert_called_once_with('123', False)
+
+
+def test_lazy_group_lists_commands():
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, ['get', '--help'])
+
+    assert 'recentevents' in result.output
+    assert 'savedqueries' in result.output
+
+
+def test_lazy_group_resolves_commands():
+    assert cli.get.get_command(None, 'events') is query_commands.get_events
+    assert cli.tail.get_command(None, 'events') is query_commands.tail_events
+    assert cli.cli.get_command(None, 'query') is query_commands.query
+    assert cli.get.get_command(None, 'unknown') is None
+
+
+@patch('lecli.batch.api.run_batch')
+def test_batch(mocked_run_batch, tmpdir):
+    batch_file = tmpdir.join('batch.json')
+    batch_file.write('[]')
+    mocked_run_batch.return_value = True
+
+    runner = CliRunner()
+    result = runner.invoke(batch_commands.batch, [str(batch_file), '-w', '4'])
+
+    mocked_run_batch.assert_called_once_with(str(batch_file), 4)
+    assert result.exit_code == 0
+
+
+@patch('lecli.user.api.import_users')
+def test_import_users(mocked_import_users, tmpdir):
+    users_file = tmpdir.join('users.csv')
+    users_file.write('first_name,last_name,email\n')
+    mocked_import_users.return_value = False
+
+    runner = CliRunner()
+    result = runner.invoke(user_commands.import_users, [str(users_file), '--force', '-w', '8'])
+
+    mocked_import_users.assert_called_once_with(str(users_file), 8)
+    assert result.exit_code == 1
+
+
+@patch('lecli.export.api.export')
+def test_export(mocked_export):
+    log_key = str(uuid.uuid4())
+    runner = CliRunner()
+    runner.invoke(export_commands.export, [log_key, '-d', 'out', '-f', '1465370400',
+                                           '-t', '1465456800'])
+
+    mocked_export.assert_called_once_with('out', (log_key,), None, None, None,
+                                          {'from': 1465370400000, 'to': 1465456800000}, 100,
+                                          True, 'ndjson')
+
+
+@patch('lecli.export.api.read_export')
+def test_get_exported_events(mocked_read_export, tmpdir):
+    runner = CliRunner()
+    runner.invoke(export_commands.get_exported_events, [str(tmpdir), '-f', '1465370400',
+                                                        '-o', 'ndjson'])
+
+    mocked_read_export.assert_called_once_with(str(tmpdir), 1465370400000, None, 'ndjson')
+
+
+@patch('lecli.export.api.export')
+def test_export_needs_absolute_time_range(mocked_export):
+    runner = CliRunner()
+    result = runner.invoke(export_commands.export, [str(uuid.uuid4()), '-d', 'out',
+                                                    '-f', '1465370400'])
+
+    assert not mocked_export.called
+    assert 'Exports need both start and end' in result.output
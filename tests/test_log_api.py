@@ -6,6 +6,7 @@ import pytest
 
 from mock import patch
 
+from lecli import inventory_utils
 from lecli.log import api
 
 ID_WITH_VALID_LENGTH = str(uuid.uuid4())
@@ -77,6 +78,26 @@ def test_get_log(mocked_url, mocked_ro_apikey, capsys):
     assert not err
 
 
+@httpretty.activate
+@patch('lecli.api_utils.get_rw_apikey')
+@patch('lecli.api_utils.get_ro_apikey')
+@patch('lecli.log.api._url')
+def test_get_and_delete_log_update_inventory(mocked_url, mocked_ro_apikey, mocked_rw_apikey):
+    mocked_url.return_value = '', MOCK_API_URL
+    mocked_ro_apikey.return_value = ID_WITH_VALID_LENGTH
+    mocked_rw_apikey.return_value = ID_WITH_VALID_LENGTH
+    log_id = LOG_RESPONSE['log']['id']
+
+    httpretty.register_uri(httpretty.GET, MOCK_API_URL, status=200,
+                           content_type='application/json', body=json.dumps(LOG_RESPONSE))
+    api.get_log(log_id)
+    assert inventory_utils.lookup(inventory_utils.LOGS, 'test log') == [log_id]
+
+    httpretty.register_uri(httpretty.DELETE, MOCK_API_URL, status=204)
+    api.delete_log(log_id)
+    assert inventory_utils.lookup(inventory_utils.LOGS, 'test log') == []
+
+
 @httpretty.activate
 @patch('lecli.api_utils.get_rw_apikey')
 @patch('lecli.log.api._url')
@@ -346,3 +346,47 @@ def test_replace_logset(mocked_url, mocked_rw_apikey, capsys):
 
     out, err = capsys.readouterr()
     assert not err
+
+
+@httpretty.activate
+@patch('lecli.api_utils.get_logset_cache_ttl')
+@patch('lecli.api_utils.get_ro_apikey')
+@patch('lecli.api_utils.get_rw_apikey')
+@patch('lecli.logset.api._url')
+def test_get_log_keys_from_logset_is_cached(mocked_url, mocked_rw_apikey, mocked_ro_apikey,
+                                            mocked_ttl, cache_dir):
+    mocked_url.return_value = '', MOCK_API_URL
+    mocked_ttl.return_value = 60
+    httpretty.register_uri(httpretty.GET, MOCK_API_URL, status=200,
+                           content_type='application/json', body=json.dumps(LOGSET_RESPONSE))
+    httpretty.register_uri(httpretty.PUT, MOCK_API_URL, status=200,
+                           content_type='application/json', body=json.dumps(LOGSET_RESPONSE))
+    log_id = LOGSET_RESPONSE['logset']['logs_info'][0]['id']
+
+    assert api.get_log_keys_from_logset('123') == [log_id]
+    assert api.get_log_keys_from_logset('123') == [log_id]
+    assert len(httpretty.HTTPretty.latest_requests) == 1
+
+    api.get_log_keys_from_logset('123', use_cache=False)
+    assert len(httpretty.HTTPretty.latest_requests) == 2
+
+    api.replace_logset('123', LOGSET_RESPONSE)
+    api.get_log_keys_from_logset('123')
+    assert len(httpretty.HTTPretty.latest_requests) == 4
+
+
+@httpretty.activate
+@patch('lecli.api_utils.get_logset_cache_ttl')
+@patch('lecli.api_utils.get_ro_apikey')
+@patch('lecli.logset.api._url')
+def test_get_log_keys_from_empty_logset_is_cached(mocked_url, mocked_ro_apikey, mocked_ttl,
+                                                  cache_dir):
+    mocked_url.return_value = '', MOCK_API_URL
+    mocked_ttl.return_value = 60
+    httpretty.register_uri(httpretty.GET, MOCK_API_URL, status=200,
+                           content_type='application/json',
+                           body=json.dumps({'logset': {'id': '123', 'logs_info': []}}))
+
+    assert api.get_log_keys_from_logset('123') == []
+    assert api.get_log_keys_from_logset('123') == []
+    assert len(httpretty.HTTPretty.latest_requests) == 1
@@ -1,10 +1,16 @@
 import json
+import Queue
+import threading
+import time
 import uuid
 
 import httpretty
+import pytest
 import requests
 from mock import patch, Mock
 
+from lecli import event_utils
+from lecli import response_utils
 from lecli.query import api
 
 DATE_FROM = '2016-05-18 11:04:00'
@@ -281,8 +287,8 @@ def test_fetch_results(mocked_generate_headers):
 
 
 @patch('lecli.api_utils.generate_headers')
-@patch('lecli.query.api.handle_response')
-def test_continue_request(mocked_headers, mocked_response_handle):
+@patch('time.sleep')
+def test_continue_request(mocked_sleep, mocked_headers):
     setup_httpretty()
 
     links_response = {
@@ -302,9 +308,10 @@ def test_continue_request(mocked_headers, mocked_response_handle):
     httpretty.register_uri(httpretty.GET, dest_url, content_type='application/json')
 
     resp = requests.get(MOCK_API_URL)
-    api.continue_request(resp, Mock())
+    next_response = api.continue_request(resp, Mock())
 
-    assert mocked_response_handle.called
+    assert next_response.url == dest_url
+    assert mocked_sleep.called
     assert mocked_headers.called
 
     teardown_httpretty()
@@ -328,6 +335,109 @@ def test_live_tail_api(mocked_url, mocked_handle_tail, mocked_generate_headers):
     teardown_httpretty()
 
 
+def test_merge_tail_events_orders_and_tags_events(capsys):
+    events = Queue.Queue()
+    events.put(('web', {'timestamp': 3, 'message': 'third'}))
+    events.put(('db', {'timestamp': 1, 'message': 'first'}))
+    events.put(('web', {'timestamp': 2, 'message': 'second'}))
+
+    api.merge_tail_events(events, lambda: False, 10, api.OUTPUT_NDJSON)
+
+    out, err = capsys.readouterr()
+    assert [json.loads(line) for line in out.splitlines()] == [
+        {'timestamp': 1, 'message': 'first', 'source': 'db'},
+        {'timestamp': 2, 'message': 'second', 'source': 'web'},
+        {'timestamp': 3, 'message': 'third', 'source': 'web'},
+    ]
+
+
+@patch('time.sleep')
+@patch('lecli.query.api.start_tail')
+@patch('lecli.api_utils.get_named_logkey_group')
+def test_tail_many_merges_sources(mocked_favorites, mocked_start_tail, mocked_sleep, capsys):
+    mocked_favorites.side_effect = lambda name: [name + '-key']
+    started = []
+
+    def start_tail(logkeys, leql, saved_query_id):
+        if logkeys[0] in started:
+            return _mock_page({}, 401)
+        started.append(logkeys[0])
+        timestamp = 2 if logkeys == ['db-key'] else 1
+        return _mock_page({'events': [{'timestamp': timestamp, 'message': logkeys[0]}]})
+    mocked_start_tail.side_effect = start_tail
+
+    with pytest.raises(SystemExit):
+        api.tail_many((), None, 0.5, favorites=('web', 'db'), output=api.OUTPUT_NDJSON)
+
+    out, err = capsys.readouterr()
+    assert [json.loads(line)['source'] for line in out.splitlines()] == ['web', 'db']
+    assert 'No continue link' in err
+    assert '[web] Live query failed.' in err
+
+
+@patch('lecli.query.api.iter_tail')
+@patch('lecli.query.api.start_tail')
+def test_tail_source_returns_once_stopped(mocked_start_tail, mocked_iter_tail):
+    pages = [_mock_page({'events': [{'timestamp': 1, 'message': 'first'}]})] * 3
+    mocked_iter_tail.return_value = iter(pages)
+    events = Queue.Queue()
+    stopped = threading.Event()
+    events.put = Mock(side_effect=lambda item: stopped.set())
+
+    api.tail_source(('web', ['web-key'], None, None, 1.0, events, stopped))
+
+    assert events.put.call_count == 1
+
+
+def _tail_pages(responses, restart, count):
+    pages = api.iter_tail(responses.pop(0), 1.0, restart)
+    return [next(pages) for _ in range(count)]
+
+
+@patch('time.sleep')
+@patch('lecli.query.api.get_results')
+def test_iter_tail_retries_failed_requests_with_backoff(mocked_get_results, mocked_sleep):
+    links = {'links': [{'href': MOCK_API_URL}]}
+    responses = [_mock_page(links), _mock_page({}, 503), _mock_page({}, 503),
+                 _mock_page(dict(links, events=[{'timestamp': 1}]))]
+    mocked_get_results.side_effect = lambda url: responses.pop(0)
+
+    pages = _tail_pages(responses, Mock(), 2)
+
+    assert pages[1].json()['events'] == [{'timestamp': 1}]
+    assert [call[0][0] for call in mocked_sleep.call_args_list] == [1.5, 2.0, 4.0]
+
+
+@patch('time.sleep')
+@patch('lecli.query.api.get_results')
+def test_iter_tail_recreates_expired_live_query(mocked_get_results, mocked_sleep):
+    responses = [_mock_page({'links': [{'href': MOCK_API_URL}]})]
+    mocked_get_results.return_value = _mock_page({}, 404)
+    restart = Mock(return_value=_mock_page({'events': [{'timestamp': 1}]}))
+
+    pages = _tail_pages(responses, restart, 2)
+
+    assert restart.call_count == 1
+    assert pages[1].json()['events'] == [{'timestamp': 1}]
+
+
+@patch('time.sleep')
+@patch('lecli.query.api.get_results')
+def test_iter_tail_exits_on_client_error(mocked_get_results, mocked_sleep):
+    responses = [_mock_page({'links': [{'href': MOCK_API_URL}]})]
+    mocked_get_results.return_value = _mock_page({}, 403)
+
+    with pytest.raises(SystemExit):
+        _tail_pages(responses, Mock(), 2)
+
+
+def test_adapt_poll_interval():
+    assert api.adapt_poll_interval(1.0, 1.0, True) == 0.5
+    assert api.adapt_poll_interval(0.25, 1.0, True) == 0.25
+    assert api.adapt_poll_interval(1.0, 1.0, False) == 1.5
+    assert api.adapt_poll_interval(4.0, 1.0, False) == 4.0
+
+
 def test_handle_response(capsys):
     setup_httpretty()
 
@@ -346,6 +456,58 @@ def test_handle_response(capsys):
     teardown_httpretty()
 
 
+def _mock_page(body, status_code=200):
+    response = Mock(status_code=status_code, headers={'Content-Type': 'application/json'})
+    response.json.return_value = body
+    return response
+
+
+@patch('lecli.query.api.fetch_results')
+def test_handle_response_follows_links_iteratively(mocked_fetch_results, capsys):
+    page_count = 1500  # deeper than the default recursion limit
+    pages = []
+    for index in range(page_count):
+        body = {'events': [{'timestamp': 1432080000000 + index, 'message': 'page %d' % index}]}
+        if index != page_count - 1:
+            body['links'] = [{'rel': 'Next', 'href': MOCK_API_URL + '/%d' % (index + 1)}]
+        pages.append(_mock_page(body))
+    mocked_fetch_results.side_effect = pages[1:]
+
+    api.handle_response(pages[0], Mock())
+
+    out, err = capsys.readouterr()
+    assert mocked_fetch_results.call_count == page_count - 1
+    assert 'page 0' in out
+    assert 'page %d' % (page_count - 1) in out
+
+
+@patch('lecli.query.api.fetch_results')
+def test_handle_response_drops_seen_events(mocked_fetch_results, capsys):
+    first = {'timestamp': 1432080000000, 'message': 'first'}
+    second = {'timestamp': 1432080000001, 'message': 'second'}
+    mocked_fetch_results.return_value = _mock_page({'events': [first, second]})
+
+    api.handle_response(_mock_page({'events': [first], 'links': [{'href': MOCK_API_URL}]}),
+                        Mock(), api.OUTPUT_NDJSON, event_utils.SeenEvents())
+
+    out, err = capsys.readouterr()
+    assert [json.loads(line)['message'] for line in out.splitlines()] == ['first', 'second']
+
+
+@patch('lecli.query.api.fetch_results')
+@patch('time.sleep')
+def test_iter_pages_polls_until_complete(mocked_sleep, mocked_fetch_results):
+    link = {'links': [{'rel': 'Self', 'href': MOCK_API_URL}]}
+    mocked_fetch_results.side_effect = [_mock_page(link, status_code=202),
+                                        _mock_page(SAMPLE_EVENTS_RESPONSE)]
+
+    pages = list(api.iter_pages(_mock_page(link, status_code=202), Mock()))
+
+    assert len(pages) == 1
+    assert pages[0].json() == SAMPLE_EVENTS_RESPONSE
+    assert mocked_sleep.call_count == 2
+
+
 def test_validate_query():
     # general query
     assert api.validate_query(query_string='foo', log_keys='bar', time_from=123) is True
@@ -387,3 +549,313 @@ def test_prepare_time_range_with_iso_dates():
     assert 'from' in leql_time_range
     assert 'to' in leql_time_range
     assert 'time_range' not in leql_time_range
+
+
+def test_validate_query_parallel():
+    assert api.validate_query(query_string='foo', log_keys='bar', time_from=1, time_to=2,
+                              parallel=4) is True
+    assert api.validate_query(query_string='foo', log_keys='bar', relative_time_range='today',
+                              parallel=4) is False
+
+
+def test_split_time_range():
+    windows = api.split_time_range({'from': 1000, 'to': 2000}, 4)
+
+    assert len(windows) == 4
+    assert windows[0]['from'] == 1000
+    assert windows[-1]['to'] == 2000
+    for left, right in zip(windows, windows[1:]):
+        assert left['to'] == right['from']
+
+
+def test_split_time_range_narrower_than_parts():
+    windows = api.split_time_range({'from': 1000, 'to': 1002}, 8)
+
+    assert windows == [{'from': 1000, 'to': 1001}, {'from': 1001, 'to': 1002}]
+
+
+@patch('lecli.query.api.run_query')
+def test_parallel_query_prints_windows_in_order(mocked_run_query, capsys):
+    def run_window(saved_query_id, log_keys, query_string, time_range):
+        # make earlier windows finish last
+        time.sleep((2000 - time_range['from']) / 100000.0)
+        return _mock_page({'events': [{'timestamp': time_range['from'],
+                                       'message': 'window %d' % time_range['from']}]})
+    mocked_run_query.side_effect = run_window
+
+    assert api.query(query_string='foo', log_keys=['foo'], time_from=1, time_to=2, parallel=4)
+
+    out, err = capsys.readouterr()
+    positions = [out.index('window %d' % start) for start in (1000, 1250, 1500, 1750)]
+    assert positions == sorted(positions)
+
+
+@patch('lecli.api_utils.get_pool_size')
+@patch('lecli.query.api.ThreadPool', wraps=api.ThreadPool)
+@patch('lecli.query.api.run_query')
+def test_parallel_query_caps_workers_at_pool_size(mocked_run_query, mocked_pool,
+                                                  mocked_pool_size, capsys):
+    mocked_pool_size.return_value = 2
+    mocked_run_query.side_effect = lambda *args: _mock_page({'events': []})
+
+    assert api.query(query_string='foo', log_keys=['foo'], time_from=1, time_to=2, parallel=8)
+
+    mocked_pool.assert_called_once_with(2)
+    assert mocked_run_query.call_count == 8
+
+
+@patch('lecli.query.api.run_query')
+def test_parallel_query_exits_when_a_window_fails(mocked_run_query, capsys):
+    def run_window(saved_query_id, log_keys, query_string, time_range):
+        if time_range['from'] == 1500:
+            raise requests.exceptions.ConnectionError('window failed')
+        return _mock_page({'events': []})
+    mocked_run_query.side_effect = run_window
+
+    with pytest.raises(SystemExit):
+        api.query(query_string='foo', log_keys=['foo'], time_from=1, time_to=2, parallel=4)
+
+    out, err = capsys.readouterr()
+    assert 'window failed' in err
+
+
+@patch('lecli.query.api.fetch_results')
+@patch('lecli.query.api.run_query')
+def test_stream_window_waits_while_its_queue_is_full(mocked_run_query, mocked_fetch_results):
+    def page(index):
+        return _mock_page({'events': [], 'links': [{'rel': 'Next', 'href': '/%d' % index}]})
+    mocked_run_query.return_value = page(1)
+    mocked_fetch_results.side_effect = [page(index) for index in range(2, 100)]
+    pages = Queue.Queue(maxsize=2)
+    cancelled = threading.Event()
+    worker = threading.Thread(target=api.stream_window,
+                              args=((None, ['foo'], 'foo', {'from': 1, 'to': 2}, pages,
+                                     cancelled),))
+    worker.start()
+    time.sleep(0.2)
+
+    assert pages.full()
+    assert mocked_fetch_results.call_count <= 2
+    cancelled.set()
+    worker.join(5)
+    assert not worker.is_alive()
+
+
+def test_poll_delay_backs_off_up_to_cap():
+    delays = [api.poll_delay(attempt) for attempt in range(20)]
+
+    assert delays[0] == api.MIN_POLL_DELAY
+    assert delays == sorted(delays)
+    assert delays[-1] == api.MAX_POLL_DELAY
+
+
+def test_poll_delay_shrinks_with_progress():
+    assert api.poll_delay(6, progress=95) < api.poll_delay(6, progress=10)
+    assert api.poll_delay(6, progress=100) == api.MIN_POLL_DELAY
+
+
+def test_poll_delay_spreads_rate_limit_budget():
+    headers = {'X-RateLimit-Remaining': '2', 'X-RateLimit-Reset': '30'}
+    assert api.poll_delay(0, headers=headers) == 15
+
+    headers = {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '30'}
+    assert api.poll_delay(0, headers=headers) == 30
+
+
+def test_write_ndjson(capsys):
+    api.print_response(_mock_page(SAMPLE_EVENTS_RESPONSE), api.OUTPUT_NDJSON)
+
+    out, err = capsys.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 3
+    assert [json.loads(line) for line in lines] == SAMPLE_EVENTS_RESPONSE['events']
+
+
+@patch('lecli.api_utils.generate_headers')
+@patch('lecli.query.api._url')
+def test_post_query_with_ndjson_output(mocked_url, mocked_generate_headers, capsys):
+    setup_httpretty()
+    mocked_url.return_value = '', MOCK_API_URL
+    httpretty.register_uri(httpretty.POST, MOCK_API_URL,
+                           content_type='application/json',
+                           body=json.dumps(SAMPLE_EVENTS_RESPONSE))
+    api.query(query_string='foo', log_keys='foo', relative_time_range='last 3 min',
+              output=api.OUTPUT_NDJSON)
+
+    out, err = capsys.readouterr()
+
+    assert 'Progress' not in out
+    assert [json.loads(line) for line in out.splitlines()] == SAMPLE_EVENTS_RESPONSE['events']
+
+    teardown_httpretty()
+
+
+def test_cached_response_decodes_body_once():
+    raw_response = _mock_page(SAMPLE_EVENTS_RESPONSE)
+    response = response_utils.CachedResponse(raw_response)
+
+    api.handle_response(response, Mock())
+
+    assert raw_response.json.call_count == 1
+    assert response.status_code == 200
+
+
+def test_result_cache_key_is_normalised():
+    time_range = {'from': 1000, 'to': 2000}
+
+    assert api.result_cache_key(None, ['b', 'a'], 'foo', time_range) == \
+        api.result_cache_key(None, ['a', 'b'], 'foo', time_range)
+    assert api.result_cache_key(None, ['a'], 'foo', time_range) != \
+        api.result_cache_key(None, ['a'], 'bar', time_range)
+
+
+def test_result_cache_key_bypasses_ranges_including_now():
+    now = int(time.time() * 1000)
+
+    assert api.result_cache_key(None, ['a'], 'foo', {'time_range': 'last 3 min'}) is None
+    assert api.result_cache_key(None, ['a'], 'foo', {'from': now - 1000, 'to': now}) is None
+
+
+@patch('lecli.query.api.run_query')
+def test_query_over_closed_range_is_cached(mocked_run_query, capsys):
+    mocked_run_query.return_value = _mock_page(SAMPLE_EVENTS_RESPONSE)
+
+    for _ in range(2):
+        assert api.query(query_string='foo', log_keys=['foo'], time_from=1, time_to=2,
+                         output=api.OUTPUT_NDJSON)
+
+    out, err = capsys.readouterr()
+    assert mocked_run_query.call_count == 1
+    assert len(out.splitlines()) == 2 * len(SAMPLE_EVENTS_RESPONSE['events'])
+
+
+@patch('lecli.query.api.run_query')
+def test_query_without_cache(mocked_run_query):
+    mocked_run_query.return_value = _mock_page(SAMPLE_EVENTS_RESPONSE)
+
+    for _ in range(2):
+        api.query(query_string='foo', log_keys=['foo'], time_from=1, time_to=2, use_cache=False)
+
+    assert mocked_run_query.call_count == 2
+
+
+def _timeseries_page(values):
+    return _mock_page({'statistics': {'from': 0, 'to': 1, 'stats': {}, 'groups': [],
+                                      'timeseries': {'global_timeseries': values}}})
+
+
+@patch('lecli.query.api.post_query')
+@patch('time.time')
+def test_query_incremental_only_queries_new_buckets(mocked_time, mocked_post_query, capsys):
+    hour = 3600 * 1000
+    mocked_time.return_value = 100 * 3600 + 10
+    mocked_post_query.side_effect = lambda log_keys, statement, time_range: _timeseries_page(
+        [{'count': 1.0}] * int(statement.split('timeslice(')[1].rstrip(')')))
+    kwargs = dict(log_keys=['foo'], query_string='calculate(count) timeslice(24)',
+                  relative_time_range='last 24 hours', incremental=True,
+                  output=api.OUTPUT_NDJSON)
+
+    assert api.query(**kwargs)
+    first_ranges = [call[0][2] for call in mocked_post_query.call_args_list]
+    assert first_ranges == [{'from': 77 * hour, 'to': 100 * hour},
+                            {'from': 100 * hour, 'to': 100 * hour + 10000}]
+
+    mocked_post_query.reset_mock()
+    mocked_time.return_value = 101 * 3600 + 10
+    assert api.query(**kwargs)
+    second_ranges = [call[0][2] for call in mocked_post_query.call_args_list]
+    # the bucket ending at the first run was too recent to be stored
+    assert second_ranges == [{'from': 99 * hour, 'to': 101 * hour},
+                             {'from': 101 * hour, 'to': 101 * hour + 10000}]
+
+    statistics = [json.loads(line) for line in capsys.readouterr()[0].splitlines()]
+    assert statistics[-1]['stats'] == {'global_timeseries': {'count': 24.0}}
+    assert len(statistics[-1]['timeseries']['global_timeseries']) == 24
+
+
+def test_query_incremental_needs_mergeable_rolling_window(capsys):
+    assert not api.query(log_keys=['foo'], query_string='calculate(average:bytes)',
+                         time_from=1, time_to=2, incremental=True)
+
+    out, err = capsys.readouterr()
+    assert 'calculating one of' in err
+    assert 'relative time range' in err
+
+
+@patch('lecli.query.api.run_query')
+def test_query_aggregates_events_instead_of_printing(mocked_run_query, capsys):
+    mocked_run_query.return_value = _mock_page(SAMPLE_EVENTS_RESPONSE)
+
+    assert api.query(query_string='foo', log_keys=['foo'], relative_time_range='last 1 hour',
+                     aggregate=('count', 'top1:missing'), output=api.OUTPUT_NDJSON)
+
+    out, err = capsys.readouterr()
+    assert json.loads(out) == {'count': 3, 'top1:missing': []}
+
+
+@patch('lecli.aggregate_utils.Aggregation.add_events', autospec=True)
+@patch('lecli.query.api.run_query')
+def test_parallel_query_aggregates_windows_while_others_are_fetched(mocked_run_query,
+                                                                    mocked_add_events, capsys):
+    first_window_added = threading.Event()
+
+    def run_window(saved_query_id, log_keys, query_string, time_range):
+        if time_range['from'] == 1750:
+            # the last window completes only once earlier pages were fed to the aggregation
+            assert first_window_added.wait(5)
+        return _mock_page({'events': [{'timestamp': time_range['from'], 'message': 'x=1'}]})
+    mocked_run_query.side_effect = run_window
+    mocked_add_events.side_effect = lambda aggregation, events: first_window_added.set()
+
+    assert api.query(query_string='foo', log_keys=['foo'], time_from=1, time_to=2, parallel=4,
+                     aggregate=('count',), output=api.OUTPUT_NDJSON)
+
+    assert mocked_add_events.call_count == 4
+    assert first_window_added.is_set()
+
+
+SAVED_QUERIES = [
+    {'id': '11111111-1111-1111-1111-111111111111', 'name': 'Health errors'},
+    {'id': '22222222-2222-2222-2222-222222222222', 'name': 'Health latency'},
+    {'id': '33333333-3333-3333-3333-333333333333', 'name': 'Signups'},
+]
+
+
+@patch('lecli.saved_query.api.list_saved_queries')
+def test_select_saved_queries_by_id_and_pattern(mocked_list, capsys):
+    mocked_list.return_value = SAVED_QUERIES
+
+    selected = api.select_saved_queries([SAVED_QUERIES[2]['id'], 'health*', 'nothing*'])
+
+    assert selected == [(query['id'], query['name']) for query in
+                        [SAVED_QUERIES[2], SAVED_QUERIES[0], SAVED_QUERIES[1]]]
+    assert "'nothing*'" in capsys.readouterr()[1]
+
+
+@patch('lecli.query.api.run_saved_query')
+@patch('lecli.saved_query.api.list_saved_queries')
+def test_query_saved_queries_tags_results(mocked_list, mocked_run_saved_query, capsys):
+    mocked_list.return_value = SAVED_QUERIES
+    mocked_run_saved_query.return_value = _mock_page(SAMPLE_EVENTS_RESPONSE)
+
+    assert api.query(saved_queries=('health*',), output=api.OUTPUT_NDJSON)
+
+    events = [json.loads(line) for line in capsys.readouterr()[0].splitlines()]
+    assert mocked_run_saved_query.call_count == 2
+    assert sorted(set(event['source'] for event in events)) == ['Health errors', 'Health latency']
+    assert len(events) == 2 * len(SAMPLE_EVENTS_RESPONSE['events'])
+
+
+@patch('lecli.query.api.run_saved_query')
+@patch('lecli.saved_query.api.list_saved_queries')
+def test_query_saved_queries_exits_after_failure(mocked_list, mocked_run_saved_query, capsys):
+    mocked_list.return_value = SAVED_QUERIES
+    mocked_run_saved_query.side_effect = [_mock_page(SAMPLE_EVENTS_RESPONSE),
+                                          requests.exceptions.ConnectionError('refused')]
+
+    with pytest.raises(SystemExit):
+        api.query(saved_queries=('health*',), output=api.OUTPUT_NDJSON)
+
+    out, err = capsys.readouterr()
+    assert 'failed' in err
+    assert len(out.splitlines()) == len(SAMPLE_EVENTS_RESPONSE['events'])
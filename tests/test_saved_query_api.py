@@ -197,3 +197,17 @@ def test_failing_create_saved_query(mocked_url, mocked_rw_apikey, mocked_account
     assert "Invalid field: time_range\n" in out
     assert "Message: Invalid query: time_range cannot be specified with from and/or to fields" in out
 
+
+
+@httpretty.activate
+@patch('lecli.api_utils.get_account_resource_id')
+@patch('lecli.api_utils.get_rw_apikey')
+@patch('lecli.saved_query.api._url')
+def test_list_saved_queries(mocked_url, mocked_rw_apikey, mocked_account_resource_id):
+    mocked_url.return_value = '', MOCK_API_URL
+    mocked_rw_apikey.return_value = str(uuid.uuid4())
+    mocked_account_resource_id.return_value = str(uuid.uuid4())
+    httpretty.register_uri(httpretty.GET, MOCK_API_URL, status=200, content_type='application/json',
+                           body=json.dumps({'saved_queries': [SAVED_QUERY_RESPONSE]}))
+
+    assert api.list_saved_queries() == [SAVED_QUERY_RESPONSE]
@@ -0,0 +1,42 @@
+from mock import patch
+
+import lecli
+from lecli.shell import api
+
+
+def test_shell_runs_commands(capsys):
+    shell = api.Shell()
+
+    shell.onecmd('lecli --version')
+    out, err = capsys.readouterr()
+    assert shell.exit_code == 0
+    assert lecli.__version__ in out
+
+    shell.onecmd('nosuchcommand')
+    out, err = capsys.readouterr()
+    assert shell.exit_code == 2
+    assert 'No such command' in err
+
+
+def test_shell_help(capsys):
+    api.Shell().onecmd('help')
+
+    out, err = capsys.readouterr()
+    assert 'Usage: lecli' in out
+
+
+def test_shell_refuses_nested_shell(capsys):
+    with patch('lecli.cli.run') as mocked_run:
+        api.Shell().onecmd('shell')
+
+    assert not mocked_run.called
+    assert 'cannot be run within the shell' in capsys.readouterr()[1]
+
+
+def test_shell_exit():
+    assert api.Shell().onecmd('exit')
+    assert api.Shell().onecmd('EOF')
+
+
+def test_shell_completes_command_names():
+    assert 'query ' in api.Shell().completenames('qu')
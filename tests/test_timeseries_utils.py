@@ -0,0 +1,41 @@
+from lecli import timeseries_utils
+
+
+def test_parse_relative_range():
+    assert timeseries_utils.parse_relative_range('last 24 hours') == 24 * 3600
+    assert timeseries_utils.parse_relative_range('Last 10 MIN') == 600
+    assert timeseries_utils.parse_relative_range('last 2 months') is None
+    assert timeseries_utils.parse_relative_range('yesterday') is None
+    assert timeseries_utils.parse_relative_range(None) is None
+
+
+def test_statement_timeslice():
+    assert timeseries_utils.calculation('where(status=500) calculate(COUNT)') == 'count'
+    assert timeseries_utils.calculation('where(status=500)') is None
+    assert timeseries_utils.bucket_count('calculate(count) timeslice(24)') == 24
+    assert timeseries_utils.bucket_count('calculate(count)') == timeseries_utils.DEFAULT_BUCKETS
+    assert timeseries_utils.with_timeslice('where(a) calculate(sum:bytes) timeslice(24)', 3) == \
+        'where(a) calculate(sum:bytes) timeslice(3)'
+
+
+def test_series_key_ignores_timeslice():
+    assert timeseries_utils.series_key(['b', 'a'], 'calculate(count) timeslice(24)', 1000) == \
+        timeseries_utils.series_key(['a', 'b'], 'calculate(count)', 1000)
+    assert timeseries_utils.series_key(['a'], 'calculate(count)', 1000) != \
+        timeseries_utils.series_key(['a'], 'calculate(count)', 2000)
+
+
+def test_store_buckets_drops_old_buckets():
+    timeseries_utils.store_buckets('key', {1000: {'count': 1}, 2000: {'count': 2}}, 0)
+    timeseries_utils.store_buckets('key', {3000: {'count': 3}}, 2000)
+
+    assert timeseries_utils.load_buckets('key', 0) == {2000: {'count': 2}, 3000: {'count': 3}}
+
+
+def test_statistics_body_merges_totals():
+    values = [{'count': 2.0}, {'count': 3.0}]
+    body = timeseries_utils.statistics_body('global_timeseries', values, 1000, 500)
+
+    assert body['statistics']['stats'] == {'global_timeseries': {'count': 5.0}}
+    assert body['statistics']['to'] == 2000
+    assert body['statistics']['timeseries']['global_timeseries'] == values
@@ -3,7 +3,7 @@ import uuid
 
 import httpretty
 import requests
-from mock import patch
+from mock import patch, Mock
 from tabulate import tabulate
 
 from lecli.user import api
@@ -160,3 +160,59 @@ def test_handle_create_user_response_status_201(mocked_account_resource_id, caps
 
     out, err = capsys.readouterr()
     assert "Added user to account" in out
+
+
+@patch('lecli.user.api.post_existing_user')
+@patch('lecli.user.api.post_new_user')
+@patch('lecli.user.api.fetch_users')
+def test_import_users(mocked_fetch_users, mocked_post_new_user, mocked_post_existing_user,
+                      tmpdir, capsys):
+    users_file = tmpdir.join('users.csv')
+    users_file.write('first_name,last_name,email,user_key\n'
+                     'John,Smith,john@smith.com,\n'
+                     'Jane,Doe,JANE@doe.com,\n'
+                     ',,,12345678-aaaa-bbbb-1234-1234cb123456\n'
+                     'Jim,Beam,jim@beam.com,\n'
+                     'John,Smith,john@smith.com,\n'
+                     'No,Email,,\n')
+    mocked_fetch_users.return_value = [{'id': 'x', 'email': 'jane@doe.com'}]
+    mocked_post_new_user.side_effect = lambda first, last, email: Mock(
+        status_code=400 if first == 'Jim' else 201, text='Invalid email\n')
+    mocked_post_existing_user.return_value = Mock(status_code=200)
+
+    assert not api.import_users(str(users_file), workers=3)
+
+    out, err = capsys.readouterr()
+    assert mocked_fetch_users.call_count == 1
+    assert mocked_post_new_user.call_count == 2
+    assert '[1] john@smith.com: ADDED' in out
+    assert '[2] JANE@doe.com: SKIPPED' in out
+    assert '[3] 12345678-aaaa-bbbb-1234-1234cb123456: ADDED' in out
+    assert '[4] jim@beam.com: FAILED (status code 400: Invalid email)' in err
+    assert '[5] john@smith.com: SKIPPED' in out
+    assert '[6] invalid user: FAILED' in err
+    assert '6 users, 2 added, 2 skipped, 2 failed' in out
+
+
+def test_load_users_from_json(tmpdir):
+    users_file = tmpdir.join('users.json')
+    users_file.write(json.dumps({'users': [{'First_Name': 'John', 'email': ' john@smith.com '}]}))
+
+    assert api.load_users(str(users_file)) == [{'first_name': 'John', 'email': 'john@smith.com'}]
+
+
+def test_load_users_drops_fields_that_are_not_text(tmpdir):
+    users_file = tmpdir.join('users.json')
+    users_file.write(json.dumps([{'email': 'john@smith.com', 'admin': True, 'first_name': None,
+                                  'groups': ['ops'], 'age': 42}]))
+
+    assert api.load_users(str(users_file)) == [{'email': 'john@smith.com'}]
+
+
+@patch('lecli.user.api.post_existing_user')
+def test_import_user_reports_status_code_and_body_of_forbidden_request(mocked_post):
+    mocked_post.return_value = Mock(status_code=403, text='Not allowed to add this user')
+
+    assert api.import_user((0, {'user_key': '12345678-aaaa-bbbb-1234-1234cb123456'})) == (
+        0, '12345678-aaaa-bbbb-1234-1234cb123456', False,
+        'status code 403: Not allowed to add this user')